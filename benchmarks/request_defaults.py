@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Cost of merging request defaults into the large payload request.
+
+Compares the layered merge of `pydeform.utils.merge_request_defaults`
+with the previous deep copy of the request kwargs. Allocated bytes are
+measured with `tracemalloc` (python 3.4+).
+
+    python benchmarks/request_defaults.py --size 200000
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import timeit
+from copy import deepcopy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydeform.utils import merge_request_defaults  # noqa
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def deepcopy_merge_request_defaults(request_kwargs, request_defaults):
+    """Previous implementation."""
+    if not request_defaults:
+        return request_kwargs
+    final_request_kwargs = deepcopy(request_kwargs)
+    for key, value in request_defaults.items():
+        if key not in final_request_kwargs:
+            final_request_kwargs[key] = value
+    if 'files' in request_kwargs:
+        final_request_kwargs['files'] = request_kwargs['files']
+    return final_request_kwargs
+
+
+def get_document(size):
+    """Returns document with about `size` bytes of JSON."""
+    document = {'_id': 'gena', 'items': []}
+    item_size = 100
+    for i in range(size // item_size):
+        document['items'].append({
+            'index': i,
+            'name': 'item %s' % i,
+            'tags': ['a', 'b', 'c'],
+            'price': i * 1.5,
+            'active': i % 2 == 0,
+        })
+    return document
+
+
+def measure_allocations(func):
+    if tracemalloc is None:
+        return float('nan')
+    tracemalloc.start()
+    func()
+    allocated = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=200000)
+    parser.add_argument('--calls', type=int, default=100)
+    args = parser.parse_args()
+
+    request_kwargs = {
+        'url': 'https://project.deform.io/api/collections/users/documents/',
+        'headers': {'Authorization': 'Token token'},
+        'json': get_document(args.size),
+    }
+    request_defaults = {'timeout': 10, 'verify': True}
+    print('%-10s %14s %14s' % ('merge', 'time, us', 'allocated, KB'))
+    for name, merge in [('deepcopy', deepcopy_merge_request_defaults),
+                        ('layered', merge_request_defaults)]:
+        def call():
+            return merge(request_kwargs, request_defaults)
+
+        seconds = timeit.timeit(call, number=args.calls) / args.calls
+        allocated = measure_allocations(call)
+        print('%-10s %14.1f %14.1f' % (name, seconds * 1e6, allocated / 1024.))
+
+
+if __name__ == '__main__':
+    main()
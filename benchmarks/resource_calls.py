@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Calls per second of `document.get` without the network.
+
+Compares the compiled request plan of `ResourceMethodBase` with the
+previous request context building, which copied the params definitions
+and rebuilt the URL and headers on every call. Transport returns the
+canned response, so only the client side CPU time is measured.
+
+    python benchmarks/resource_calls.py --calls 20000
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa
+from pydeform.client import ProjectClient  # noqa
+from pydeform.resources.utils import (  # noqa
+    get_headers,
+    get_params_by_destination,
+    get_payload,
+    get_query_params,
+    get_url
+)
+from pydeform.transport import Transport  # noqa
+
+DOCUMENT = json.dumps({'_id': 'gena', 'name': 'Gena', 'age': 27}).encode()
+
+
+class CannedTransport(Transport):
+    def request(self, method, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'application/json'
+        response._content = DOCUMENT
+        response.url = url
+        return response
+
+
+def legacy_get_context(self, params):
+    """Previous implementation."""
+    params_definitions = self.get_params_definitions()
+    params_by_destination = get_params_by_destination(
+        params,
+        definitions=params_definitions
+    )
+    context = {
+        'url': get_url(
+            base_uri=self.base_uri,
+            path=self.path,
+            params=params_by_destination.get('uri', {}),
+            definitions=params_definitions,
+        ),
+        'headers': get_headers(
+            auth_header=self.auth_header,
+            params=params_by_destination.get('headers', {}),
+            definitions=params_definitions,
+        ),
+        'params': get_query_params(
+            params=params_by_destination.get('query_params', {}),
+            definitions=params_definitions,
+        ),
+    }
+    for key in [key for key, value in context.items() if not value]:
+        del context[key]
+    payload = get_payload(
+        params_by_destination.get('payload'),
+        definitions=params_definitions
+    )
+    if self.action:
+        context['headers']['X-Action'] = self.action
+    if payload:
+        context[payload['type']] = payload['data']
+    else:
+        context['headers']['Content-Type'] = 'application/json'
+    return context
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20000)
+    args = parser.parse_args()
+
+    client = ProjectClient(
+        base_uri='https://project.deform.io/api/',
+        auth_header='Token token',
+        requests_session=CannedTransport(),
+        request_defaults=None
+    )
+    method = client.document.get
+
+    def call():
+        return method(collection='users', identity='gena')
+
+    print('%-10s %14s %14s' % ('context', 'calls/sec', 'call, us'))
+    for name, get_context in [('legacy', legacy_get_context),
+                              ('compiled', None)]:
+        if get_context is not None:
+            method.get_context = get_context.__get__(method)
+        else:
+            method.__dict__.pop('get_context', None)
+        timeit.timeit(call, number=min(args.calls, 1000))
+        seconds = timeit.timeit(call, number=args.calls) / args.calls
+        print('%-10s %14.0f %14.1f' % (name, 1 / seconds, seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main()
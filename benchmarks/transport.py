@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Per call CPU overhead of the transports.
+
+Small document is fetched from the local server with every transport.
+Only the CPU time of the calling thread is measured, so the server
+work is not included.
+
+    python benchmarks/transport.py --calls 5000
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydeform.client import ProjectClient  # noqa
+from pydeform.pool import create_requests_session  # noqa
+from pydeform.six.moves import BaseHTTPServer, socketserver  # noqa
+from pydeform.transport import Urllib3Transport  # noqa
+
+DOCUMENT = json.dumps({'_id': 'gena', 'name': 'Gena', 'age': 27}).encode()
+
+# thread CPU time is not available on python 2
+cpu_time = getattr(time, 'thread_time', time.time)
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # send headers and body in one packet
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(DOCUMENT)))
+        self.end_headers()
+        self.wfile.write(DOCUMENT)
+
+
+def start_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def measure(func, calls):
+    for i in range(min(calls, 100)):
+        func()
+    started = cpu_time()
+    for i in range(calls):
+        func()
+    return (cpu_time() - started) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+
+    server = start_server()
+    url = 'http://127.0.0.1:%s' % server.server_address[1]
+    transports = [
+        ('requests', create_requests_session()),
+        ('urllib3', Urllib3Transport()),
+    ]
+    print('%-10s %16s %16s' % ('transport', 'request, us', 'document.get, us'))
+    for name, transport in transports:
+        client = ProjectClient(
+            base_uri=url + '/api/',
+            auth_header='Token token',
+            requests_session=transport,
+            request_defaults=None
+        )
+        raw = measure(lambda: transport.request('GET', url + '/'), args.calls)
+        document = measure(
+            lambda: client.document.get(collection='users', identity='gena'),
+            args.calls
+        )
+        print('%-10s %16.1f %16.1f' % (name, raw * 1e6, document * 1e6))
+        transport.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Cost of building the document URL.
+
+Compares `get_url` joining and quoting every path segment by `uri_join`
+with the compiled `RequestPlan` URL template. Hot identities are served
+by the quoting cache, cold identities are unique for every call.
+
+    python benchmarks/url_building.py --calls 100000
+"""
+from __future__ import print_function
+
+import argparse
+import itertools
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydeform.resources.utils import RequestPlan, get_url  # noqa
+
+BASE_URI = 'https://project.deform.io/api/'
+PATH = ['collections', '{collection}', 'documents', '{identity}', '{property}']
+DEFINITIONS = {
+    'collection': {'dest': 'uri'},
+    'identity': {'dest': 'uri'},
+    'property': {'dest': 'uri'},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=100000)
+    parser.add_argument('--hot-keys', type=int, default=100)
+    args = parser.parse_args()
+
+    plan = RequestPlan(
+        base_uri=BASE_URI,
+        path=PATH,
+        definitions=DEFINITIONS,
+        headers={}
+    )
+    hot = itertools.cycle([
+        {'collection': 'users', 'identity': 'user %s' % i}
+        for i in range(args.hot_keys)
+    ])
+    cold = ({'collection': 'users', 'identity': 'user %s' % i}
+            for i in itertools.count())
+    print('%-10s %-6s %10s' % ('url', 'keys', 'call, us'))
+    for keys_name, keys in [('hot', hot), ('cold', cold)]:
+        for name, func in [
+            ('get_url', lambda params: get_url(
+                BASE_URI, PATH, params, DEFINITIONS
+            )),
+            ('plan', plan.get_url),
+        ]:
+            seconds = timeit.timeit(
+                lambda: func(next(keys)),
+                number=args.calls
+            ) / args.calls
+            print('%-10s %-6s %10.2f' % (name, keys_name, seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+from pydeform.aio.client import AsyncClient  # flake8: noqa
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+from pydeform.aio.resources import (
+    AsyncCollectionListResource,
+    AsyncCollectionOneResource,
+    AsyncCurrentProjectInfoResource,
+    AsyncDocumentListResource,
+    AsyncDocumentOneResource,
+    AsyncNonAuthUserResource,
+    AsyncProjectListResource,
+    AsyncProjectOneResource,
+    AsyncSessionUserResource
+)
+from pydeform.aio.utils import aiohttp
+from pydeform.auth import (
+    get_session_http_auth_header,
+    get_token_http_auth_header
+)
+from pydeform.utils import get_base_uri
+
+
+class AsyncClient(object):
+    """Deform.io asyncio client class.
+
+    Has the same resources as [Client](#client), but resource methods
+    return coroutines and iteration over the found items is done with
+    `async for`. Iteration options except `batch_size` and document
+    `export` are not supported.
+
+    Requires python 3.6+ and [aiohttp](https://aiohttp.readthedocs.io/).
+    Client should be created inside a coroutine, because it creates
+    aiohttp's session if `session` is not provided.
+
+    Parameters:
+
+    * `host` - HTTP server host. E.g. `deform.io`.
+    * `port` - HTTP server port. Default is `None`.
+    * `secure` - if `True` client will make secure request via `https`.
+       Default is `True`.
+    * `session` - aiohttp's `ClientSession` instance. Default is `None`
+       (session is created by the client and closed on `close()`).
+    * `request_defaults` - python requests' request defaults. Supported
+       are `timeout`, `verify`, `allow_redirects` and `proxies`.
+       Default is `None`.
+    * `api_base_path` - HTTP server's api uri base path. Default is `/api/`.
+    * `retry_policy`, `circuit_breaker`, `rate_limiter`, `hedging_policy`,
+       `compression_policy` and `json_codec` - same as for
+       [Client](#client).
+
+    Example:
+
+    ```python
+    async with AsyncClient(host='deform.io') as client:
+        project_client = client.auth(
+            'token',
+            auth_key='token-value',
+            project_id='some-project',
+        )
+        document = await project_client.document.get(
+            collection='users',
+            identity='gena'
+        )
+        async for user in project_client.documents.find(collection='users'):
+            print(user)
+    ```
+    """
+
+    def __init__(self,
+                 host,
+                 port=None,
+                 secure=True,
+                 session=None,
+                 request_defaults=None,
+                 api_base_path='/api/',
+                 retry_policy=None,
+                 circuit_breaker=None,
+                 rate_limiter=None,
+                 hedging_policy=None,
+                 compression_policy=None,
+                 json_codec=None):
+        self.host = host
+        self.port = port
+        self.secure = secure
+        self.own_session = session is None
+        self.session = session or aiohttp.ClientSession()
+        self.request_defaults = request_defaults
+        self.api_base_path = api_base_path
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self.hedging_policy = hedging_policy
+        self.compression_policy = compression_policy
+        self.json_codec = json_codec
+        self.http_kwargs = {
+            'requests_session': self.session,
+            'request_defaults': self.request_defaults,
+            'retry_policy': self.retry_policy,
+            'circuit_breaker': self.circuit_breaker,
+            'rate_limiter': self.rate_limiter,
+            'hedging_policy': self.hedging_policy,
+            'compression_policy': self.compression_policy,
+            'json_codec': self.json_codec,
+        }
+        self.user = AsyncNonAuthUserResource(
+            base_uri=get_base_uri(
+                host=self.host,
+                port=self.port,
+                secure=self.secure,
+                api_base_path=self.api_base_path
+            ),
+            auth_header=None,
+            **self.http_kwargs
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Closes aiohttp session if it was created by the client."""
+        if self.own_session:
+            await self.session.close()
+
+    def auth(self, auth_type, auth_key, project_id=None):
+        """Creates authenticated client.
+
+        Same as [Client.auth](#clientauth) but returns
+        `AsyncSessionAuthClient` or `AsyncProjectClient`.
+        """
+        if auth_type == 'session':
+            return AsyncSessionAuthClient(
+                auth_header=get_session_http_auth_header(auth_key),
+                host=self.host,
+                port=self.port,
+                secure=self.secure,
+                api_base_path=self.api_base_path,
+                **self.http_kwargs
+            )
+        elif auth_type == 'token':
+            if not project_id:
+                msg = 'You should provide project_id for token authentication'
+                raise ValueError(msg)
+            return AsyncProjectClient(
+                base_uri=get_base_uri(
+                    project=project_id,
+                    host=self.host,
+                    port=self.port,
+                    secure=self.secure,
+                    api_base_path=self.api_base_path
+                ),
+                auth_header=get_token_http_auth_header(auth_key),
+                **self.http_kwargs
+            )
+
+
+class AsyncSessionAuthClient(object):
+    """Async session auth client.
+
+    You should not initalize this client manually.
+    Use [AsyncClient.auth](#asyncclientauth) method with ``session``
+    authentication.
+    """
+
+    def __init__(self,
+                 auth_header,
+                 host,
+                 port,
+                 secure,
+                 api_base_path,
+                 **http_kwargs):
+        self.host = host
+        self.port = port
+        self.secure = secure
+        self.auth_header = auth_header
+        self.api_base_path = api_base_path
+        self.http_kwargs = http_kwargs
+        self.base_uri = get_base_uri(
+            host=self.host,
+            port=self.port,
+            secure=self.secure,
+            api_base_path=self.api_base_path
+        )
+        resource_kwargs = dict(
+            http_kwargs,
+            base_uri=self.base_uri,
+            auth_header=auth_header
+        )
+        self.user = AsyncSessionUserResource(**resource_kwargs)
+        self.projects = AsyncProjectListResource(**resource_kwargs)
+        self.project = AsyncProjectOneResource(**resource_kwargs)
+
+    def use_project(self, project_id):
+        """Creates an instance of `AsyncProjectClient`,
+        providing session authentication.
+        """
+        return AsyncProjectClient(
+            base_uri=get_base_uri(
+                project=project_id,
+                host=self.host,
+                port=self.port,
+                secure=self.secure,
+                api_base_path=self.api_base_path
+            ),
+            auth_header=self.auth_header,
+            **self.http_kwargs
+        )
+
+
+class AsyncProjectClient(object):
+    """Async project client.
+
+    You should not initalize this client manually.
+    Use [AsyncClient.auth](#asyncclientauth) method with ``token``
+    authentication or `AsyncSessionAuthClient.use_project` method.
+    """
+
+    def __init__(self, base_uri, auth_header, **http_kwargs):
+        resource_kwargs = dict(
+            http_kwargs,
+            base_uri=base_uri,
+            auth_header=auth_header
+        )
+        self.base_uri = base_uri
+        self.auth_header = auth_header
+        self.http_kwargs = http_kwargs
+        self.info = AsyncCurrentProjectInfoResource(**resource_kwargs)
+        self.collections = AsyncCollectionListResource(**resource_kwargs)
+        self.collection = AsyncCollectionOneResource(**resource_kwargs)
+        self.documents = AsyncDocumentListResource(**resource_kwargs)
+        self.document = AsyncDocumentOneResource(**resource_kwargs)
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+from pydeform.aio.utils import (
+    do_http_request,
+    iterate_batches_by_pagination,
+    iterate_by_pagination
+)
+from pydeform.codec import get_response_json
+from pydeform.exceptions import DeformException
+from pydeform.resources import (
+    CollectionListResource,
+    CollectionOneResource,
+    CurrentProjectInfoResource,
+    DocumentListResource,
+    DocumentOneResource,
+    NonAuthUserResource,
+    ProjectListResource,
+    ProjectOneResource,
+    SessionUserResource
+)
+from pydeform.resources.base import (
+    CREATE_MANY_WORKERS,
+    CreateManyResourceMethod,
+    ExportListResourceMethod,
+    ResourceMethodBase
+)
+from pydeform.six import string_types
+from pydeform.utils import read_records
+
+# iteration options of the sync resources supported by the async ones
+SUPPORTED_PAGINATION_OPTIONS = ['batch_size']
+_DONE = object()
+
+
+class AsyncResourceMethodMixin(object):
+    """
+    Makes resource method return a coroutine or an async iterator
+    over the items if pagination is not activated.
+
+    Parameters and context are prepared by the sync resource method.
+    """
+
+    def __call__(self,
+                 timeout=None,
+                 **params):
+        pagination_options = self._pop_pagination_options(params)
+        for key, value in pagination_options.items():
+            if key not in SUPPORTED_PAGINATION_OPTIONS and (
+                    value != ResourceMethodBase.pagination_options.get(key)):
+                raise ValueError('%s is not supported by AsyncClient' % key)
+        self._check_params_required(params)
+        context = self.get_context(params)
+        context['timeout'] = timeout
+        if self.is_paginatable:
+            if self._pagination_is_activated(context):
+                return self._request_page(context)
+            elif self.iterate_batches:
+                return iterate_batches_by_pagination(
+                    method=self.method,
+                    request_kwargs=context,
+                    batch_size=pagination_options.get('batch_size'),
+                    **self.get_http_kwargs()
+                )
+            else:
+                return iterate_by_pagination(
+                    method=self.method,
+                    request_kwargs=context,
+                    **self.get_http_kwargs()
+                )
+        return self._request(context)
+
+    async def _request_page(self, context):
+        response = await do_http_request(
+            method=self.method,
+            request_kwargs=context,
+            **self.get_http_kwargs()
+        )
+        return self._prepare_paginated_response(
+            get_response_json(response, self.json_codec)
+        )
+
+    async def _request(self, context):
+        response = await do_http_request(
+            method=self.method,
+            request_kwargs=context,
+            **self.get_http_kwargs()
+        )
+        if context.get('stream'):
+            return response.content
+        return self._prepare_response(response)
+
+
+class AsyncCreateManyResourceMethodMixin(object):
+    """
+    Makes `create_many` return an async iterator over the results
+    of the `workers` concurrent coroutines.
+    """
+
+    def __call__(self,
+                 records,
+                 workers=CREATE_MANY_WORKERS,
+                 timeout=None,
+                 **params):
+        self._check_params_required(params)
+        if isinstance(records, string_types):
+            records = read_records(records)
+        return self._create_many(records, workers, timeout, params)
+
+    async def _create_many(self, records, workers, timeout, params):
+        results = asyncio.Queue(maxsize=workers * 2)
+        indexed_records = enumerate(records)
+
+        async def worker():
+            try:
+                for index, record in indexed_records:
+                    result = await self._create(index, record, timeout, params)
+                    await results.put(result)
+            except Exception as e:
+                await results.put(e)
+            await results.put(_DONE)
+
+        tasks = [asyncio.ensure_future(worker()) for i in range(workers)]
+        try:
+            done = 0
+            while done < workers:
+                result = await results.get()
+                if result is _DONE:
+                    done += 1
+                elif isinstance(result, Exception):
+                    raise result
+                else:
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _create(self, index, record, timeout, params):
+        result = {
+            'index': index,
+            'id': record.get('_id'),
+            'created': False,
+            'error': None,
+        }
+        try:
+            if '_id' in record:
+                response = await self.save_one(
+                    timeout=timeout,
+                    identity=record['_id'],
+                    data=record,
+                    **params
+                )
+                result['created'] = response['created']
+            else:
+                response = await self.create_one(
+                    timeout=timeout,
+                    data=record,
+                    **params
+                )
+                result['id'] = response['_id']
+                result['created'] = True
+        except DeformException as e:
+            result['error'] = e
+        return result
+
+
+def get_async_method_class(method_class):
+    attrs = {}
+    if issubclass(method_class, CreateManyResourceMethod):
+        mixin = AsyncCreateManyResourceMethodMixin
+        attrs['create_one_method_class'] = get_async_method_class(
+            method_class.create_one_method_class
+        )
+        attrs['save_one_method_class'] = get_async_method_class(
+            method_class.save_one_method_class
+        )
+    else:
+        mixin = AsyncResourceMethodMixin
+    return type('Async' + method_class.__name__, (mixin, method_class), attrs)
+
+
+def get_async_resource_class(resource_class):
+    """
+    Creates async version of the resource with the same methods except
+    the file export.
+    """
+    methods = dict(
+        (name, get_async_method_class(method_class))
+        for name, method_class in resource_class.methods.items()
+        if not issubclass(method_class, ExportListResourceMethod)
+    )
+    return type(
+        'Async' + resource_class.__name__,
+        (resource_class,),
+        {'methods': methods}
+    )
+
+
+AsyncNonAuthUserResource = get_async_resource_class(NonAuthUserResource)
+AsyncSessionUserResource = get_async_resource_class(SessionUserResource)
+AsyncProjectListResource = get_async_resource_class(ProjectListResource)
+AsyncProjectOneResource = get_async_resource_class(ProjectOneResource)
+AsyncCurrentProjectInfoResource = get_async_resource_class(
+    CurrentProjectInfoResource
+)
+AsyncCollectionListResource = get_async_resource_class(
+    CollectionListResource
+)
+AsyncCollectionOneResource = get_async_resource_class(CollectionOneResource)
+AsyncDocumentListResource = get_async_resource_class(DocumentListResource)
+AsyncDocumentOneResource = get_async_resource_class(DocumentOneResource)
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import time
+
+import requests
+from requests.exceptions import (
+    ConnectionError,
+    ConnectTimeout,
+    ReadTimeout,
+    RequestException
+)
+from requests.structures import CaseInsensitiveDict
+
+from pydeform.breaker import is_failure
+from pydeform.codec import DEFAULT_JSON_CODEC, get_response_json
+from pydeform.six.moves.urllib.parse import urlparse
+from pydeform.utils import get_http_error, merge_request_defaults
+
+try:
+    import aiohttp
+except ImportError:
+    raise ImportError(
+        'aiohttp is required for AsyncClient. '
+        'Install it with "pip install python-deform[async]"'
+    )
+
+# python requests' request kwargs used by the resources
+_SUPPORTED_REQUEST_KWARGS = set([
+    'url',
+    'params',
+    'headers',
+    'json',
+    'data',
+    'files',
+    'timeout',
+    'verify',
+    'allow_redirects',
+    'stream',
+    'proxies',
+])
+_CONNECT_TIMEOUT_ERRORS = tuple(
+    i for i in [getattr(aiohttp, 'ConnectionTimeoutError', None)] if i
+)
+
+
+def get_aiohttp_request_kwargs(request_kwargs):
+    """Converts python requests' request kwargs to aiohttp's ones."""
+    unsupported = set(request_kwargs) - _SUPPORTED_REQUEST_KWARGS
+    if unsupported:
+        raise ValueError(
+            '%s is not supported by AsyncClient' % ', '.join(
+                sorted(unsupported)
+            )
+        )
+    url = request_kwargs['url']
+    response = {
+        'headers': request_kwargs.get('headers'),
+        'allow_redirects': request_kwargs.get('allow_redirects', True),
+        'timeout': get_aiohttp_timeout(request_kwargs.get('timeout')),
+    }
+    if request_kwargs.get('params'):
+        response['params'] = dict(
+            (key, str(value) if isinstance(value, bool) else value)
+            for key, value in request_kwargs['params'].items()
+            if value is not None
+        )
+    if 'json' in request_kwargs:
+        response['json'] = request_kwargs['json']
+    if 'data' in request_kwargs:
+        response['data'] = request_kwargs['data']
+    if 'files' in request_kwargs:
+        response['data'] = get_form_data(request_kwargs['files'])
+    if request_kwargs.get('verify', True) is False:
+        response['ssl'] = False
+    proxies = request_kwargs.get('proxies') or {}
+    proxy = proxies.get(urlparse(url).scheme)
+    if proxy:
+        response['proxy'] = proxy
+    return response
+
+
+def get_aiohttp_timeout(timeout):
+    if timeout is None:
+        return aiohttp.ClientTimeout(total=None)
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+    else:
+        connect = read = timeout
+    return aiohttp.ClientTimeout(
+        total=None,
+        sock_connect=connect,
+        sock_read=read
+    )
+
+
+def get_form_data(files):
+    form_data = aiohttp.FormData()
+    for key, value in files.items():
+        if isinstance(value, tuple):
+            form_data.add_field(key, value[1])
+        else:
+            form_data.add_field(
+                key,
+                value,
+                filename=os.path.basename(getattr(value, 'name', key))
+            )
+    return form_data
+
+
+async def send_request(session, method, request_kwargs):
+    """
+    Sends request with aiohttp `session` and returns python requests'
+    response with the read content. aiohttp errors are converted to
+    python requests' ones.
+    """
+    try:
+        async with session.request(
+            method.upper(),
+            request_kwargs['url'],
+            **get_aiohttp_request_kwargs(request_kwargs)
+        ) as aiohttp_response:
+            response = requests.models.Response()
+            response.status_code = aiohttp_response.status
+            response.reason = aiohttp_response.reason
+            response.url = str(aiohttp_response.url)
+            response.headers = CaseInsensitiveDict(aiohttp_response.headers)
+            response.encoding = aiohttp_response.charset
+            response._content = await aiohttp_response.read()
+            return response
+    except _CONNECT_TIMEOUT_ERRORS as e:
+        raise ConnectTimeout(e)
+    except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
+        raise ReadTimeout(e)
+    except aiohttp.ClientConnectionError as e:
+        raise ConnectionError(e)
+    except aiohttp.ClientError as e:
+        raise RequestException(e)
+
+
+async def send_hedged_request(hedger, send):
+    """Async version of `pydeform.hedging.Hedger.send`."""
+    async def timed_send():
+        started_at = time.time()
+        response = await send()
+        hedger.record(time.time() - started_at)
+        return response
+
+    delay = hedger.get_delay()
+    if delay is None:
+        return await timed_send()
+    first = asyncio.ensure_future(timed_send())
+    done, pending = await asyncio.wait([first], timeout=delay)
+    if done:
+        return first.result()
+
+    pending = set([first, asyncio.ensure_future(timed_send())])
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def do_http_request(requests_session,
+                          method='get',
+                          request_kwargs=None,
+                          request_defaults=None,
+                          ignore_error_codes=[],
+                          retry_policy=None,
+                          circuit_breaker=None,
+                          rate_limiter=None,
+                          hedger=None,
+                          compression_policy=None,
+                          json_codec=None):
+    """
+    Async version of `pydeform.utils.do_http_request`. `requests_session`
+    is aiohttp's client session.
+    """
+    if request_kwargs is None:
+        request_kwargs = {}
+
+    final_request_kwargs = merge_request_defaults(
+        request_kwargs,
+        request_defaults
+    )
+    if compression_policy is not None:
+        final_request_kwargs = compression_policy.prepare_request_kwargs(
+            final_request_kwargs,
+            json_codec=json_codec
+        )
+    else:
+        final_request_kwargs = (
+            json_codec or DEFAULT_JSON_CODEC
+        ).prepare_request_kwargs(final_request_kwargs)
+
+    if retry_policy is not None:
+        retry_policy.budget.deposit()
+    host = urlparse(final_request_kwargs['url']).netloc
+
+    async def send():
+        if rate_limiter is not None:
+            delay = rate_limiter.reserve(host)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return await send_request(
+            requests_session,
+            method,
+            final_request_kwargs
+        )
+
+    attempt = 0
+    while True:
+        if circuit_breaker is not None:
+            circuit_breaker.before_request(host)
+        try:
+            if hedger is not None:
+                response = await send_hedged_request(hedger, send)
+            else:
+                response = await send()
+            if (not response.ok and
+                    response.status_code not in ignore_error_codes):
+                response.raise_for_status()
+        except RequestException as e:
+            if circuit_breaker is not None:
+                circuit_breaker.record(host, success=not is_failure(e))
+            attempt += 1
+            delay = None
+            if retry_policy is not None and 'files' not in request_kwargs:
+                delay = retry_policy.get_retry_delay(method, e, attempt)
+            if delay is not None:
+                await asyncio.sleep(delay)
+                continue
+            raise get_http_error(e)
+        if circuit_breaker is not None:
+            circuit_breaker.record(host, success=True)
+        return response
+
+
+async def iterate_pages(method,
+                        request_kwargs,
+                        requests_session,
+                        request_defaults,
+                        **http_kwargs):
+    """Async version of `pydeform.resources.utils.iterate_pages`."""
+    page = 0
+    if 'params' not in request_kwargs:
+        request_kwargs['params'] = {}
+    while True:
+        page += 1
+        request_kwargs['params']['page'] = page
+        response = await do_http_request(
+            method=method,
+            request_kwargs=request_kwargs,
+            requests_session=requests_session,
+            request_defaults=request_defaults,
+            **http_kwargs
+        )
+        response_result = get_response_json(
+            response,
+            http_kwargs.get('json_codec')
+        )
+        if not response_result['items']:
+            break
+        yield response_result
+        if not response_result.get('links', {}).get('next'):
+            break
+
+
+async def iterate_by_pagination(**kwargs):
+    """Async iterator over the items of all the pages."""
+    async for page in iterate_pages(**kwargs):
+        for item in page['items']:
+            yield item
+
+
+async def iterate_batches_by_pagination(batch_size=None, **kwargs):
+    """Async iterator over the lists of `batch_size` items."""
+    batch = []
+    async for page in iterate_pages(**kwargs):
+        if not batch_size:
+            yield page['items']
+            continue
+        batch.extend(page['items'])
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+    if batch:
+        yield batch
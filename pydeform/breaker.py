@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import deque
+
+from requests.exceptions import ConnectionError, Timeout
+
+from pydeform.exceptions import CircuitOpenError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def is_failure(requests_error):
+    """Returns `True` if request error tells that the host is unhealthy."""
+    if isinstance(requests_error, (ConnectionError, Timeout)):
+        return True
+    response = requests_error.response
+    return response is not None and response.status_code >= 500
+
+
+class _HostState(object):
+    def __init__(self, window_size):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.outcomes = deque(maxlen=window_size)
+        self.opened_at = None
+        self.probe_started_at = None
+
+
+class CircuitBreaker(object):
+    """Per host circuit breaker of the HTTP requests.
+
+    Parameters:
+
+    * `failure_threshold` - number of consecutive failures opening
+      the circuit. Default is `5`.
+    * `error_rate` - share of failed requests in the window opening
+      the circuit. Default is `0.5`.
+    * `window_size` - number of the last requests used for the error
+      rate. Error rate is not checked until window is full.
+      Default is `20`.
+    * `reset_timeout` - seconds before the open circuit allows a probe
+      request. Default is `30`.
+
+    Connection errors, timeouts and `5xx` responses are failures. While
+    the circuit of the host is open requests fail fast with
+    [CircuitOpenError](exceptions.md#circuitopenerror). After
+    `reset_timeout` seconds the circuit is half-open: one probe request
+    is sent and the circuit closes if it succeeds or opens again
+    otherwise.
+
+    Breaker is thread safe and could be shared between clients.
+
+    Example:
+
+    ```python
+    client = Client(host='deform.io', circuit_breaker=CircuitBreaker())
+    ```
+    """
+
+    def __init__(self,
+                 failure_threshold=5,
+                 error_rate=0.5,
+                 window_size=20,
+                 reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.window_size = window_size
+        self.reset_timeout = reset_timeout
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def get_state(self, host):
+        with self._lock:
+            host_state = self._hosts.get(host)
+            if host_state is None:
+                return CLOSED
+            return host_state.state
+
+    def before_request(self, host):
+        """Raises `CircuitOpenError` if request to `host` is not allowed."""
+        with self._lock:
+            host_state = self._get_host_state(host)
+            if host_state.state == CLOSED:
+                return
+            now = time.time()
+            if host_state.state == OPEN:
+                if now - host_state.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(host=host)
+                host_state.state = HALF_OPEN
+            elif (host_state.probe_started_at is not None and
+                    now - host_state.probe_started_at < self.reset_timeout):
+                # probe is in progress
+                raise CircuitOpenError(host=host)
+            host_state.probe_started_at = now
+
+    def record(self, host, success):
+        with self._lock:
+            host_state = self._get_host_state(host)
+            if success:
+                host_state.consecutive_failures = 0
+                if host_state.state != CLOSED:
+                    host_state.state = CLOSED
+                    host_state.outcomes.clear()
+                    host_state.probe_started_at = None
+                host_state.outcomes.append(True)
+                return
+
+            host_state.consecutive_failures += 1
+            host_state.outcomes.append(False)
+            if host_state.state == HALF_OPEN or self._should_open(host_state):
+                host_state.state = OPEN
+                host_state.opened_at = time.time()
+                host_state.probe_started_at = None
+
+    def _should_open(self, host_state):
+        if host_state.consecutive_failures >= self.failure_threshold:
+            return True
+        if (self.error_rate is None or
+                len(host_state.outcomes) < self.window_size):
+            return False
+        failures = host_state.outcomes.count(False)
+        return failures >= self.error_rate * len(host_state.outcomes)
+
+    def _get_host_state(self, host):
+        if host not in self._hosts:
+            self._hosts[host] = _HostState(window_size=self.window_size)
+        return self._hosts[host]
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from pydeform.six import integer_types
+from pydeform.utils import iterate_concurrently
+
+_MERGEABLE_OPERATORS = ['$set', '$inc']
+
+
+def get_document_key(operation):
+    params = operation['params']
+    identity = params.get('identity')
+    if identity is None and isinstance(params.get('data'), dict):
+        identity = params['data'].get('_id')
+    if identity is None:
+        return None
+    return params['collection'], identity
+
+
+def _get_update_fields(data):
+    set_fields = set(i for i in data if not i.startswith('$'))
+    set_fields.update(data.get('$set', {}))
+    return set_fields, set(data.get('$inc', {}))
+
+
+def _fields_overlap(fields_1, fields_2):
+    for field_1 in fields_1:
+        for field_2 in fields_2:
+            if (field_1 == field_2 or
+                    field_1.startswith(field_2 + '.') or
+                    field_2.startswith(field_1 + '.')):
+                return True
+    return False
+
+
+def _is_number(value):
+    return (
+        isinstance(value, integer_types + (float,)) and
+        not isinstance(value, bool)
+    )
+
+
+def merge_update_data(previous, current):
+    """
+    Merge two update payloads of the same document into one.
+
+    Later values of the plain and `$set` properties win and `$inc`
+    values are summed. Returns `None` if payloads could not be merged
+    (other operators, mixed set and increment of the same property or
+    the same property set both plainly and with `$set`).
+    """
+    payloads = [previous, current]
+    for payload in payloads:
+        if not isinstance(payload, dict):
+            return None
+        for key in payload:
+            if key.startswith('$') and key not in _MERGEABLE_OPERATORS:
+                return None
+        for value in payload.get('$inc', {}).values():
+            if not _is_number(value):
+                return None
+
+    previous_set, previous_inc = _get_update_fields(previous)
+    current_set, current_inc = _get_update_fields(current)
+    if (_fields_overlap(previous_set, current_inc) or
+            _fields_overlap(previous_inc, current_set)):
+        return None
+    plain = [
+        set(i for i in payload if not i.startswith('$'))
+        for payload in payloads
+    ]
+    operator_set = [set(payload.get('$set', {})) for payload in payloads]
+    if (_fields_overlap(plain[0], operator_set[1]) or
+            _fields_overlap(operator_set[0], plain[1])):
+        return None
+    all_set = previous_set | current_set
+    for field in all_set:
+        for other_field in all_set:
+            if other_field.startswith(field + '.'):
+                return None
+
+    response = {}
+    for payload in payloads:
+        for key, value in payload.items():
+            if key == '$set':
+                response.setdefault('$set', {}).update(value)
+            elif key == '$inc':
+                increments = response.setdefault('$inc', {})
+                for field, increment in value.items():
+                    increments[field] = increments.get(field, 0) + increment
+            else:
+                response[key] = value
+    return response
+
+
+class WriteBuffer(object):
+    """Write-behind buffer of the document saves and updates.
+
+    You should not initalize this buffer manually.
+    Use [ProjectClient.write_buffer](#projectclientwrite_buffer) method.
+
+    `save` and `update` calls are queued and return immediately. Queued
+    writes are sent by the background thread when `max_size` writes are
+    queued, every `flush_interval` seconds and on `close`. Writes to the
+    same document are sent in the order they were queued.
+
+    Errors (not only `DeformException`) are passed to the
+    `on_error(operation, error)` callback (it is called from the worker
+    threads) or collected to the `errors` list if no callback provided.
+    Errors raised by the callback are collected to the `errors` list.
+
+    If `coalesce` is `True` updates of the same document queued one
+    after another are merged into one request: later property values
+    win and `$inc` increments are summed.
+
+    Example:
+
+    ```python
+    with project_client.write_buffer(max_size=500) as buffer:
+        for event in events:
+            buffer.save(collection='events', data=event)
+    ```
+    """
+
+    def __init__(self,
+                 document_resource,
+                 max_size=100,
+                 flush_interval=1,
+                 workers=4,
+                 max_pending=None,
+                 on_error=None,
+                 coalesce=False):
+        self.document_resource = document_resource
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.workers = workers
+        self.max_pending = max_pending or max_size * 10
+        self.on_error = on_error
+        self.coalesce = coalesce
+        self.errors = []
+        self._pending = []
+        self._coalescing = {}
+        self._closed = False
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def save(self, collection, data, identity=None, **params):
+        """Queues [document.save](#projectclientdocumentsave)."""
+        params.update(collection=collection, data=data)
+        if identity is not None:
+            params['identity'] = identity
+        self._add({'method': 'save', 'params': params})
+
+    def update(self, collection, identity, data, **params):
+        """Queues [document.update](#projectclientdocumentupdate)."""
+        params.update(collection=collection, identity=identity, data=data)
+        self._add({'method': 'update', 'params': params})
+
+    def flush(self):
+        """Sends all the queued writes and waits for the responses."""
+        with self._flush_lock:
+            with self._condition:
+                operations = self._pending
+                self._pending = []
+                self._coalescing = {}
+                self._condition.notify_all()
+            if operations:
+                self._send(operations)
+
+    def close(self):
+        """Flushes the queued writes and stops the background thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _add(self, operation):
+        with self._condition:
+            if self._closed:
+                raise ValueError('Write buffer is closed')
+            while len(self._pending) >= self.max_pending:
+                self._condition.wait()
+            if self.coalesce and self._coalesce(operation):
+                return
+            self._pending.append(operation)
+            if len(self._pending) >= self.max_size:
+                self._condition.notify_all()
+
+    def _coalesce(self, operation):
+        key = get_document_key(operation)
+        if key is None:
+            return False
+        if operation['method'] != 'update':
+            self._coalescing.pop(key, None)
+            return False
+        previous = self._coalescing.get(key)
+        if previous is not None:
+            previous_params = dict(previous['params'], data=None)
+            if previous_params == dict(operation['params'], data=None):
+                data = merge_update_data(
+                    previous['params']['data'],
+                    operation['params']['data']
+                )
+                if data is not None:
+                    previous['params'] = dict(previous['params'], data=data)
+                    return True
+        self._coalescing[key] = operation
+        return False
+
+    def _run(self):
+        while True:
+            with self._condition:
+                deadline = time.time() + self.flush_interval
+                while not self._closed and len(self._pending) < self.max_size:
+                    timeout = deadline - time.time()
+                    if timeout <= 0:
+                        break
+                    self._condition.wait(timeout)
+                closed = self._closed
+            self.flush()
+            if closed:
+                break
+
+    def _send(self, operations):
+        groups = []
+        groups_by_document = {}
+        for operation in operations:
+            key = get_document_key(operation)
+            if key is None:
+                groups.append([operation])
+                continue
+            if key not in groups_by_document:
+                groups_by_document[key] = []
+                groups.append(groups_by_document[key])
+            groups_by_document[key].append(operation)
+
+        for i in iterate_concurrently(
+            self._send_group,
+            groups,
+            workers=self.workers,
+            ordered=False
+        ):
+            pass
+
+    def _send_group(self, operations):
+        for operation in operations:
+            method = getattr(self.document_resource, operation['method'])
+            try:
+                method(**operation['params'])
+            except Exception as e:
+                # any error should not stop the background thread
+                self._report_error(operation, e)
+
+    def _report_error(self, operation, error):
+        if self.on_error:
+            try:
+                self.on_error(operation, error)
+                return
+            except Exception as e:
+                error = e
+        self.errors.append((operation, error))
@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
-import requests
-
 from pydeform.auth import (
     get_session_http_auth_header,
     get_token_http_auth_header
 )
+from pydeform.buffer import WriteBuffer
+from pydeform.pool import create_requests_session
 from pydeform.resources import (
     CollectionListResource,
     CollectionOneResource,
@@ -38,10 +38,36 @@ class Client(object):
     * `secure` - if `True` client will make secure request via `https`.
        Default is `True`.
     * `requests_session` - python requests' [Session][requests-session]
-       instance. Default is `None`.
+       instance or other transport, e.g.
+       `pydeform.transport.Urllib3Transport`. Default is `None`.
     * `request_defaults` - python requests' [request][requests-request]
        defaults. Default is `None`.
     * `api_base_path` - HTTP server's api uri base path. Default is `/api/`.
+    * `retry_policy` - `pydeform.retry.RetryPolicy` instance for retrying
+       the failed requests. Default is `None` (requests are not retried).
+    * `circuit_breaker` - `pydeform.breaker.CircuitBreaker` instance failing
+       fast the requests to the unhealthy hosts. Default is `None`.
+    * `rate_limiter` - `pydeform.limiter.RateLimiter` instance pacing
+       the requests. Default is `None`.
+    * `hedging_policy` - `pydeform.hedging.HedgingPolicy` instance for
+       duplicating the slow read requests. Default is `None`.
+    * `compression_policy` - `pydeform.compression.CompressionPolicy`
+       instance compressing the large request bodies. Default is `None`.
+    * `json_codec` - `pydeform.codec.JSONCodec` instance encoding
+       the request bodies and decoding the responses, e.g.
+       `pydeform.codec.get_fast_json_codec()`. Default is `None`
+       (`pydeform.codec.JSONCodec` encoding and python requests'
+       decoding).
+    * `pool_connections` - number of the hosts to keep the connection
+       pools for. Default is `10`.
+    * `pool_maxsize` - max connections to keep in the pool of one host.
+       Default is `10`.
+    * `pool_block` - if `True` requests wait for a free connection when
+       the pool of the host is full. Default is `False`.
+    * `max_connections` - max connections in use to all the hosts
+       (every project has its own subdomain). Default is `None`.
+    * `keep_alive` - if `False` connections are closed after every
+       request. Default is `True`.
 
     Example:
 
@@ -49,6 +75,9 @@ class Client(object):
     client = Client(host='deform.io')
     ```
 
+    Connection pool options are used only if `requests_session`
+    is not provided.
+
     [requests-session]: %(requests_session_url)s
     [requests-request]: %(requests_request_url)s
 
@@ -63,13 +92,44 @@ class Client(object):
                  secure=True,
                  requests_session=None,
                  request_defaults=None,
-                 api_base_path='/api/'):
+                 api_base_path='/api/',
+                 retry_policy=None,
+                 circuit_breaker=None,
+                 rate_limiter=None,
+                 hedging_policy=None,
+                 compression_policy=None,
+                 json_codec=None,
+                 pool_connections=10,
+                 pool_maxsize=10,
+                 pool_block=False,
+                 max_connections=None,
+                 keep_alive=True):
         self.host = host
         self.port = port
         self.secure = secure
-        self.requests_session = requests_session or requests.Session()
+        self.requests_session = requests_session or create_requests_session(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_connections=max_connections,
+            keep_alive=keep_alive
+        )
         self.request_defaults = request_defaults
         self.api_base_path = api_base_path
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self.hedging_policy = hedging_policy
+        self.compression_policy = compression_policy
+        self.json_codec = json_codec
+        self.http_kwargs = {
+            'retry_policy': self.retry_policy,
+            'circuit_breaker': self.circuit_breaker,
+            'rate_limiter': self.rate_limiter,
+            'hedging_policy': self.hedging_policy,
+            'compression_policy': self.compression_policy,
+            'json_codec': self.json_codec,
+        }
         self.user = NonAuthUserResource(
             base_uri=get_base_uri(
                 host=self.host,
@@ -79,7 +139,8 @@ class Client(object):
             ),
             auth_header=None,
             requests_session=self.requests_session,
-            request_defaults=self.request_defaults
+            request_defaults=self.request_defaults,
+            **self.http_kwargs
         )
 
     def auth(self, auth_type, auth_key, project_id=None):
@@ -146,6 +207,7 @@ class Client(object):
                 requests_session=self.requests_session,
                 request_defaults=self.request_defaults,
                 api_base_path=self.api_base_path,
+                **self.http_kwargs
             )
         elif auth_type == 'token':
             if not project_id:
@@ -162,6 +224,7 @@ class Client(object):
                 auth_header=get_token_http_auth_header(auth_key),
                 requests_session=self.requests_session,
                 request_defaults=self.request_defaults,
+                **self.http_kwargs
             )
 
 
@@ -179,7 +242,8 @@ class SessionAuthClient(object):
                  secure,
                  requests_session,
                  request_defaults,
-                 api_base_path):
+                 api_base_path,
+                 **http_kwargs):
         self.host = host
         self.port = port
         self.secure = secure
@@ -187,18 +251,20 @@ class SessionAuthClient(object):
         self.request_defaults = request_defaults
         self.auth_header = auth_header
         self.api_base_path = api_base_path
+        self.http_kwargs = http_kwargs
         self.base_uri = get_base_uri(
             host=self.host,
             port=self.port,
             secure=self.secure,
             api_base_path=self.api_base_path
         )
-        resource_kwargs = {
-            'base_uri': self.base_uri,
-            'auth_header': auth_header,
-            'requests_session': requests_session,
-            'request_defaults': request_defaults
-        }
+        resource_kwargs = dict(
+            http_kwargs,
+            base_uri=self.base_uri,
+            auth_header=auth_header,
+            requests_session=requests_session,
+            request_defaults=request_defaults
+        )
         self.user = SessionUserResource(**resource_kwargs)
         self.projects = ProjectListResource(**resource_kwargs)
         self.project = ProjectOneResource(**resource_kwargs)
@@ -239,6 +305,7 @@ class SessionAuthClient(object):
             auth_header=self.auth_header,
             requests_session=self.requests_session,
             request_defaults=self.request_defaults,
+            **self.http_kwargs
         )
 
 
@@ -254,19 +321,74 @@ class ProjectClient(object):
                  base_uri,
                  auth_header,
                  requests_session,
-                 request_defaults):
-        resource_kwargs = {
-            'base_uri': base_uri,
-            'auth_header': auth_header,
-            'requests_session': requests_session,
-            'request_defaults': request_defaults
-        }
+                 request_defaults,
+                 **http_kwargs):
+        resource_kwargs = dict(
+            http_kwargs,
+            base_uri=base_uri,
+            auth_header=auth_header,
+            requests_session=requests_session,
+            request_defaults=request_defaults
+        )
         self.base_uri = base_uri
         self.auth_header = auth_header
         self.request_session = requests_session
         self.request_defaults = request_defaults
+        self.http_kwargs = http_kwargs
         self.info = CurrentProjectInfoResource(**resource_kwargs)
         self.collections = CollectionListResource(**resource_kwargs)
         self.collection = CollectionOneResource(**resource_kwargs)
         self.documents = DocumentListResource(**resource_kwargs)
         self.document = DocumentOneResource(**resource_kwargs)
+
+    def write_buffer(self,
+                     max_size=100,
+                     flush_interval=1,
+                     workers=4,
+                     max_pending=None,
+                     on_error=None,
+                     coalesce=False):
+        """Creates write-behind buffer of the document writes.
+
+        Parameters:
+
+        * `max_size` - number of queued writes triggering the flush.
+          Default is `100`.
+        * `flush_interval` - max seconds between the flushes.
+          Default is `1`.
+        * `workers` - number of the concurrent requests of the flush.
+          Default is `4`.
+        * `max_pending` - number of queued writes blocking the next
+          writes until the flush. Default is `10 * max_size`.
+        * `on_error` - callable receiving the failed operation and
+          the error, usually [DeformException](exceptions.md#deformexception).
+          Default is `None`.
+        * `coalesce` - if `True` consecutive updates of the same document
+          are merged into one request. Default is `False`.
+
+        Returns:
+
+        Instance of [WriteBuffer](#writebuffer).
+
+        Example:
+
+        ```python
+        with project_client.write_buffer(on_error=log_error) as buffer:
+            buffer.save(collection='events', data={'type': 'click'})
+            buffer.update(
+                collection='counters',
+                identity='clicks',
+                data={'value': 10}
+            )
+        ```
+
+        """
+        return WriteBuffer(
+            document_resource=self.document,
+            max_size=max_size,
+            flush_interval=flush_interval,
+            workers=workers,
+            max_pending=max_pending,
+            on_error=on_error,
+            coalesce=coalesce,
+        )
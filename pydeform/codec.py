@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import datetime
+import json
+
+from pydeform.six import PY2
+
+
+def format_date(date):
+    # todo: test me
+    return format_datetime(
+        datetime.datetime.combine(date, datetime.datetime.min.time())
+    )
+
+
+def format_datetime(date):
+    """
+    Convert datetime to UTC ISO 8601
+    """
+    # todo: test me
+    if date.utcoffset() is None:
+        return date.isoformat() + 'Z'
+
+    utc_offset_sec = date.utcoffset()
+    utc_date = date - utc_offset_sec
+    utc_date_without_offset = utc_date.replace(tzinfo=None)
+    return utc_date_without_offset.isoformat() + 'Z'
+
+
+def json_default(value):
+    """Encoder hook formatting `datetime` and `date` values to UTC
+    ISO 8601 strings during the serialization.
+    """
+    if isinstance(value, datetime.datetime):
+        return format_datetime(value)
+    elif isinstance(value, datetime.date):
+        return format_date(value)
+    raise TypeError(
+        'Object of type %s is not JSON serializable' % type(value).__name__
+    )
+
+
+class JSONCodec(object):
+    """JSON codec on the standard library `json` module.
+
+    Codec encodes the request bodies to bytes and decodes the response
+    bodies. Subclasses could override `dumps` and `loads` only.
+    """
+
+    name = 'json'
+
+    def dumps(self, value):
+        """Returns `value` encoded to UTF-8 JSON bytes.
+
+        `NaN` and `Infinity` are not valid JSON and raise `ValueError`
+        as in python requests.
+        """
+        return json.dumps(
+            value,
+            default=json_default,
+            allow_nan=False
+        ).encode('utf-8')
+
+    def loads(self, data):
+        """Returns decoded JSON `data` bytes."""
+        if not PY2 and isinstance(data, bytes):
+            # python 3.5 json does not decode bytes
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+    def prepare_request_kwargs(self, request_kwargs):
+        """Returns request kwargs with the `json` body encoded to `data`.
+
+        Multipart requests are not changed.
+        """
+        if request_kwargs.get('json') is None or request_kwargs.get('files'):
+            return request_kwargs
+        headers = dict(request_kwargs.get('headers') or {})
+        headers['Content-Type'] = 'application/json'
+        prepared_request_kwargs = dict(
+            request_kwargs,
+            data=self.dumps(request_kwargs['json']),
+            headers=headers
+        )
+        del prepared_request_kwargs['json']
+        return prepared_request_kwargs
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec on [orjson](https://github.com/ijl/orjson).
+
+    Encodes directly to bytes without the intermediate string and
+    is several times faster than the standard library. Dict keys which
+    are not strings are encoded too.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError:
+            raise ImportError(
+                'orjson is required for OrjsonCodec. '
+                'Install it with "pip install python-deform[fast-json]"'
+            )
+        self.orjson = orjson
+        # datetimes are formatted by the hook the same way as by JSONCodec
+        self.options = (
+            orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+
+    def dumps(self, value):
+        return self.orjson.dumps(
+            value,
+            default=json_default,
+            option=self.options
+        )
+
+    def loads(self, data):
+        return self.orjson.loads(data)
+
+
+DEFAULT_JSON_CODEC = JSONCodec()
+
+
+def get_fast_json_codec():
+    """Returns `OrjsonCodec` if orjson is installed or falls back
+    to `JSONCodec`.
+    """
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        return DEFAULT_JSON_CODEC
+
+
+def get_response_json(response, json_codec=None):
+    """Decodes python requests' `response` content with `json_codec`
+    or with the response's own decoder if it is `None`.
+    """
+    if json_codec is None:
+        return response.json()
+    return json_codec.loads(response.content)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+import re
+
+from pydeform.six import integer_types, string_types
+
+_DEFAULT_CAPACITY = 1024
+_DATETIME_RE = re.compile(
+    r'^\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?Z?$'
+)
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+_KIND_DTYPES = {
+    'bool': 'bool',
+    'int': 'int64',
+    'float': 'float64',
+    # original strings, parsed values are kept apart until the kind
+    # is settled
+    'datetime': 'object',
+    'string': 'object',
+    'object': 'object',
+}
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            'numpy is required for columnar export. '
+            'Install it with "pip install python-deform[numpy]"'
+        )
+    return numpy
+
+
+def _get_kind(value):
+    if isinstance(value, bool):
+        return 'bool'
+    elif isinstance(value, integer_types):
+        if _INT64_MIN <= value <= _INT64_MAX:
+            return 'int'
+        return 'object'
+    elif isinstance(value, float):
+        return 'float'
+    elif isinstance(value, string_types):
+        if _DATETIME_RE.match(value):
+            return 'datetime'
+        return 'string'
+    return 'object'
+
+
+def _get_common_kind(kind_1, kind_2):
+    if kind_1 == kind_2:
+        return kind_1
+    if set([kind_1, kind_2]) == set(['int', 'float']):
+        return 'float'
+    if set([kind_1, kind_2]) == set(['datetime', 'string']):
+        return 'string'
+    return 'object'
+
+
+def _get_value(item, field):
+    value = item
+    for bit in field.split('.'):
+        try:
+            value = value[bit]
+        except (KeyError, TypeError, IndexError):
+            return None
+    return value
+
+
+class _Column(object):
+    """Growable masked column of one kind of values.
+
+    Datetime column keeps the original strings along with the parsed
+    values, so they are not changed if the column becomes a string one.
+    """
+
+    def __init__(self, numpy, capacity):
+        self.numpy = numpy
+        self.kind = None
+        self.data = None
+        self.datetimes = None
+        self.mask = numpy.ones(capacity, dtype=bool)
+        self.size = 0
+
+    def append(self, value):
+        if self.size == len(self.mask):
+            self._grow()
+        if value is not None:
+            kind = _get_kind(value)
+            parsed = None
+            if kind == 'datetime':
+                parsed = self._parse_datetime(value)
+                if parsed is None:
+                    kind = 'string'
+            if kind != self.kind:
+                self._set_kind(kind)
+            if self.kind == 'datetime':
+                self.datetimes[self.size] = parsed
+            self.data[self.size] = value
+            self.mask[self.size] = False
+        self.size += 1
+
+    def _parse_datetime(self, value):
+        try:
+            return self.numpy.datetime64(value.rstrip('Z'), 'ms')
+        except ValueError:
+            # looks like a datetime but is not, e.g. 2016-13-45
+            return None
+
+    def _set_kind(self, kind):
+        if self.kind is None:
+            self.kind = kind
+            self.data = self.numpy.empty(
+                len(self.mask),
+                dtype=_KIND_DTYPES[kind]
+            )
+            if kind == 'datetime':
+                self.datetimes = self.numpy.empty(
+                    len(self.mask),
+                    dtype='datetime64[ms]'
+                )
+            return
+        common_kind = _get_common_kind(self.kind, kind)
+        if common_kind == self.kind:
+            return
+        self.data = self.data.astype(_KIND_DTYPES[common_kind])
+        self.datetimes = None
+        self.kind = common_kind
+
+    def _grow(self):
+        extra = max(len(self.mask), _DEFAULT_CAPACITY)
+        self.mask = self.numpy.concatenate([
+            self.mask,
+            self.numpy.ones(extra, dtype=bool)
+        ])
+        if self.data is not None:
+            self.data = self.numpy.concatenate([
+                self.data,
+                self.numpy.empty(extra, dtype=self.data.dtype)
+            ])
+        if self.datetimes is not None:
+            self.datetimes = self.numpy.concatenate([
+                self.datetimes,
+                self.numpy.empty(extra, dtype=self.datetimes.dtype)
+            ])
+
+    def finalize(self):
+        mask = self.mask[:self.size]
+        if self.kind is None:
+            data = self.numpy.empty(self.size, dtype='object')
+        elif self.kind == 'datetime':
+            data = self.datetimes[:self.size]
+        elif self.kind == 'string':
+            data = self.data[:self.size]
+            data[mask] = ''
+            data = data.astype('U')
+        else:
+            data = self.data[:self.size]
+        return self.numpy.ma.MaskedArray(data, mask=mask)
+
+
+def build_columns(items, fields, size=None):
+    """
+    Collect `fields` values of `items` into numpy masked arrays.
+
+    Returns dict of arrays by field. Numbers, booleans, ISO 8601 datetimes
+    and strings get their own dtypes, mixed and nested values are stored as
+    objects. Missing and `null` values are masked. Dotted field names
+    are looked up in the nested objects.
+
+    `size` is the expected items count used to preallocate the arrays.
+    """
+    numpy = _import_numpy()
+    capacity = size or _DEFAULT_CAPACITY
+    columns = [(field, _Column(numpy, capacity)) for field in fields]
+    for item in items:
+        for field, column in columns:
+            if '.' in field:
+                column.append(_get_value(item, field))
+            else:
+                column.append(item.get(field))
+    return dict(
+        (field, column.finalize()) for field, column in columns
+    )
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import gzip
+import io
+
+from pydeform.codec import DEFAULT_JSON_CODEC
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+DEFAULT_LEVELS = {
+    GZIP: 6,
+    ZSTD: 3,
+}
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            'zstandard is required for zstd compression. '
+            'Install it with "pip install python-deform[zstd]"'
+        )
+    return zstandard
+
+
+def gzip_compress(data, level=DEFAULT_LEVELS[GZIP]):
+    # `gzip.compress` is not available on python 2
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=level,
+                       mtime=0) as gzip_file:
+        gzip_file.write(data)
+    return buffer.getvalue()
+
+
+class CompressionPolicy(object):
+    """Compresses the large JSON request bodies.
+
+    Body is encoded once and compressed only if it is at least `min_size`
+    bytes long, smaller bodies are not worth the CPU time. Compressed body
+    is sent with the `Content-Encoding` header.
+
+    Compressed responses are decoded by the transport regardless
+    of the policy: python requests advertises and decodes `gzip` and
+    `deflate` (and `br` and `zstd` if the decoders are installed).
+
+    Parameters:
+
+    * `algorithm` - `gzip` or `zstd`. Default is `gzip`.
+    * `min_size` - min encoded body size in bytes to compress.
+      Default is `1024`.
+    * `level` - compression level. Default is `None` (`6` for `gzip`
+      and `3` for `zstd`).
+
+    `zstd` requires [zstandard](https://python-zstandard.readthedocs.io/).
+
+    Example:
+
+    ```python
+    client = Client(
+        host='deform.io',
+        compression_policy=CompressionPolicy(algorithm='gzip', min_size=4096)
+    )
+    ```
+    """
+
+    def __init__(self, algorithm=GZIP, min_size=1024, level=None):
+        if algorithm not in DEFAULT_LEVELS:
+            raise ValueError('Unknown compression "%s"' % algorithm)
+        self.algorithm = algorithm
+        self.min_size = min_size
+        self.level = DEFAULT_LEVELS[algorithm] if level is None else level
+        self.zstandard = None
+        if algorithm == ZSTD:
+            self.zstandard = _import_zstandard()
+
+    def compress(self, data):
+        if self.algorithm == GZIP:
+            return gzip_compress(data, level=self.level)
+        # compressor instances could not be shared between the threads
+        return self.zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def prepare_request_kwargs(self, request_kwargs, json_codec=None):
+        """Returns request kwargs with the `json` body encoded by
+        `json_codec` and compressed if it is large enough.
+
+        Multipart requests are not changed.
+        """
+        if request_kwargs.get('json') is None or request_kwargs.get('files'):
+            return request_kwargs
+        json_codec = json_codec or DEFAULT_JSON_CODEC
+        prepared_request_kwargs = json_codec.prepare_request_kwargs(
+            request_kwargs
+        )
+        if len(prepared_request_kwargs['data']) >= self.min_size:
+            prepared_request_kwargs['data'] = self.compress(
+                prepared_request_kwargs['data']
+            )
+            prepared_request_kwargs['headers']['Content-Encoding'] = (
+                self.algorithm
+            )
+        return prepared_request_kwargs
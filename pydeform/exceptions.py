@@ -106,6 +106,21 @@ class ReadTimeout(Timeout):
     message = 'Read timeout'
 
 
+class CircuitOpenError(DeformException):
+    """Request was not sent because the circuit breaker of the host is open.
+
+    Contains `host` parameter with the failing host.
+    """
+    message = 'Circuit breaker is open'
+
+    def __init__(self, host):
+        super(CircuitOpenError, self).__init__(host)
+        self.host = host
+
+    def __str__(self):
+        return '%s for %s' % (self.message, self.host)
+
+
 STATUS_CODE_ERROR_MAP = {
     401: AuthError,  # todo: test me
     403: ForbiddenError,  # todo: test me
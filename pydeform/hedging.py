@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+import sys
+import threading
+import time
+from collections import deque
+
+from pydeform.six import reraise
+from pydeform.six.moves import queue
+
+_DELAY_UPDATE_INTERVAL = 50
+
+
+class HedgingPolicy(object):
+    """Policy of the hedged read requests.
+
+    Parameters:
+
+    * `percentile` - latency percentile after which the duplicate
+      request is sent. Default is `95`.
+    * `min_samples` - number of the observed latencies before hedging
+      starts. Default is `20`.
+    * `window_size` - number of the last latencies used for the
+      percentile. Default is `1000`.
+    * `min_delay` - min seconds before the duplicate request.
+      Default is `0.005`.
+    * `max_delay` - max seconds before the duplicate request.
+      Default is `None`.
+
+    Latencies are learned separately for every read method of every
+    resource. Hedged are `get` of the single objects, `find` and `count`.
+    The response arriving first is used and the other one is closed as
+    soon as it arrives.
+
+    Example:
+
+    ```python
+    client = Client(
+        host='deform.io',
+        hedging_policy=HedgingPolicy(percentile=99)
+    )
+    ```
+    """
+
+    def __init__(self,
+                 percentile=95,
+                 min_samples=20,
+                 window_size=1000,
+                 min_delay=0.005,
+                 max_delay=None):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window_size = window_size
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._hedgers = {}
+        self._lock = threading.Lock()
+
+    def get_hedger(self, key):
+        """Returns `Hedger` learning the latencies of `key` requests."""
+        with self._lock:
+            if key not in self._hedgers:
+                self._hedgers[key] = Hedger(self)
+            return self._hedgers[key]
+
+
+class Hedger(object):
+    def __init__(self, policy):
+        self.policy = policy
+        self._latencies = deque(maxlen=policy.window_size)
+        self._delay = None
+        self._records_since_update = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+            self._records_since_update += 1
+            if (self._delay is None or
+                    self._records_since_update >= _DELAY_UPDATE_INTERVAL):
+                self._update_delay()
+
+    def get_delay(self):
+        """Returns seconds before the duplicate request or `None`."""
+        with self._lock:
+            return self._delay
+
+    def _update_delay(self):
+        self._records_since_update = 0
+        if len(self._latencies) < self.policy.min_samples:
+            return
+        latencies = sorted(self._latencies)
+        index = int(len(latencies) * self.policy.percentile / 100.0)
+        delay = max(
+            self.policy.min_delay,
+            latencies[min(index, len(latencies) - 1)]
+        )
+        if self.policy.max_delay is not None:
+            delay = min(delay, self.policy.max_delay)
+        self._delay = delay
+
+    def send(self, func):
+        """
+        Calls `func` and calls it once more if it has not answered
+        within the learned delay. Returns the first response.
+        """
+        delay = self.get_delay()
+        if delay is None:
+            started_at = time.time()
+            response = func()
+            self.record(time.time() - started_at)
+            return response
+
+        results = queue.Queue()
+        self._start(func, results)
+        try:
+            result = results.get(timeout=delay)
+            pending = 0
+        except queue.Empty:
+            self._start(func, results)
+            result = results.get()
+            pending = 1
+            if result[0] is None:
+                # the first finished request failed, wait for the other one
+                result = results.get()
+                pending = 0
+
+        if pending:
+            thread = threading.Thread(target=_close_response, args=[results])
+            thread.daemon = True
+            thread.start()
+        response, exc_info = result
+        if response is None:
+            reraise(*exc_info)
+        return response
+
+    def _start(self, func, results):
+        def run():
+            started_at = time.time()
+            try:
+                response = func()
+            except Exception:
+                results.put((None, sys.exc_info()))
+            else:
+                self.record(time.time() - started_at)
+                results.put((response, None))
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+
+
+def _close_response(results):
+    response, exc_info = results.get()
+    if response is not None:
+        response.close()
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import requests
+from requests.exceptions import (
+    ConnectionError,
+    ConnectTimeout,
+    ReadTimeout,
+    RequestException
+)
+from requests.structures import CaseInsensitiveDict
+
+from pydeform.transport import Transport
+
+
+def _import_httpx():
+    try:
+        import httpx
+    except ImportError:
+        raise ImportError(
+            'httpx with HTTP/2 support is required for HTTP2Session. '
+            'Install it with "pip install python-deform[http2]"'
+        )
+    return httpx
+
+
+class _StreamReader(object):
+    """File-like reader of the streamed httpx response content."""
+
+    def __init__(self, httpx_response):
+        self.httpx_response = httpx_response
+        self.chunks = httpx_response.iter_bytes()
+        self.buffer = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            try:
+                self.buffer += next(self.chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self.buffer)
+        response, self.buffer = self.buffer[:size], self.buffer[size:]
+        return response
+
+    def close(self):
+        self.httpx_response.close()
+
+
+class HTTP2Session(Transport):
+    """HTTP/2 transport with python requests' session interface.
+
+    Could be passed as `requests_session` to the [Client](#client).
+    Concurrent requests to the same host are multiplexed over one
+    connection.
+
+    Parameters:
+
+    * `max_connections` - max connections to all the hosts.
+      Default is `None` (no limit).
+    * `keep_alive` - if `False` connections are closed after every
+      request. Default is `True`.
+    * `prior_knowledge` - if `True` HTTP/2 is used for `http` URLs
+      without the upgrade (h2c), HTTP/1.1 is not used at all.
+      Default is `False`.
+
+    Requires [httpx](https://www.python-httpx.org/) with HTTP/2 support.
+
+    Example:
+
+    ```python
+    client = Client(host='deform.io', requests_session=HTTP2Session())
+    ```
+    """
+
+    def __init__(self,
+                 max_connections=None,
+                 keep_alive=True,
+                 prior_knowledge=False):
+        self.httpx = _import_httpx()
+        self.max_connections = max_connections
+        self.keep_alive = keep_alive
+        self.prior_knowledge = prior_knowledge
+        self.headers = CaseInsensitiveDict()
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get_client(self, verify=True, proxy=None):
+        """Returns httpx client for the `verify` and `proxy` options."""
+        key = (verify, proxy)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._create_client(verify, proxy)
+            return self._clients[key]
+
+    def _create_client(self, verify, proxy):
+        transport = self.httpx.HTTPTransport(
+            http1=not self.prior_knowledge,
+            http2=True,
+            verify=verify,
+            limits=self.httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=(
+                    None if self.keep_alive else 0
+                ),
+            ),
+            proxy=self.httpx.Proxy(proxy) if proxy else None,
+        )
+        return self.httpx.Client(transport=transport)
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients = {}
+
+    def request(self,
+                method,
+                url,
+                params=None,
+                headers=None,
+                json=None,
+                data=None,
+                files=None,
+                timeout=None,
+                verify=True,
+                stream=False,
+                allow_redirects=True,
+                proxies=None):
+        client = self.get_client(verify, self._get_proxy(url, proxies))
+        content = None
+        if files:
+            data = dict(data or {})
+            files = dict(files)
+            for key, value in list(files.items()):
+                if isinstance(value, tuple) and value[0] is None:
+                    data[key] = files.pop(key)[1]
+        elif data is not None:
+            content, data = data, None
+        request = client.build_request(
+            method.upper(),
+            url,
+            params=self._get_params(params),
+            headers=dict(self.headers, **(headers or {})),
+            json=json,
+            content=content,
+            data=data,
+            files=files,
+            timeout=self._get_timeout(timeout),
+        )
+        try:
+            httpx_response = client.send(
+                request,
+                stream=stream,
+                follow_redirects=allow_redirects
+            )
+        except self.httpx.ConnectTimeout as e:
+            raise ConnectTimeout(e)
+        except self.httpx.TimeoutException as e:
+            raise ReadTimeout(e)
+        except self.httpx.NetworkError as e:
+            raise ConnectionError(e)
+        except self.httpx.HTTPError as e:
+            raise RequestException(e)
+        return self._get_response(httpx_response, stream)
+
+    def _get_params(self, params):
+        if not params:
+            return None
+        return dict(
+            (key, str(value) if isinstance(value, bool) else value)
+            for key, value in params.items()
+            if value is not None
+        )
+
+    def _get_timeout(self, timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+        else:
+            connect = read = timeout
+        return self.httpx.Timeout(
+            connect=connect,
+            read=read,
+            write=read,
+            pool=None
+        )
+
+    def _get_response(self, httpx_response, stream):
+        response = requests.models.Response()
+        response.status_code = httpx_response.status_code
+        response.reason = httpx_response.reason_phrase
+        response.url = str(httpx_response.url)
+        response.headers = CaseInsensitiveDict(httpx_response.headers)
+        response.encoding = httpx_response.charset_encoding
+        if stream:
+            response.raw = _StreamReader(httpx_response)
+        else:
+            response._content = httpx_response.content
+        return response
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+
+class _TokenBucket(object):
+    def __init__(self, rate, burst, now):
+        self.rate = float(rate)
+        self.burst = burst or max(1, rate)
+        self.tokens = float(self.burst)
+        self.updated_at = now
+
+    def reserve(self, now):
+        """Takes a token and returns seconds to wait until it is available."""
+        self.tokens = min(
+            self.burst,
+            self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0
+        return -self.tokens / self.rate
+
+
+class RateLimiter(object):
+    """Client side token bucket rate limiter of the HTTP requests.
+
+    Parameters:
+
+    * `rate` - max requests per second of all the requests.
+      Default is `None` (no global limit).
+    * `burst` - max requests sent at once over the `rate`.
+      Default is `rate`.
+    * `project_rate` - max requests per second to the one project.
+      Default is `None` (no project limit).
+    * `project_burst` - max requests sent at once over
+      the `project_rate`. Default is `project_rate`.
+
+    Project limits are applied per request host, so every project has its
+    own bucket. Requests exceeding the limits wait in the calling thread
+    in the order they came.
+
+    Limiter is thread safe and shared by all the `ProjectClient`
+    instances created by the `Client`.
+
+    Example:
+
+    ```python
+    client = Client(
+        host='deform.io',
+        rate_limiter=RateLimiter(rate=100, project_rate=20)
+    )
+    ```
+    """
+
+    def __init__(self,
+                 rate=None,
+                 burst=None,
+                 project_rate=None,
+                 project_burst=None):
+        self.rate = rate
+        self.burst = burst
+        self.project_rate = project_rate
+        self.project_burst = project_burst
+        self._lock = threading.Lock()
+        self._bucket = None
+        self._project_buckets = {}
+
+    def acquire(self, host=None):
+        """Blocks until the request to `host` is allowed."""
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+    def reserve(self, host=None):
+        with self._lock:
+            now = time.time()
+            delay = 0
+            if self.rate:
+                if self._bucket is None:
+                    self._bucket = _TokenBucket(self.rate, self.burst, now)
+                delay = self._bucket.reserve(now)
+            if self.project_rate and host is not None:
+                if host not in self._project_buckets:
+                    self._project_buckets[host] = _TokenBucket(
+                        self.project_rate,
+                        self.project_burst,
+                        now
+                    )
+                delay = max(delay, self._project_buckets[host].reserve(now))
+            return delay
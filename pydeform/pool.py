@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class _BoundedAdapter(object):
+    """Transport adapter taking the session's connection slot for every
+    sent request, so every redirect hop takes its own slot.
+    """
+
+    def __init__(self, adapter, session):
+        self.adapter = adapter
+        self.session = session
+
+    def __getattr__(self, name):
+        return getattr(self.adapter, name)
+
+    def send(self, request, **kwargs):
+        connections = self.session.connections
+        connections.acquire()
+        try:
+            response = self.adapter.send(request, **kwargs)
+        except Exception:
+            connections.release()
+            raise
+        self.session._release_on_close(response)
+        return response
+
+
+class BoundedSession(requests.Session):
+    """Python requests' session limiting the number of connections in use.
+
+    Connection pools are kept per host, so adapter's `pool_maxsize` limits
+    connections to one host only. Every project has its own subdomain,
+    so `max_connections` additionally limits connections to all the hosts.
+    Connection is taken per request to the adapter and is released when
+    the response is read or closed: redirect responses are released
+    before the redirect is followed, streamed responses hold
+    the connection until they are consumed or closed.
+    """
+
+    def __init__(self, max_connections=None):
+        super(BoundedSession, self).__init__()
+        self.max_connections = max_connections
+        self.connections = None
+        if max_connections:
+            self.connections = threading.BoundedSemaphore(max_connections)
+
+    def get_adapter(self, url):
+        adapter = super(BoundedSession, self).get_adapter(url)
+        if self.connections is None:
+            return adapter
+        return _BoundedAdapter(adapter, self)
+
+    def send(self, request, **kwargs):
+        response = super(BoundedSession, self).send(request, **kwargs)
+        if self.connections is not None and not kwargs.get('stream'):
+            # content is already read and connection is back in the pool
+            release_conn = getattr(response.raw, 'release_conn', None)
+            if release_conn is not None:
+                release_conn()
+        return response
+
+    def _release_on_close(self, response):
+        lock = threading.Lock()
+        state = {'released': False}
+        release_conn = getattr(response.raw, 'release_conn', None)
+
+        def release():
+            with lock:
+                if state['released']:
+                    return
+                state['released'] = True
+            self.connections.release()
+
+        def release_conn_and_connection():
+            try:
+                if release_conn is not None:
+                    release_conn()
+            finally:
+                release()
+
+        try:
+            response.raw.release_conn = release_conn_and_connection
+        except AttributeError:
+            # no way to know when the response is closed
+            release()
+
+
+def create_requests_session(pool_connections=10,
+                            pool_maxsize=10,
+                            pool_block=False,
+                            max_connections=None,
+                            keep_alive=True):
+    """
+    Creates python requests' session with the connection pooling options.
+
+    * `pool_connections` - number of the hosts to keep the pools for.
+    * `pool_maxsize` - max connections to keep in the pool of one host.
+    * `pool_block` - if `True` requests wait for a free connection
+      instead of opening a new one when the host pool is full.
+    * `max_connections` - max connections in use to all the hosts.
+    * `keep_alive` - if `False` connections are closed after every
+      request.
+    """
+    session = BoundedSession(max_connections=max_connections)
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
@@ -3,6 +3,8 @@ from pydeform.resources.base import (
     BaseResource,
     ResourceMethodBase,
     FindListResourceMethod,
+    FindBatchesListResourceMethod,
+    ExportListResourceMethod,
     CountListResourceMethod,
     UpdateListResourceMethod,
     UpsertListResourceMethod,
@@ -12,6 +14,7 @@ from pydeform.resources.base import (
     UpdateResourceMethod,
     GetOneResourceMethod,
     CreateOneResourceMethod,
+    CreateManyResourceMethod,
     SaveOneResourceMethod,
     UpdateOneResourceMethod,
     RemoveOneResourceMethod,
@@ -89,6 +92,7 @@ class ProjectListResource(BaseResource):
 
     methods = {
         'find': FindListResourceMethod,
+        'find_batches': FindBatchesListResourceMethod,
         'count': CountListResourceMethod,
     }
 
@@ -119,6 +123,7 @@ class CollectionListResource(BaseResource):
 
     methods = {
         'find': FindListResourceMethod,
+        'find_batches': FindBatchesListResourceMethod,
         'count': CountListResourceMethod,
     }
 
@@ -163,6 +168,22 @@ class DocumentRemoveOneResourceMethod(DocumentResourceMixin,
         return params
 
 
+class DocumentCreateOneResourceMethod(DocumentResourceMixin,
+                                      CreateOneResourceMethod):
+    pass
+
+
+class DocumentSaveOneResourceMethod(DocumentResourceMixin,
+                                    SaveOneResourceMethod):
+    pass
+
+
+class DocumentCreateManyResourceMethod(DocumentResourceMixin,
+                                       CreateManyResourceMethod):
+    create_one_method_class = DocumentCreateOneResourceMethod
+    save_one_method_class = DocumentSaveOneResourceMethod
+
+
 class DocumentListResource(BaseResource):
     """Many documents manupulation object"""
     path = ['collections', '{collection}', 'documents']
@@ -173,6 +194,16 @@ class DocumentListResource(BaseResource):
             (DocumentResourceMixin, FindListResourceMethod),
             {}
         ),
+        'find_batches': type(
+            'DocumentFindBatchesListResourceMethod',
+            (DocumentResourceMixin, FindBatchesListResourceMethod),
+            {}
+        ),
+        'export': type(
+            'DocumentExportListResourceMethod',
+            (DocumentResourceMixin, ExportListResourceMethod),
+            {}
+        ),
         'count': type(
             'DocumentFindListResourceMethod',
             (DocumentResourceMixin, CountListResourceMethod),
@@ -217,16 +248,9 @@ class DocumentOneResource(BaseResource):
             (DocumentResourceMixin, GetFileResourceMethod),
             {}
         ),
-        'create': type(
-            'DocumentCreateOneResourceMethod',
-            (DocumentResourceMixin, CreateOneResourceMethod),
-            {}
-        ),
-        'save': type(
-            'DocumentSaveOneResourceMethod',
-            (DocumentResourceMixin, SaveOneResourceMethod),
-            {}
-        ),
+        'create': DocumentCreateOneResourceMethod,
+        'create_many': DocumentCreateManyResourceMethod,
+        'save': DocumentSaveOneResourceMethod,
         'update': type(
             'DocumentUpdateOneResourceMethod',
             (DocumentResourceMixin, UpdateOneResourceMethod),
@@ -1,16 +1,27 @@
 # -*- coding: utf-8 -*-
 from copy import deepcopy
 
+from pydeform.codec import get_response_json
+from pydeform.exceptions import DeformException
 from pydeform.resources.utils import (
     PARAMS_DEFINITIONS,
+    RequestPlan,
     get_headers,
-    get_params_by_destination,
     get_payload,
     get_query_params,
-    get_url,
+    iterate_batches_by_pagination,
     iterate_by_pagination
 )
-from pydeform.utils import do_http_request, uri_join
+from pydeform.six import string_types
+from pydeform.utils import (
+    do_http_request,
+    iterate_concurrently,
+    read_records,
+    write_ndjson
+)
+
+EXPORT_BATCH_SIZE = 1000
+CREATE_MANY_WORKERS = 8
 
 
 class BaseResource(object):
@@ -21,14 +32,16 @@ class BaseResource(object):
                  base_uri,
                  auth_header,
                  requests_session,
-                 request_defaults):
-        kwargs = {
-            'base_uri': base_uri,
-            'path': self.path,
-            'auth_header': auth_header,
-            'requests_session': requests_session,
-            'request_defaults': request_defaults,
-        }
+                 request_defaults,
+                 **http_kwargs):
+        kwargs = dict(
+            http_kwargs,
+            base_uri=base_uri,
+            path=self.path,
+            auth_header=auth_header,
+            requests_session=requests_session,
+            request_defaults=request_defaults,
+        )
         for method_name, method_factory in self.methods.items():
             setattr(self, method_name, method_factory(**kwargs))
 
@@ -45,82 +58,126 @@ class ResourceMethodBase(object):
     params = {}
     params_required = []
     is_paginatable = False
+    is_hedgeable = False
     pagination_params = {
         'page': PARAMS_DEFINITIONS['page'],
         'per_page': PARAMS_DEFINITIONS['per_page'],
     }
+    pagination_options = {
+        'prefetch': None,
+        'workers': None,
+        'ordered': True,
+        'stream_items': False,
+    }
     return_create_status = False
     result_property = None
+    iterate_batches = False
 
     def __init__(self,
                  base_uri,
                  path,
                  auth_header,
                  requests_session,
-                 request_defaults):
+                 request_defaults,
+                 hedging_policy=None,
+                 **http_kwargs):
         self.base_uri = base_uri
         self.path = path
         self.auth_header = auth_header
         self.requests_session = requests_session
         self.request_defaults = request_defaults
+        # `do_http_request` options: `retry_policy`, `json_codec`, etc.
+        self.http_kwargs = http_kwargs
+        self.json_codec = http_kwargs.get('json_codec')
+        self.hedging_policy = hedging_policy
+        self.hedger = None
+        if hedging_policy is not None and self.is_hedgeable:
+            self.hedger = hedging_policy.get_hedger(
+                (type(self).__name__, str(self.path))
+            )
         if not any([self.method, self.action]):
             raise ValueError('You should specify method or action')
         if self.action:
             self.method = 'post'
+        self.request_plan = self.get_request_plan()
 
     def __call__(self,
                  timeout=None,
                  **params):
-        for param_required in self.get_params_required():
-            if param_required not in params:
-                raise ValueError('%s is required parameter' % param_required)
+        pagination_options = self._pop_pagination_options(params)
+        self._check_params_required(params)
         context = self.get_context(params)
         context['timeout'] = timeout
         if self.is_paginatable:
-            if self._pagination_is_activated(context):
+            if (self._pagination_is_activated(context) and
+                    not pagination_options.get('keyset')):
                 response = do_http_request(
                     method=self.method,
                     request_kwargs=context,
-                    requests_session=self.requests_session,
-                    request_defaults=self.request_defaults,
+                    **self.get_http_kwargs()
                 )
                 return self._prepare_paginated_response(
-                    response.json()
+                    get_response_json(response, self.json_codec)
                 )
             else:
-                return iterate_by_pagination(
+                if self.iterate_batches:
+                    iterate = iterate_batches_by_pagination
+                else:
+                    iterate = iterate_by_pagination
+                return iterate(
                     method=self.method,
                     request_kwargs=context,
-                    requests_session=self.requests_session,
-                    request_defaults=self.request_defaults,
+                    **dict(self.get_http_kwargs(), **pagination_options)
                 )
         else:
             response = do_http_request(
                 method=self.method,
                 request_kwargs=context,
-                requests_session=self.requests_session,
-                request_defaults=self.request_defaults,
+                **self.get_http_kwargs()
             )
             if context.get('stream'):
                 return response.raw
+            return self._prepare_response(response)
 
-            if response.content:
-                try:
-                    result = response.json()
-                    if self.result_property:
-                        result = result[self.result_property]
-                except ValueError:
-                    result = response.content
-            else:
-                result = None
+    def _check_params_required(self, params):
+        for param_required in self.request_plan.params_required:
+            if param_required not in params:
+                raise ValueError('%s is required parameter' % param_required)
 
-            if self.return_create_status:
-                return {
-                    'created': response.status_code == 201,
-                    'result': result
-                }
-            else:
-                return result
+    def _prepare_response(self, response):
+        if response.content:
+            try:
+                result = get_response_json(response, self.json_codec)
+                if self.result_property:
+                    result = result[self.result_property]
+            except ValueError:
+                result = response.content
+        else:
+            result = None
+
+        if self.return_create_status:
+            return {
+                'created': response.status_code == 201,
+                'result': result
+            }
+        else:
+            return result
+
+    def get_http_kwargs(self):
+        return dict(
+            self.http_kwargs,
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults,
+            hedger=self.hedger,
+        )
+
+    def _pop_pagination_options(self, params):
+        if not self.is_paginatable:
+            return {}
+        response = {}
+        for key, default in self.pagination_options.items():
+            response[key] = params.pop(key, default)
+        return response
 
     def _pagination_is_activated(self, context):
         for pagination_param in self.pagination_params:
@@ -137,47 +194,47 @@ class ResourceMethodBase(object):
         }
 
     def get_context(self, params):
-        params_definitions = self.get_params_definitions()
-        params_by_destination = get_params_by_destination(
-            params,
-            definitions=params_definitions
-        )
+        plan = self.request_plan
+        params_by_destination = plan.get_params_by_destination(params)
         context = {
-            'url': get_url(
-                base_uri=self.base_uri,
-                path=self.path,
-                params=params_by_destination.get('uri', {}),
-                definitions=params_definitions,
-            ),
-            'headers': get_headers(
-                auth_header=self.auth_header,
-                params=params_by_destination.get('headers', {}),
-                definitions=params_definitions,
-            ),
-            'params': get_query_params(
-                params=params_by_destination.get('query_params', {}),
-                definitions=params_definitions,
-            ),
+            'url': plan.get_url(params_by_destination.get('uri', {})),
         }
-        delete_keys = []
-        for key, value in context.items():
-            if not value:
-                delete_keys.append(key)
-        for key in delete_keys:
-            del context[key]
+        query_params = get_query_params(
+            params=params_by_destination.get('query_params', {}),
+            definitions=plan.definitions,
+        )
+        if query_params:
+            context['params'] = query_params
 
         payload = get_payload(
             params_by_destination.get('payload'),
-            definitions=params_definitions
+            definitions=plan.definitions
         )
-        if self.action:
-            context['headers']['X-Action'] = self.action
         if payload:
+            context['headers'] = dict(plan.headers)
             context[payload['type']] = payload['data']
         else:
-            context['headers']['Content-Type'] = 'application/json'
+            context['headers'] = dict(plan.json_headers)
         return context
 
+    def get_request_plan(self):
+        """Compiles the static parts of the method requests."""
+        params_definitions = self.get_params_definitions()
+        headers = get_headers(
+            auth_header=self.auth_header,
+            params={},
+            definitions=params_definitions,
+        )
+        if self.action:
+            headers['X-Action'] = self.action
+        return RequestPlan(
+            base_uri=self.base_uri,
+            path=self.path,
+            definitions=params_definitions,
+            headers=headers,
+            params_required=self.get_params_required()
+        )
+
     def get_params_definitions(self):
         # todo: test me
         params_definitions = deepcopy(self.params)
@@ -201,8 +258,41 @@ class GetListResourceMethod(ResourceMethodBase):
 
 
 class FindListResourceMethod(ResourceMethodBase):
+    """Finds items.
+
+    Returns iterator over all found items if neither `page` nor
+    `per_page` is provided.
+
+    Iteration options:
+
+    * `prefetch` - number of pages fetched in a background thread ahead
+      of the consumer. Default is `None` (no prefetching).
+    * `workers` - number of threads fetching pages in parallel once
+      the pages count is known from the first page. Default is `None`.
+    * `ordered` - if `False` parallel fetched pages are yielded as soon
+      as they arrive instead of the pages order. Default is `True`.
+    * `stream_items` - if `True` items are decoded one by one as
+      the response bytes arrive instead of decoding the whole page.
+      Peak memory is bounded by one item instead of one page.
+      Default is `False`.
+    * `keyset` - unique property to sort by (e.g. `_id` or `-_id`).
+      Every next page is requested by filtering on the last seen value
+      instead of the page number, so the scan cost does not depend on
+      its depth. `per_page` could be used to set the page size.
+      Default is `None`.
+    * `checkpoint` - value of the `checkpoint()` method of the
+      previous iteration to resume it from. `filter`, `text`, `sort` and
+      `per_page` are restored from the checkpoint if not provided.
+      Default is `None`.
+    """
     action = 'find'
     is_paginatable = True
+    is_hedgeable = True
+    pagination_options = dict(
+        ResourceMethodBase.pagination_options,
+        keyset=None,
+        checkpoint=None
+    )
     params = {
         'filter': PARAMS_DEFINITIONS['find_filter'],
         'text': PARAMS_DEFINITIONS['find_text'],
@@ -210,31 +300,83 @@ class FindListResourceMethod(ResourceMethodBase):
     }
 
 
+class FindBatchesListResourceMethod(FindListResourceMethod):
+    """Finds items by batches.
+
+    Returns generator over lists of found items. Takes the same
+    parameters and iteration options as `find` except `checkpoint`,
+    `per_page` sets the size of the requested pages.
+
+    Iteration options:
+
+    * `batch_size` - size of the yielded lists. Default is `None`
+      (every page is yielded as is).
+    """
+    iterate_batches = True
+    pagination_options = dict(
+        ResourceMethodBase.pagination_options,
+        keyset=None,
+        batch_size=None
+    )
+
+    def _pagination_is_activated(self, context):
+        return False
+
+
+class ExportListResourceMethod(FindBatchesListResourceMethod):
+    """Exports found items to the file as newline delimited JSON.
+
+    Takes the same parameters and iteration options as `find_batches`.
+    Use `fields` to export the part of every item only.
+
+    Export options:
+
+    * `path` - destination file path (required).
+    * `compress` - `gzip` for compressed file. Default is `None`.
+    * `progress` - callable receiving the export stats after every
+      written batch. Default is `None`.
+
+    Returns:
+
+    Dict with the exported `documents` count, uncompressed `bytes`,
+    `seconds`, `documents_per_second` and `mb_per_second`.
+    """
+
+    def __call__(self,
+                 path,
+                 compress=None,
+                 progress=None,
+                 timeout=None,
+                 **params):
+        params['batch_size'] = params.get('batch_size') or EXPORT_BATCH_SIZE
+        batches = super(ExportListResourceMethod, self).__call__(
+            timeout=timeout,
+            **params
+        )
+        return write_ndjson(
+            batches,
+            path=path,
+            compress=compress,
+            progress=progress
+        )
+
+
 class CountListResourceMethod(ResourceMethodBase):
     action = 'find'
+    is_hedgeable = True
     params = {
         'filter': PARAMS_DEFINITIONS['find_filter'],
         'text': PARAMS_DEFINITIONS['find_text'],
     }
+    result_property = 'total'
 
-    def __call__(self,
-                 timeout=None,
-                 **params):
-        context = self.get_context(params)
-        context['timeout'] = timeout
+    def get_context(self, params):
+        context = super(CountListResourceMethod, self).get_context(params)
         if 'params' not in context:
             context['params'] = {}
         context['params']['per_page'] = 1
         context['params']['fields'] = '_id'
-
-        response = do_http_request(
-            method=self.method,
-            request_kwargs=context,
-            requests_session=self.requests_session,
-            request_defaults=self.request_defaults,
-        )
-        response = response.json()
-        return response['total']
+        return context
 
 
 class UpdateListResourceMethod(ResourceMethodBase):
@@ -259,10 +401,12 @@ class RemoveListResourceMethod(ResourceMethodBase):
 
 class GetResourceMethod(ResourceMethodBase):
     method = 'get'
+    is_hedgeable = True
 
 
 class GetOneResourceMethod(ResourceMethodBase):
     method = 'get'
+    is_hedgeable = True
     params = {
         'identity': PARAMS_DEFINITIONS['identity'],
         'property': PARAMS_DEFINITIONS['property'],
@@ -276,7 +420,8 @@ class GetFileResourceMethod(GetOneResourceMethod):
     def get_context(self, params):
         context = super(GetFileResourceMethod, self).get_context(params)
         context['stream'] = True
-        context['url'] = uri_join(context['url'], 'content/')
+        # request plan URLs always end with the slash
+        context['url'] += 'content/'
         return context
 
 
@@ -325,3 +470,92 @@ class RemoveOneResourceMethod(ResourceMethodBase):
         'property': PARAMS_DEFINITIONS['property'],
     }
     params_required = ['identity']
+
+
+class CreateManyResourceMethod(ResourceMethodBase):
+    """Creates many items with bounded concurrency.
+
+    Items with `_id` are saved, the rest are created. Reading of the
+    records is paused while `2 * workers` of them are in progress.
+
+    Create options:
+
+    * `records` - iterable of items or path to the newline delimited JSON
+      or CSV (by `.csv` extension) file, optionally `.gz` compressed
+      (required).
+    * `workers` - number of the concurrent requests. Default is `8`.
+
+    Returns:
+
+    Generator of results in order of completion. Every result is a dict
+    with record's `index`, `id`, `created` flag and `error` - instance
+    of [DeformException](exceptions.md#deformexception) if the item
+    was not created (e.g. `ValidationError`), otherwise `None`.
+
+    Generator is lazy: records are not read and nothing is created
+    until the results are iterated. Consume all the results even if
+    they are not needed.
+
+    Example:
+
+    ```python
+    results = project_client.document.create_many(
+        collection='venues',
+        records='venues.ndjson'
+    )
+    errors = [i for i in results if i['error']]
+    ```
+    """
+    method = 'post'
+    create_one_method_class = CreateOneResourceMethod
+    save_one_method_class = SaveOneResourceMethod
+
+    def __init__(self, **kwargs):
+        super(CreateManyResourceMethod, self).__init__(**kwargs)
+        self.create_one = self.create_one_method_class(**kwargs)
+        self.save_one = self.save_one_method_class(**kwargs)
+
+    def __call__(self,
+                 records,
+                 workers=CREATE_MANY_WORKERS,
+                 timeout=None,
+                 **params):
+        self._check_params_required(params)
+        if isinstance(records, string_types):
+            records = read_records(records)
+
+        def create(indexed_record):
+            index, record = indexed_record
+            result = {
+                'index': index,
+                'id': record.get('_id'),
+                'created': False,
+                'error': None,
+            }
+            try:
+                if '_id' in record:
+                    response = self.save_one(
+                        timeout=timeout,
+                        identity=record['_id'],
+                        data=record,
+                        **params
+                    )
+                    result['created'] = response['created']
+                else:
+                    response = self.create_one(
+                        timeout=timeout,
+                        data=record,
+                        **params
+                    )
+                    result['id'] = response['_id']
+                    result['created'] = True
+            except DeformException as e:
+                result['error'] = e
+            return result
+
+        return iterate_concurrently(
+            create,
+            enumerate(records),
+            workers=workers,
+            ordered=False
+        )
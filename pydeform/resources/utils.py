@@ -1,15 +1,19 @@
 # -*- coding: utf-8 -*-
-import datetime
-from collections import defaultdict
 import json
+from collections import defaultdict
+from itertools import chain, islice
 
+from pydeform.codec import DEFAULT_JSON_CODEC, get_response_json, json_default
+from pydeform.columns import build_columns
 from pydeform.exceptions import NotFoundError
 from pydeform.six import PY2
 from pydeform.utils import (
     do_http_request,
     flatten,
-    format_date,
-    format_datetime,
+    iterate_concurrently,
+    iterate_in_background,
+    iterate_json_array_property,
+    quote_uri_part,
     uri_join
 )
 
@@ -82,6 +86,11 @@ PARAMS_DEFINITIONS = {
     },
 }
 
+STREAM_CHUNK_SIZE = 64 * 1024
+CHECKPOINT_PARAMS = ['sort', 'per_page']
+CHECKPOINT_PAYLOAD_PROPERTIES = ['filter', 'text']
+_NO_ITEM = object()
+
 if PY2:
     FILE_TYPE = file
 else:
@@ -119,6 +128,92 @@ def get_url(base_uri, path, params, definitions):
     return uri_join(*uri_bits)
 
 
+class RequestPlan(object):
+    """
+    Static parts of the resource method requests compiled once:
+    params destinations table, required params, URL template and
+    the constant headers.
+
+    URL template is the prefix with the base URI and the leading
+    constant path segments joined and quoted beforehand, followed by
+    the `(param name, constant suffix)` pairs. Per call work is the
+    params routing by the table and the quoting of the URI params
+    values only.
+    """
+
+    def __init__(self,
+                 base_uri,
+                 path,
+                 definitions,
+                 headers,
+                 params_required=()):
+        self.base_uri = base_uri
+        self.definitions = definitions
+        self.destinations = dict(
+            (key, definition['dest'])
+            for key, definition in definitions.items()
+        )
+        self.url_prefix, self.url_template = self._compile_url_template(
+            base_uri,
+            path
+        )
+        self.params_required = params_required
+        self.headers = headers
+        self.json_headers = dict(headers)
+        self.json_headers['Content-Type'] = 'application/json'
+
+    @staticmethod
+    def _compile_url_template(base_uri, path):
+        # every path bit is followed by the slash
+        url_prefix = base_uri if base_uri.endswith('/') else base_uri + '/'
+        url_template = []
+        constant = []
+        for path_item in path:
+            if path_item.startswith('{'):
+                if url_template:
+                    url_template[-1] = (url_template[-1][0], ''.join(constant))
+                else:
+                    url_prefix += ''.join(constant)
+                constant = []
+                url_template.append((path_item.strip('{}'), ''))
+            elif path_item:
+                constant.append(quote_uri_part(path_item) + '/')
+        if url_template:
+            url_template[-1] = (url_template[-1][0], ''.join(constant))
+        else:
+            url_prefix += ''.join(constant)
+        return url_prefix, url_template
+
+    def get_params_by_destination(self, params):
+        """Same as `get_params_by_destination` by the compiled table."""
+        response = {}
+        destinations = self.destinations
+        for key, value in params.items():
+            destination = destinations[key]
+            if destination not in response:
+                response[destination] = {}
+            response[destination][key] = value
+        return response
+
+    def get_url(self, params):
+        """Same as `get_url` by the compiled template."""
+        if not self.url_template:
+            return self.url_prefix
+        bits = [self.url_prefix]
+        for param_name, suffix in self.url_template:
+            value = params.get(param_name)
+            if value:
+                if isinstance(value, list):
+                    for i in value:
+                        bits.append(quote_uri_part(i))
+                        bits.append('/')
+                else:
+                    bits.append(quote_uri_part(value))
+                    bits.append('/')
+            bits.append(suffix)
+        return ''.join(bits)
+
+
 def get_headers(auth_header, params, definitions):
     return {
         'Authorization': auth_header
@@ -135,6 +230,14 @@ def get_query_params(params, definitions):
 
 
 def get_payload(params, definitions):
+    """
+    Returns the request payload built from the `payload` params.
+
+    Payload values are used as is: `datetime` and `date` values are
+    formatted by the JSON codec during the serialization. Multipart
+    payload with every non file value encoded is built only if there
+    are file objects in the params.
+    """
     if not params:
         return
 
@@ -142,14 +245,13 @@ def get_payload(params, definitions):
     final_data = {}
 
     for key, value in params.items():
-        with_files, prepared_data = prepare_payload(value)
-        if with_files:
+        if not params_has_files and has_files(value):
             params_has_files = True
         payload_property = definitions.get(key).get('payload_property')
         if payload_property:
-            final_data[payload_property] = prepared_data
+            final_data[payload_property] = value
         else:
-            final_data = prepared_data
+            final_data = value
 
     if params_has_files:
         if isinstance(final_data, FILE_TYPE):
@@ -160,70 +262,518 @@ def get_payload(params, definitions):
             final_data = flatten(final_data)
             for key, value in final_data.items():
                 if not isinstance(value, FILE_TYPE):
-                    final_data[key] = (None, json.dumps(value))
+                    final_data[key] = (
+                        None,
+                        json.dumps(value, default=json_default)
+                    )
 
     return {
-        'type': 'files' if with_files else 'json',
+        'type': 'files' if params_has_files else 'json',
         'data': final_data
     }
 
 
-def prepare_payload(data):
-    if isinstance(data, datetime.datetime):
-        return False, format_datetime(data)
-    elif isinstance(data, datetime.date):
-        return False, format_date(data)
-    elif isinstance(data, (list, tuple)):
-        items = []
-        items_with_files = False
-        for i in data:
-            with_files, response = prepare_payload(i)
-            items.append(response)
-            if with_files and not items_with_files:
-                items_with_files = True
-        return items_with_files, type(data)(items)
-    elif isinstance(data, dict):
-        items = []
-        items_with_files = False
-        for key, value in data.items():
-            with_files, response = prepare_payload(value)
-            items.append((key, response))
-            if with_files and not items_with_files:
-                items_with_files = True
-        return items_with_files, dict(items)
-    elif isinstance(data, FILE_TYPE):
-        return True, data
-    else:
-        return False, data
+def has_files(data):
+    """
+    Returns `True` if there are file objects in `data` at any depth.
+
+    Nested values are walked with an explicit stack, so deep documents
+    do not hit the recursion limit.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, FILE_TYPE):
+            return True
+    return False
 
 
 def iterate_by_pagination(method,
                           request_kwargs,
                           requests_session,
-                          request_defaults):
-    response_result = {
-        'links': {
-            'next': 'yes'
-        }
-    }
-    page = 0
+                          request_defaults,
+                          prefetch=None,
+                          workers=None,
+                          ordered=True,
+                          keyset=None,
+                          stream_items=False,
+                          checkpoint=None,
+                          **http_kwargs):
+    start_page = 1
+    start_offset = 0
+    keyset_value = None
+    if checkpoint:
+        restore_checkpoint_request_kwargs(request_kwargs, checkpoint)
+        keyset = keyset or checkpoint.get('keyset')
+        if keyset:
+            keyset_value = checkpoint.get('last_value')
+        else:
+            start_page = checkpoint['page']
+            start_offset = checkpoint['offset']
+
+    pages = get_pages_iterator(
+        method=method,
+        request_kwargs=request_kwargs,
+        requests_session=requests_session,
+        request_defaults=request_defaults,
+        prefetch=prefetch,
+        workers=workers,
+        ordered=ordered,
+        keyset=keyset,
+        stream_items=stream_items,
+        start_page=start_page,
+        keyset_value=keyset_value,
+        **http_kwargs
+    )
+    return PaginationIterator(
+        pages,
+        request_kwargs=request_kwargs,
+        start_page=start_page,
+        start_offset=start_offset,
+        keyset=keyset,
+        keyset_value=keyset_value,
+        ordered=ordered or not workers,
+    )
+
+
+def iterate_batches_by_pagination(method,
+                                  request_kwargs,
+                                  requests_session,
+                                  request_defaults,
+                                  batch_size=None,
+                                  prefetch=None,
+                                  workers=None,
+                                  ordered=True,
+                                  keyset=None,
+                                  stream_items=False,
+                                  **http_kwargs):
+    pages = get_pages_iterator(
+        method=method,
+        request_kwargs=request_kwargs,
+        requests_session=requests_session,
+        request_defaults=request_defaults,
+        prefetch=prefetch,
+        workers=workers,
+        ordered=ordered,
+        keyset=keyset,
+        stream_items=stream_items,
+        **http_kwargs
+    )
+    return _iterate_pages_batches(pages, batch_size=batch_size)
+
+
+def get_pages_iterator(method,
+                       request_kwargs,
+                       requests_session,
+                       request_defaults,
+                       prefetch=None,
+                       workers=None,
+                       ordered=True,
+                       keyset=None,
+                       stream_items=False,
+                       start_page=1,
+                       keyset_value=None,
+                       **http_kwargs):
+    if prefetch and workers:
+        raise ValueError('prefetch and workers could not be used together')
+    if keyset and workers:
+        raise ValueError('keyset and workers could not be used together')
+    if stream_items and any([prefetch, workers, keyset]):
+        raise ValueError(
+            'stream_items could not be used with prefetch, workers or keyset'
+        )
+    pages_kwargs = dict(
+        http_kwargs,
+        method=method,
+        request_kwargs=request_kwargs,
+        requests_session=requests_session,
+        request_defaults=request_defaults,
+    )
+    if workers:
+        return iterate_pages_concurrently(
+            workers=workers,
+            ordered=ordered,
+            start_page=start_page,
+            **pages_kwargs
+        )
+    if keyset:
+        pages = iterate_pages_by_keyset(
+            key=keyset,
+            last_value=keyset_value,
+            **pages_kwargs
+        )
+    elif stream_items:
+        pages = iterate_streamed_pages(start_page=start_page, **pages_kwargs)
+    else:
+        pages = iterate_pages(start_page=start_page, **pages_kwargs)
+    if prefetch:
+        pages = iterate_in_background(pages, buffer_size=prefetch)
+    return pages
+
+
+class PaginationIterator(object):
+    """Iterator over the items of all the pages.
+
+    Tracks the position of the last returned item, so the iteration
+    could be resumed later from the `checkpoint()`.
+    """
+
+    def __init__(self,
+                 pages,
+                 request_kwargs,
+                 start_page=1,
+                 start_offset=0,
+                 keyset=None,
+                 keyset_value=None,
+                 ordered=True):
+        self.pages = pages
+        self.request_kwargs = request_kwargs
+        self.keyset = keyset
+        self.ordered = ordered
+        self._page = start_page
+        self._offset = start_offset
+        self._keyset_value = keyset_value
+        self._last_item = _NO_ITEM
+        self._items = self._iterate_items(start_offset)
+        self.total = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._items)
+
+    next = __next__
+
+    def close(self):
+        self._items.close()
+
+    def _iterate_items(self, skip):
+        try:
+            for page in self.pages:
+                if self.total is None:
+                    self.total = page.get('total')
+                items = page['items']
+                if skip:
+                    items = islice(items, skip, None)
+                    skip = 0
+                for item in items:
+                    self._offset += 1
+                    self._last_item = item
+                    yield item
+                self._page += 1
+                self._offset = 0
+        finally:
+            self.pages.close()
+
+    def to_columns(self, fields):
+        """Consumes the rest items into numpy masked arrays.
+
+        Requires [numpy](http://www.numpy.org/) to be installed.
+
+        Parameters:
+
+        * `fields` - list of properties to collect. Use dots for the
+          nested properties (e.g. `address.city`).
+
+        Returns:
+
+        Dict of `numpy.ma.MaskedArray` by field. Missing values are masked.
+        Arrays are preallocated by the `total` of the first page.
+        """
+        try:
+            first_item = next(self)
+        except StopIteration:
+            return build_columns([], fields)
+        return build_columns(
+            chain([first_item], self),
+            fields,
+            size=self.total
+        )
+
+    def checkpoint(self):
+        """Returns JSON serializable position after the last returned item.
+
+        Pass it as `checkpoint` iteration option to resume the iteration.
+        """
+        if not self.ordered:
+            raise ValueError('Unordered iteration could not be resumed')
+        if self.keyset:
+            response = {'keyset': self.keyset}
+            if self._last_item is _NO_ITEM:
+                response['last_value'] = self._keyset_value
+            else:
+                response['last_value'] = get_item_property(
+                    self._last_item,
+                    self.keyset.lstrip('-')
+                )
+        else:
+            response = {
+                'page': self._page,
+                'offset': self._offset,
+            }
+        params = self.request_kwargs.get('params') or {}
+        for key in CHECKPOINT_PARAMS:
+            if key in params:
+                response[key] = params[key]
+        payload = self.request_kwargs.get('json') or {}
+        payload_properties = dict(
+            (key, payload[key])
+            for key in CHECKPOINT_PAYLOAD_PROPERTIES if key in payload
+        )
+        if payload_properties:
+            # payload is formatted (dates, etc.) by the codec on sending
+            response.update(DEFAULT_JSON_CODEC.loads(
+                DEFAULT_JSON_CODEC.dumps(payload_properties)
+            ))
+        return response
+
+
+def restore_checkpoint_request_kwargs(request_kwargs, checkpoint):
+    params = request_kwargs.setdefault('params', {})
+    for key in CHECKPOINT_PARAMS:
+        if key in checkpoint and key not in params:
+            params[key] = checkpoint[key]
+    payload_properties = [
+        i for i in CHECKPOINT_PAYLOAD_PROPERTIES if i in checkpoint
+    ]
+    if payload_properties:
+        payload = request_kwargs.get('json') or {}
+        for key in payload_properties:
+            payload.setdefault(key, checkpoint[key])
+        request_kwargs['json'] = payload
+
+
+def _iterate_pages_batches(pages, batch_size):
+    try:
+        if not batch_size:
+            for page in pages:
+                items = page['items']
+                yield items if isinstance(items, list) else list(items)
+        else:
+            batch = []
+            for page in pages:
+                items = iter(page['items'])
+                while True:
+                    batch.extend(islice(items, batch_size - len(batch)))
+                    if len(batch) < batch_size:
+                        break
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+    finally:
+        pages.close()
+
+
+def iterate_pages(method,
+                  request_kwargs,
+                  requests_session,
+                  request_defaults,
+                  start_page=1,
+                  **http_kwargs):
+    page = start_page - 1
+    if 'params' not in request_kwargs:
+        request_kwargs['params'] = {}
+    while True:
+        page += 1
+        request_kwargs['params']['page'] = page
+        response = do_http_request(
+            method=method,
+            request_kwargs=request_kwargs,
+            requests_session=requests_session,
+            request_defaults=request_defaults,
+            **http_kwargs
+        )
+        response_result = get_response_json(
+            response,
+            http_kwargs.get('json_codec')
+        )
+        if not response_result['items']:
+            break
+        yield response_result
+        if not response_result.get('links', {}).get('next'):
+            break
+
+
+def iterate_streamed_pages(method,
+                           request_kwargs,
+                           requests_session,
+                           request_defaults,
+                           start_page=1,
+                           **http_kwargs):
+    """
+    Same as `iterate_pages` but every page's `items` is a generator
+    decoding items as the response bytes arrive. The rest page properties
+    are available after its items are consumed.
+    """
+    page = start_page - 1
     if 'params' not in request_kwargs:
         request_kwargs['params'] = {}
+    request_kwargs['stream'] = True
     while True:
-        if response_result.get('links', {}).get('next'):
-            page += 1
-            request_kwargs['params']['page'] = page
-            response = do_http_request(
-                method=method,
-                request_kwargs=request_kwargs,
-                requests_session=requests_session,
-                request_defaults=request_defaults,
+        page += 1
+        request_kwargs['params']['page'] = page
+        response = do_http_request(
+            method=method,
+            request_kwargs=request_kwargs,
+            requests_session=requests_session,
+            request_defaults=request_defaults,
+            **http_kwargs
+        )
+        try:
+            response_result = {}
+            items = iterate_json_array_property(
+                response.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+                'items',
+                response_result
             )
-            response_result = response.json()
-            if response_result['items']:
-                for i in response_result['items']:
-                    yield i
-            else:
+            try:
+                first_item = next(items)
+            except StopIteration:
                 break
-        else:
+            response_result['items'] = chain([first_item], items)
+            yield response_result
+            # consume the rest of the page to read the properties after items
+            for i in items:
+                pass
+        finally:
+            response.close()
+        if not response_result.get('links', {}).get('next'):
             break
+
+
+def iterate_pages_concurrently(method,
+                               request_kwargs,
+                               requests_session,
+                               request_defaults,
+                               workers,
+                               ordered=True,
+                               start_page=1,
+                               **http_kwargs):
+    """
+    Fetch the first page and then all the rest pages at once
+    by the pool of `workers` threads.
+    """
+    if 'params' not in request_kwargs:
+        request_kwargs['params'] = {}
+
+    def get_page(page):
+        page_request_kwargs = dict(request_kwargs)
+        page_request_kwargs['params'] = dict(
+            request_kwargs['params'],
+            page=page
+        )
+        response = do_http_request(
+            method=method,
+            request_kwargs=page_request_kwargs,
+            requests_session=requests_session,
+            request_defaults=request_defaults,
+            **http_kwargs
+        )
+        return get_response_json(
+            response,
+            http_kwargs.get('json_codec')
+        )
+
+    first_page = get_page(start_page)
+    if not first_page['items']:
+        return
+    yield first_page
+    if not first_page.get('links', {}).get('next'):
+        return
+
+    if 'pages' not in first_page:
+        # no way to know the pages count beforehand
+        pages = iterate_pages(
+            method=method,
+            request_kwargs=request_kwargs,
+            requests_session=requests_session,
+            request_defaults=request_defaults,
+            start_page=start_page + 1,
+            **http_kwargs
+        )
+    else:
+        pages = iterate_concurrently(
+            get_page,
+            range(start_page + 1, first_page['pages'] + 1),
+            workers=workers,
+            ordered=ordered
+        )
+    try:
+        for page in pages:
+            yield page
+    finally:
+        pages.close()
+
+
+def iterate_pages_by_keyset(method,
+                            request_kwargs,
+                            requests_session,
+                            request_defaults,
+                            key,
+                            last_value=None,
+                            **http_kwargs):
+    """
+    Iterate over pages sorted by the unique `key` asking for every next
+    page with `$gt` (or `$lt` for `-key` descending sort) filter on
+    the last seen key value instead of the page number.
+    """
+    if key.startswith('-'):
+        key = key[1:]
+        operator = '$lt'
+        sort = '-' + key
+    else:
+        operator = '$gt'
+        sort = key
+
+    params = dict(request_kwargs.get('params') or {})
+    if 'page' in params:
+        raise ValueError('page could not be used with keyset')
+    if params.get('sort', sort) != sort:
+        raise ValueError('sort should be the same as keyset')
+    params['sort'] = sort
+    if 'fields' in params and key not in params['fields'].split(','):
+        params['fields'] += ',' + key
+
+    payload = dict(request_kwargs.get('json') or {})
+    base_filter = payload.get('filter')
+
+    while True:
+        if last_value is not None:
+            keyset_filter = {key: {operator: last_value}}
+            if base_filter:
+                keyset_filter = {'$and': [base_filter, keyset_filter]}
+            payload['filter'] = keyset_filter
+        page_request_kwargs = dict(request_kwargs, params=params, json=payload)
+        response = do_http_request(
+            method=method,
+            request_kwargs=page_request_kwargs,
+            requests_session=requests_session,
+            request_defaults=request_defaults,
+            **http_kwargs
+        )
+        response_result = get_response_json(
+            response,
+            http_kwargs.get('json_codec')
+        )
+        if not response_result['items']:
+            break
+        yield response_result
+        if not response_result.get('links', {}).get('next'):
+            break
+        last_value = get_item_property(response_result['items'][-1], key)
+
+
+def get_item_property(item, key):
+    value = item
+    for bit in key.split('.'):
+        try:
+            value = value[bit]
+        except (KeyError, TypeError):
+            raise ValueError('Item has no "%s" property' % key)
+    return value
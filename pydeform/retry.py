@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+import random
+import threading
+import time
+from email.utils import mktime_tz, parsedate_tz
+
+from requests.exceptions import ConnectTimeout, ReadTimeout
+
+IDEMPOTENT_METHODS = ['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE']
+RETRY_AFTER_STATUS_CODES = [429, 503]
+
+
+class RetryBudget(object):
+    """Token bucket limiting the share of the retried requests.
+
+    Every request deposits `ratio` tokens and every retry withdraws
+    one token, so retries could not exceed `ratio` of the requests.
+    Additionally `min_per_second` tokens are deposited every second
+    to allow retries of the rare requests. The bucket holds at most
+    `max_tokens` tokens.
+
+    Budget is thread safe and could be shared between clients.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=10, max_tokens=100):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = float(max_tokens)
+        self._updated_at = time.time()
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def _refill(self):
+        now = time.time()
+        self._tokens = min(
+            self.max_tokens,
+            self._tokens + (now - self._updated_at) * self.min_per_second
+        )
+        self._updated_at = now
+
+
+DEFAULT_RETRY_BUDGET = RetryBudget()
+
+
+def get_retry_after(response):
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0, mktime_tz(date) - time.time())
+
+
+class RetryPolicy(object):
+    """Retry policy of the HTTP requests.
+
+    Parameters:
+
+    * `max_retries` - max number of retries of one request. Default is `3`.
+    * `backoff_factor` - base delay in seconds. Delay before the n-th retry
+      is random value between `0` and `backoff_factor * 2 ** (n - 1)`.
+      Default is `0.1`.
+    * `max_backoff` - max delay in seconds. Default is `10`.
+    * `retry_post` - if `True` non idempotent `POST` and `PATCH` requests
+      are retried too. Default is `False`.
+    * `status_codes` - response status codes to retry. Default is
+      `(500, 502, 503, 504)`.
+    * `budget` - `RetryBudget` instance. Default is the process wide
+      budget.
+
+    Requests failed with connect timeout are always retried, because
+    they were not sent to the server. Requests failed with read timeout
+    or one of the `status_codes` are retried only if they are idempotent.
+    Responses with `429` status code are retried for any method.
+    `Retry-After` header of `429` and `503` responses is honored.
+    Requests with files are never retried.
+
+    Example:
+
+    ```python
+    client = Client(
+        host='deform.io',
+        retry_policy=RetryPolicy(max_retries=5, retry_post=True)
+    )
+    ```
+    """
+
+    def __init__(self,
+                 max_retries=3,
+                 backoff_factor=0.1,
+                 max_backoff=10,
+                 retry_post=False,
+                 status_codes=(500, 502, 503, 504),
+                 budget=None):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_post = retry_post
+        self.status_codes = status_codes
+        self.budget = budget or DEFAULT_RETRY_BUDGET
+
+    def is_retryable(self, method, requests_error):
+        if isinstance(requests_error, ConnectTimeout):
+            return True
+        idempotent = (
+            method.upper() in IDEMPOTENT_METHODS or self.retry_post
+        )
+        if isinstance(requests_error, ReadTimeout):
+            return idempotent
+        response = requests_error.response
+        if response is None:
+            return False
+        if response.status_code == 429:
+            return True
+        return idempotent and response.status_code in self.status_codes
+
+    def get_backoff(self, attempt):
+        return random.uniform(
+            0,
+            min(self.max_backoff, self.backoff_factor * 2 ** (attempt - 1))
+        )
+
+    def get_retry_delay(self, method, requests_error, attempt):
+        """
+        Returns seconds to wait before the `attempt`-th retry or `None`
+        if request should not be retried.
+        """
+        if attempt > self.max_retries:
+            return None
+        if not self.is_retryable(method, requests_error):
+            return None
+        delay = None
+        response = requests_error.response
+        if (response is not None and
+                response.status_code in RETRY_AFTER_STATUS_CODES):
+            delay = get_retry_after(response)
+            if delay is not None and delay > self.max_backoff:
+                return None
+        if not self.budget.withdraw():
+            return None
+        if delay is None:
+            delay = self.get_backoff(attempt)
+        return delay
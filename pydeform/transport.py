@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+import json as jsonlib
+import os
+import threading
+
+import requests
+import urllib3
+from requests.exceptions import (
+    ConnectionError,
+    ConnectTimeout,
+    ProxyError,
+    ReadTimeout,
+    RequestException,
+    SSLError,
+    TooManyRedirects
+)
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3 import exceptions as urllib3_exceptions
+from urllib3.fields import RequestField
+from urllib3.filepost import encode_multipart_formdata
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+from pydeform.six import binary_type, string_types
+from pydeform.six.moves.urllib.parse import urlencode, urlparse
+
+MAX_REDIRECTS = 30
+
+# urllib3 retries are disabled, `pydeform.retry.RetryPolicy` is used instead
+_FOLLOW_REDIRECTS = Retry(
+    total=None,
+    connect=False,
+    read=False,
+    other=0,
+    redirect=MAX_REDIRECTS,
+    raise_on_redirect=True
+)
+
+
+class Transport(object):
+    """Base class of the HTTP transports.
+
+    Transport sends the request prepared by the resource method and
+    returns python requests' `Response`. Any object with the same
+    `request` method could be passed as `requests_session` to the
+    [Client](#client): python requests' `Session` is the default one,
+    `pydeform.transport.Urllib3Transport` and
+    `pydeform.http2.HTTP2Session` are the alternatives.
+
+    Request keyword arguments are the subset of python requests' ones:
+    `params`, `headers`, `json`, `data`, `files`, `timeout`, `verify`,
+    `stream`, `allow_redirects` and `proxies`.
+    """
+
+    def request(self, method, url, **kwargs):
+        raise NotImplementedError()
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def close(self):
+        pass
+
+    def _get_proxy(self, url, proxies):
+        """Returns the proxy URL for `url` from python requests'
+        `proxies` option.
+        """
+        if not proxies:
+            return None
+        scheme = urlparse(url).scheme
+        return proxies.get(scheme) or proxies.get('all')
+
+
+class Urllib3Transport(Transport):
+    """Lean transport on top of the [urllib3](https://urllib3.readthedocs.io/)
+    connection pools.
+
+    Skips python requests' per request work (hooks, adapters lookup,
+    cookies merging, environment proxies and netrc lookup), which
+    dominates the CPU time of the small requests.
+    Cookies are not supported.
+
+    Parameters:
+
+    * `pool_connections` - number of the hosts to keep the pools for.
+      Default is `10`.
+    * `pool_maxsize` - max connections to keep in the pool of one host.
+      Default is `10`.
+    * `pool_block` - if `True` requests wait for a free connection
+      instead of opening a new one when the host pool is full.
+      Default is `False`.
+    * `keep_alive` - if `False` connections are closed after every
+      request. Default is `True`.
+
+    Example:
+
+    ```python
+    client = Client(host='deform.io', requests_session=Urllib3Transport())
+    ```
+    """
+
+    def __init__(self,
+                 pool_connections=10,
+                 pool_maxsize=10,
+                 pool_block=False,
+                 keep_alive=True):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.headers = CaseInsensitiveDict({
+            'User-Agent': requests.utils.default_user_agent(),
+            'Accept-Encoding': make_headers(
+                accept_encoding=True
+            )['accept-encoding'],
+            'Accept': '*/*',
+            'Connection': 'keep-alive' if keep_alive else 'close',
+        })
+        self._pool_managers = {}
+        self._lock = threading.Lock()
+
+    def get_pool_manager(self, verify=True, proxy=None):
+        """Returns urllib3 pool manager for the `verify` and `proxy`
+        options.
+        """
+        key = (verify, proxy)
+        pool_manager = self._pool_managers.get(key)
+        if pool_manager is not None:
+            return pool_manager
+        with self._lock:
+            if key not in self._pool_managers:
+                self._pool_managers[key] = self._create_pool_manager(
+                    verify,
+                    proxy
+                )
+            return self._pool_managers[key]
+
+    def close(self):
+        with self._lock:
+            for pool_manager in self._pool_managers.values():
+                pool_manager.clear()
+            self._pool_managers = {}
+
+    def request(self,
+                method,
+                url,
+                params=None,
+                headers=None,
+                json=None,
+                data=None,
+                files=None,
+                timeout=None,
+                verify=True,
+                stream=False,
+                allow_redirects=True,
+                proxies=None):
+        request_headers = self.headers.copy()
+        if headers:
+            request_headers.update(headers)
+        body = None
+        if files:
+            body, content_type = self._encode_files(files, data)
+            request_headers['Content-Type'] = content_type
+        elif data is not None:
+            body = data
+        elif json is not None:
+            body = jsonlib.dumps(json, allow_nan=False).encode('utf-8')
+            request_headers['Content-Type'] = 'application/json'
+        if params:
+            url = self._add_params(url, params)
+        pool_manager = self.get_pool_manager(
+            verify,
+            self._get_proxy(url, proxies)
+        )
+        try:
+            urllib3_response = pool_manager.urlopen(
+                method.upper(),
+                url,
+                body=body,
+                headers=request_headers,
+                timeout=self._get_timeout(timeout),
+                retries=_FOLLOW_REDIRECTS if allow_redirects else False,
+                redirect=allow_redirects,
+                preload_content=not stream,
+                decode_content=True
+            )
+        except urllib3_exceptions.HTTPError as e:
+            raise self._get_requests_error(e)
+        return self._get_response(urllib3_response, url, stream)
+
+    def _create_pool_manager(self, verify, proxy):
+        kwargs = {
+            'num_pools': self.pool_connections,
+            'maxsize': self.pool_maxsize,
+            'block': self.pool_block,
+        }
+        if verify is False:
+            kwargs['cert_reqs'] = 'CERT_NONE'
+        else:
+            kwargs['cert_reqs'] = 'CERT_REQUIRED'
+            if isinstance(verify, string_types):
+                if os.path.isdir(verify):
+                    kwargs['ca_cert_dir'] = verify
+                else:
+                    kwargs['ca_certs'] = verify
+            else:
+                kwargs['ca_certs'] = requests.certs.where()
+        if proxy:
+            return urllib3.ProxyManager(proxy, **kwargs)
+        return urllib3.PoolManager(**kwargs)
+
+    def _add_params(self, url, params):
+        query = urlencode(
+            [
+                (key, value)
+                for key, value in params.items()
+                if value is not None
+            ],
+            doseq=True
+        )
+        if not query:
+            return url
+        return url + ('&' if '?' in url else '?') + query
+
+    def _encode_files(self, files, data):
+        fields = []
+        for key, value in (data or {}).items():
+            fields.append(RequestField(name=key, data=value))
+        for key, value in files.items():
+            if isinstance(value, tuple):
+                filename, content = value[0], value[1]
+                content_type = value[2] if len(value) > 2 else None
+            else:
+                filename = os.path.basename(getattr(value, 'name', key))
+                content, content_type = value, None
+            if hasattr(content, 'read'):
+                content = content.read()
+            field = RequestField(name=key, data=content, filename=filename)
+            field.make_multipart(content_type=content_type)
+            fields.append(field)
+        return encode_multipart_formdata(fields)
+
+    def _get_timeout(self, timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+        else:
+            connect = read = timeout
+        return urllib3.Timeout(connect=connect, read=read)
+
+    def _get_requests_error(self, urllib3_error):
+        if isinstance(urllib3_error, urllib3_exceptions.MaxRetryError):
+            if urllib3_error.reason is None or isinstance(
+                    urllib3_error.reason,
+                    urllib3_exceptions.ResponseError):
+                return TooManyRedirects(urllib3_error)
+            urllib3_error = urllib3_error.reason
+        if isinstance(urllib3_error, (urllib3_exceptions.ProtocolError,
+                                      urllib3_exceptions.NewConnectionError)):
+            # new connection error is a subclass of the connect timeout
+            return ConnectionError(urllib3_error)
+        if isinstance(urllib3_error, urllib3_exceptions.ConnectTimeoutError):
+            return ConnectTimeout(urllib3_error)
+        if isinstance(urllib3_error, urllib3_exceptions.ReadTimeoutError):
+            return ReadTimeout(urllib3_error)
+        if isinstance(urllib3_error, urllib3_exceptions.SSLError):
+            return SSLError(urllib3_error)
+        if isinstance(urllib3_error, urllib3_exceptions.ProxyError):
+            return ProxyError(urllib3_error)
+        return RequestException(urllib3_error)
+
+    def _get_response(self, urllib3_response, url, stream):
+        response = requests.models.Response()
+        response.status_code = urllib3_response.status
+        response.reason = urllib3_response.reason
+        response.url = urllib3_response.geturl() or url
+        response.headers = CaseInsensitiveDict(urllib3_response.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = urllib3_response
+        if not stream:
+            content = urllib3_response.data
+            response._content = (
+                content if isinstance(content, binary_type) else b''
+            )
+        return response
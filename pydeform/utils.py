@@ -1,15 +1,35 @@
 # -*- coding: utf-8 -*-
-import datetime
-from copy import deepcopy
+import codecs
+import csv
+import gzip
+import io
+import json
+import re
+import sys
+import threading
+import time
 
 from requests.exceptions import RequestException
 
+from pydeform.breaker import is_failure
+from pydeform.codec import (  # noqa
+    DEFAULT_JSON_CODEC,
+    format_date,
+    format_datetime
+)
 from pydeform.exceptions import (
     REQUESTS_ERROR_MAP,
     STATUS_CODE_ERROR_MAP,
     HTTPError
 )
-from pydeform.six.moves.urllib.parse import quote_plus
+from pydeform.six import PY2, reraise, string_types
+from pydeform.six.moves import queue
+from pydeform.six.moves.urllib.parse import quote_plus, urlparse
+
+_ITERATION_DONE = object()
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# chars which could follow the complete value
+_JSON_VALUE_END = frozenset(' \t\n\r,:]}')
 
 
 def get_base_uri(host,
@@ -28,6 +48,35 @@ def get_base_uri(host,
     ])
 
 
+def _quote_uri_part(part):
+    return quote_plus(str(part).strip('/'))
+
+
+QUOTED_URI_PARTS_CACHE_SIZE = 1024
+try:
+    from functools import lru_cache
+except ImportError:
+    # python 2: not cached
+    _quote_uri_string = _quote_uri_part
+else:
+    _quote_uri_string = lru_cache(maxsize=QUOTED_URI_PARTS_CACHE_SIZE)(
+        _quote_uri_part
+    )
+
+
+def quote_uri_part(part):
+    """
+    Returns the URI path segment quoted.
+
+    String segments (identities, collections, etc.) are cached in the
+    LRU of `QUOTED_URI_PARTS_CACHE_SIZE` items, so the hot keys are
+    quoted once.
+    """
+    if isinstance(part, string_types):
+        return _quote_uri_string(part)
+    return _quote_uri_part(part)
+
+
 def uri_join(*parts):
     add_last_dash = str(parts[-1])[-1] == '/'
 
@@ -36,12 +85,7 @@ def uri_join(*parts):
         parts = parts[1:]
     else:
         base_bit = None
-    response = '/'.join(
-        [
-            quote_plus(str(i).strip('/'))
-            for i in parts
-        ]
-    )
+    response = '/'.join([quote_uri_part(i) for i in parts])
     if base_bit:
         if base_bit.endswith('/'):
             response = base_bit + response
@@ -55,62 +99,404 @@ def uri_join(*parts):
     return response
 
 
+def merge_request_defaults(request_kwargs, request_defaults):
+    """
+    Returns `request_kwargs` layered over `request_defaults`.
+
+    Only the top level dict is created, the values (payload, files,
+    headers, etc.) are shared with the caller and should not be changed,
+    so the merge cost does not depend on the payload size.
+    """
+    if not request_defaults:
+        return request_kwargs
+    final_request_kwargs = dict(request_defaults)
+    final_request_kwargs.update(request_kwargs)
+    return final_request_kwargs
+
+
+def get_http_error(requests_error):
+    error_class = None
+    if requests_error.response is not None:
+        error_class = STATUS_CODE_ERROR_MAP.get(
+            requests_error.response.status_code
+        )
+    error_class = (
+        error_class or
+        REQUESTS_ERROR_MAP.get(type(requests_error)) or
+        HTTPError
+    )
+    return error_class(requests_error=requests_error)
+
+
 def do_http_request(requests_session,
                     method='get',
                     request_kwargs=None,
                     request_defaults=None,
-                    ignore_error_codes=[]):
+                    ignore_error_codes=[],
+                    retry_policy=None,
+                    circuit_breaker=None,
+                    rate_limiter=None,
+                    hedger=None,
+                    compression_policy=None,
+                    json_codec=None):
     # todo: test me
     if request_kwargs is None:
         request_kwargs = {}
 
-    if request_defaults:
-        final_request_kwargs = deepcopy(request_kwargs)
-        for key, value in request_defaults.items():
-            if key not in final_request_kwargs:
-                final_request_kwargs[key] = value
-        if 'files' in request_kwargs:
-            # save file descriptors
-            final_request_kwargs['files'] = request_kwargs['files']
+    final_request_kwargs = merge_request_defaults(
+        request_kwargs,
+        request_defaults
+    )
+    if compression_policy is not None:
+        final_request_kwargs = compression_policy.prepare_request_kwargs(
+            final_request_kwargs,
+            json_codec=json_codec
+        )
     else:
-        final_request_kwargs = request_kwargs
+        final_request_kwargs = (
+            json_codec or DEFAULT_JSON_CODEC
+        ).prepare_request_kwargs(final_request_kwargs)
+
+    if retry_policy is not None:
+        retry_policy.budget.deposit()
+    if circuit_breaker is not None or rate_limiter is not None:
+        host = urlparse(final_request_kwargs['url']).netloc
 
+    def send():
+        if rate_limiter is not None:
+            rate_limiter.acquire(host)
+        return requests_session.request(method, **final_request_kwargs)
+
+    attempt = 0
+    while True:
+        if circuit_breaker is not None:
+            circuit_breaker.before_request(host)
+        try:
+            if hedger is not None:
+                response = hedger.send(send)
+            else:
+                response = send()
+            if (not response.ok and
+                    response.status_code not in ignore_error_codes):
+                response.raise_for_status()
+        except RequestException as e:
+            if circuit_breaker is not None:
+                circuit_breaker.record(host, success=not is_failure(e))
+            attempt += 1
+            delay = None
+            if retry_policy is not None and 'files' not in request_kwargs:
+                delay = retry_policy.get_retry_delay(method, e, attempt)
+            if delay is not None:
+                time.sleep(delay)
+                continue
+            raise get_http_error(e)
+        if circuit_breaker is not None:
+            circuit_breaker.record(host, success=True)
+        return response
+
+
+def iterate_in_background(iterator, buffer_size):
+    """
+    Consume `iterator` in a background thread keeping at most `buffer_size`
+    items ahead of the caller.
+
+    Closing the returned generator stops the worker and closes `iterator`.
+    """
+    buffer = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+
+    def worker():
+        try:
+            while not stop.is_set():
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                buffer.put((item, None))
+            buffer.put((_ITERATION_DONE, None))
+        except Exception:
+            buffer.put((_ITERATION_DONE, sys.exc_info()))
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close:
+                close()
+
+    thread = threading.Thread(target=worker)
+    thread.daemon = True
+    thread.start()
     try:
-        response = getattr(requests_session, method.lower())(
-            **final_request_kwargs
-        )
-        if not response.ok and response.status_code not in ignore_error_codes:
-            response.raise_for_status()
-    except RequestException as e:
-        error_class = None
-        if e.response is not None:
-            error_class = STATUS_CODE_ERROR_MAP.get(e.response.status_code)
-        error_class = (
-            error_class or REQUESTS_ERROR_MAP.get(type(e)) or HTTPError
-        )
-        raise error_class(requests_error=e)
-    return response
+        while True:
+            item, error = buffer.get()
+            if item is _ITERATION_DONE:
+                if error:
+                    reraise(*error)
+                break
+            yield item
+    finally:
+        stop.set()
+        while thread.is_alive():
+            # unblock the worker if it waits for the free buffer slot
+            try:
+                while True:
+                    buffer.get_nowait()
+            except queue.Empty:
+                pass
+            thread.join(0.01)
 
 
-def format_date(date):
-    # todo: test me
-    return format_datetime(
-        datetime.datetime.combine(date, datetime.datetime.min.time())
-    )
+def iterate_concurrently(func, iterable, workers, ordered=True, window=None):
+    """
+    Yield `func(arg)` for every `arg` of `iterable` computed by a pool
+    of `workers` threads.
+
+    At most `window` results (default is twice the `workers`) are in flight
+    or buffered at once. If `ordered` is `True` results are yielded in the
+    order of `iterable`, otherwise as soon as they are ready.
+    """
+    window = window or workers * 2
+    tasks = queue.Queue()
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def worker():
+        while True:
+            task = tasks.get()
+            if task is _ITERATION_DONE:
+                break
+            if stop.is_set():
+                continue
+            index, arg = task
+            try:
+                results.put((index, func(arg), None))
+            except Exception:
+                results.put((index, None, sys.exc_info()))
+
+    threads = []
+    for i in range(min(workers, window)):
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+
+    args = iter(iterable)
+    args_exhausted = False
+    submitted = 0
+    in_flight = 0
+    next_index = 0
+    reorder_buffer = {}
+    try:
+        while True:
+            while (not args_exhausted and
+                   in_flight + len(reorder_buffer) < window):
+                try:
+                    arg = next(args)
+                except StopIteration:
+                    args_exhausted = True
+                    break
+                tasks.put((submitted, arg))
+                submitted += 1
+                in_flight += 1
+
+            if ordered and next_index in reorder_buffer:
+                yield reorder_buffer.pop(next_index)
+                next_index += 1
+                continue
+            if not in_flight:
+                break
+
+            index, result, error = results.get()
+            in_flight -= 1
+            if error:
+                reraise(*error)
+            if ordered:
+                reorder_buffer[index] = result
+            else:
+                yield result
+    finally:
+        stop.set()
+        for thread in threads:
+            tasks.put(_ITERATION_DONE)
+        for thread in threads:
+            thread.join()
 
 
-def format_datetime(date):
+class _JSONStream(object):
+    """Incremental reader of the JSON text from the bytes chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def read(self):
+        # drop already decoded text so the buffer holds one value at most
+        self.buffer = self.buffer[self.position:]
+        self.position = 0
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self.eof = True
+            self.buffer += self.text_decoder.decode(b'', final=True)
+            return False
+        self.buffer += self.text_decoder.decode(chunk)
+        return True
+
+    def peek(self):
+        """Skip whitespaces and return the next char without consuming it"""
+        while True:
+            self.position = _JSON_WHITESPACE.match(
+                self.buffer,
+                self.position
+            ).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.read():
+                raise ValueError('Unexpected end of JSON data')
+
+    def consume(self, chars):
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(
+                'Expecting one of "%s", got "%s"' % (chars, char)
+            )
+        self.position += 1
+        return char
+
+    def decode(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(
+                    self.buffer,
+                    self.position
+                )
+                # number is incomplete until it is followed by a delimiter,
+                # e.g. "1." is decoded as 1
+                if (self.eof or (end < len(self.buffer) and
+                                 self.buffer[end] in _JSON_VALUE_END)):
+                    self.position = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            # read at least twice more than tried, so decoding of the big
+            # value is not retried on every chunk
+            required_length = 2 * (len(self.buffer) - self.position)
+            while (self.read() and
+                   len(self.buffer) - self.position < required_length):
+                pass
+
+
+def iterate_json_array_property(chunks, property_name, result):
     """
-    Convert datetime to UTC ISO 8601
+    Incrementally decode JSON object from the bytes `chunks` yielding
+    the elements of its `property_name` array as soon as they are read.
+
+    All the other properties are saved to the `result` dict.
     """
-    # todo: test me
-    if date.utcoffset() is None:
-        return date.isoformat() + 'Z'
+    stream = _JSONStream(chunks)
+    stream.consume('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.decode()
+        stream.consume(':')
+        if key == property_name and stream.peek() == '[':
+            stream.consume('[')
+            if stream.peek() == ']':
+                stream.consume(']')
+            else:
+                while True:
+                    yield stream.decode()
+                    if stream.consume(',]') == ']':
+                        break
+        else:
+            result[key] = stream.decode()
+        if stream.consume(',}') == '}':
+            break
+
+
+def write_ndjson(batches, path, compress=None, progress=None):
+    """
+    Write items of `batches` to the `path` file as newline delimited JSON.
+
+    Every batch is encoded and written at once. `compress` could be `None`
+    or `gzip`. `progress` is called with the stats after every batch.
+
+    Returns the final stats: `documents`, `bytes` (uncompressed),
+    `seconds`, `documents_per_second` and `mb_per_second`.
+    """
+    if compress == 'gzip':
+        open_file = gzip.open
+    elif compress is None:
+        open_file = open
+    else:
+        raise ValueError('Unknown compression "%s"' % compress)
+
+    encode = json.JSONEncoder(separators=(',', ':')).encode
+    stats = {
+        'documents': 0,
+        'bytes': 0,
+    }
+    started_at = time.time()
+    with open_file(path, 'wb') as dest_file:
+        for batch in batches:
+            if not batch:
+                continue
+            data = ('\n'.join(map(encode, batch)) + '\n').encode('utf-8')
+            dest_file.write(data)
+            stats['documents'] += len(batch)
+            stats['bytes'] += len(data)
+            _update_throughput_stats(stats, started_at)
+            if progress:
+                progress(dict(stats))
+    _update_throughput_stats(stats, started_at)
+    return stats
+
 
-    utc_offset_sec = date.utcoffset()
-    utc_date = date - utc_offset_sec
-    utc_date_without_offset = utc_date.replace(tzinfo=None)
-    return utc_date_without_offset.isoformat() + 'Z'
+def read_records(path):
+    """
+    Yield records of the newline delimited JSON or CSV (by `.csv`
+    extension) file. Files with `.gz` extension are decompressed.
+
+    CSV values are left as strings.
+    """
+    is_gzip = path.endswith('.gz')
+    is_csv = path[:-3 if is_gzip else None].endswith('.csv')
+    if PY2:
+        source_file = gzip.open(path, 'rb') if is_gzip else open(path, 'rb')
+    elif is_gzip:
+        source_file = gzip.open(path, 'rt', newline='', encoding='utf-8')
+    else:
+        source_file = io.open(path, 'r', newline='', encoding='utf-8')
+
+    with source_file:
+        if is_csv:
+            for record in csv.DictReader(source_file):
+                if PY2:
+                    record = dict(
+                        (key.decode('utf-8'), value.decode('utf-8'))
+                        for key, value in record.items()
+                    )
+                yield record
+        else:
+            for line in source_file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _update_throughput_stats(stats, started_at):
+    seconds = time.time() - started_at
+    stats['seconds'] = seconds
+    if seconds:
+        stats['documents_per_second'] = stats['documents'] / seconds
+        stats['mb_per_second'] = stats['bytes'] / seconds / 1024 / 1024
+    else:
+        stats['documents_per_second'] = 0
+        stats['mb_per_second'] = 0
 
 
 def flatten(data, prop_bits=None, result=None):
@@ -62,6 +62,13 @@ setup(
     install_requires=[
         'requests[security]>=2.9.1'
     ],
+    extras_require={
+        'numpy': ['numpy>=1.10'],
+        'async': ['aiohttp>=3.0'],
+        'http2': ['httpx[http2]>=0.20'],
+        'zstd': ['zstandard>=0.15'],
+        'fast-json': ['orjson>=3.0'],
+    },
     packages=get_packages('pydeform'),
     package_data=get_package_data('pydeform'),
 )
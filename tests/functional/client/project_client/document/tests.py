@@ -102,6 +102,29 @@ class ProjectClientTestBase__document(object):
             })
         )
 
+    def test_create_many(self):
+        response = getattr(
+            self,
+            self.project_client_attr
+        ).document.create_many(
+            collection='venues',
+            records=[
+                {'_id': 'subway', 'name': 'Subway'},
+                {'name': 'McDonalds'},
+            ]
+        )
+        response = sorted(response, key=lambda x: x['index'])
+        assert_that(response[0]['id'], equal_to('subway'))
+        assert_that(response[0]['created'], equal_to(True))
+        assert_that(response[1]['created'], equal_to(True))
+        assert_that(response[1]['error'], equal_to(None))
+        assert_that(
+            getattr(self, self.project_client_attr).documents.count(
+                collection='venues'
+            ),
+            equal_to(2)
+        )
+
     @skip('https://github.com/deformio/python-deform/issues/11')
     def test_get_document_with_id_containing_slash(self):
         try:
@@ -1,4 +1,10 @@
 # -*- coding: utf-8 -*-
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
 from hamcrest import (
     assert_that,
     calling,
@@ -167,6 +173,59 @@ class ProjectClientTestBase__documents(object):
                 'item %s and %s does not equal' % (i, j)
             )
 
+    def test_find_batches(self):
+        response = getattr(
+            self,
+            self.project_client_attr
+        ).documents.find_batches(
+            collection='venues',
+            sort=['_id'],
+            per_page=1
+        )
+        assert_that(
+            self.convert_generator_to_list(response),
+            equal_to([
+                [self.documents['mcdonalds']],
+                [self.documents['subway']]
+            ])
+        )
+
+    def test_find_batches__batch_size(self):
+        response = getattr(
+            self,
+            self.project_client_attr
+        ).documents.find_batches(
+            collection='venues',
+            sort=['_id'],
+            per_page=1,
+            batch_size=2
+        )
+        assert_that(
+            self.convert_generator_to_list(response),
+            equal_to([
+                [self.documents['mcdonalds'], self.documents['subway']]
+            ])
+        )
+
+    def test_export(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'venues.ndjson.gz')
+            project_client = getattr(self, self.project_client_attr)
+            response = project_client.documents.export(
+                collection='venues',
+                path=path,
+                compress='gzip'
+            )
+            assert_that(response['documents'], equal_to(2))
+            with gzip.open(path, 'rb') as export_file:
+                assert_that(
+                    [json.loads(i.decode('utf-8')) for i in export_file],
+                    contains_inanyorder(*self.documents.values())
+                )
+        finally:
+            shutil.rmtree(tmp_dir)
+
     def test_count(self):
         response = getattr(self, self.project_client_attr).documents.count(
             collection='venues'
@@ -1,16 +1,22 @@
 # -*- coding: utf-8 -*-
+import gzip
+import io
 import json
 import os
+import threading
 import unittest
 
 import requests
 
 from hamcrest import assert_that, calling, raises
 from pydeform import Client
+from pydeform.compression import gzip_compress
 from pydeform.exceptions import ConnectionError, ReadTimeout
+from pydeform.six.moves import BaseHTTPServer, socketserver
 from pydeform.utils import get_base_uri
 
 GLOBALS = {}
+json_dumps = json.dumps
 
 
 def get_setting(name, required=True):
@@ -150,3 +156,222 @@ def check_timeout(func, kwargs={}):
             calling(func).with_args(timeout=exp['timeout'], **kwargs),
             raises(exp['exception'], exp['exception_message'])
         )
+
+
+def get_header(headers, name):
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+
+
+def decode_body(body, content_encoding):
+    if content_encoding == 'gzip':
+        return gzip.GzipFile(fileobj=io.BytesIO(body)).read()
+    elif content_encoding == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    return body
+
+
+def encode_body(body, content_encoding):
+    if content_encoding == 'gzip':
+        return gzip_compress(body)
+    elif content_encoding == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor().compress(body)
+    return body
+
+
+class StubServer(object):
+    """Local HTTP server answering with the added responses.
+
+    Responses are matched by method and path, the last matched
+    response is repeated. Received requests are collected to `calls`.
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.calls = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.server = socketserver.ThreadingTCPServer(
+            ('127.0.0.1', 0),
+            self._get_handler_class()
+        )
+        self.server.daemon_threads = True
+        self.url = 'http://127.0.0.1:%s' % self.server.server_address[1]
+        self.thread = threading.Thread(
+            target=self.server.serve_forever,
+            kwargs={'poll_interval': 0.05}
+        )
+        self.thread.daemon = True
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def add(self, method, path, status=200, json=None, headers=None):
+        self.responses.append({
+            'method': method.upper(),
+            'path': path,
+            'status': status,
+            'body': b'' if json is None else json_dumps(json).encode(),
+            'headers': headers or {},
+        })
+
+    def handle(self, method, path, headers, body, http_version):
+        """Records the request and returns the response to send.
+
+        Compressed request bodies are recorded decoded. Response body
+        is compressed if the response has `Content-Encoding` header.
+        """
+        path, _, query = path.partition('?')
+        body = decode_body(body, get_header(headers, 'Content-Encoding'))
+        with self.lock:
+            self.calls.append({
+                'method': method,
+                'path': path,
+                'query': query,
+                'headers': headers,
+                'body': body,
+                'http_version': http_version,
+            })
+        response = self._get_response(method, path)
+        headers = dict(
+            {'Content-Type': 'application/json'},
+            **response['headers']
+        )
+        body = encode_body(
+            response['body'],
+            get_header(headers, 'Content-Encoding')
+        )
+        headers['Content-Length'] = str(len(body))
+        return dict(response, headers=headers, body=body)
+
+    def _get_response(self, method, path):
+        with self.lock:
+            matched = [
+                i for i in self.responses
+                if i['method'] == method and i['path'] == path
+            ]
+            if not matched:
+                return {'status': 404, 'body': b'{}', 'headers': {}}
+            if len(matched) > 1:
+                self.responses.remove(matched[0])
+            return matched[0]
+
+    def _get_handler_class(self):
+        stub_server = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+                stub_server.connections += 1
+
+            def handle_request(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                response = stub_server.handle(
+                    method=self.command,
+                    path=self.path,
+                    headers=dict(self.headers.items()),
+                    body=self.rfile.read(length) if length else b'',
+                    http_version='HTTP/1.1'
+                )
+                self.send_response(response['status'])
+                for key, value in response['headers'].items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(response['body'])
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_request
+
+        return Handler
+
+
+class H2CStubServer(StubServer):
+    """Same as `StubServer` but speaks cleartext HTTP/2 (h2c) only."""
+
+    def _get_handler_class(self):
+        import h2.config
+        import h2.connection
+        import h2.events
+
+        stub_server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                with stub_server.lock:
+                    stub_server.connections += 1
+                connection = h2.connection.H2Connection(
+                    config=h2.config.H2Configuration(
+                        client_side=False,
+                        header_encoding='utf-8'
+                    )
+                )
+                connection.initiate_connection()
+                self.request.sendall(connection.data_to_send())
+                streams = {}
+                while True:
+                    data = self.request.recv(65535)
+                    if not data:
+                        break
+                    for event in connection.receive_data(data):
+                        if isinstance(event, h2.events.RequestReceived):
+                            streams[event.stream_id] = {
+                                'headers': dict(event.headers),
+                                'body': b'',
+                            }
+                        elif isinstance(event, h2.events.DataReceived):
+                            streams[event.stream_id]['body'] += event.data
+                            connection.acknowledge_received_data(
+                                event.flow_controlled_length,
+                                event.stream_id
+                            )
+                        elif isinstance(event, h2.events.StreamEnded):
+                            self.respond(
+                                connection,
+                                event.stream_id,
+                                streams.pop(event.stream_id)
+                            )
+                        elif isinstance(
+                            event,
+                            h2.events.ConnectionTerminated
+                        ):
+                            return
+                    self.request.sendall(connection.data_to_send())
+
+            def respond(self, connection, stream_id, stream):
+                headers = stream['headers']
+                response = stub_server.handle(
+                    method=headers[':method'],
+                    path=headers[':path'],
+                    headers=dict(
+                        (key, value) for key, value in headers.items()
+                        if not key.startswith(':')
+                    ),
+                    body=stream['body'],
+                    http_version='HTTP/2'
+                )
+                connection.send_headers(
+                    stream_id,
+                    [(':status', str(response['status']))] + [
+                        (key.lower(), value)
+                        for key, value in response['headers'].items()
+                    ]
+                )
+                connection.send_data(
+                    stream_id,
+                    response['body'],
+                    end_stream=True
+                )
+
+        return Handler
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+from hamcrest import (
+    assert_that,
+    calling,
+    equal_to,
+    has_entries,
+    instance_of,
+    raises
+)
+from pydeform.compression import CompressionPolicy
+from pydeform.exceptions import NotFoundError
+from pydeform.retry import RetryBudget, RetryPolicy
+from testutils import StubServer, TestCase
+
+try:
+    import asyncio
+    from pydeform.aio import AsyncClient
+    from pydeform.aio.client import AsyncProjectClient
+except (ImportError, SyntaxError):
+    AsyncClient = None
+
+
+def collect(async_iterator):
+    """Consumes async iterator without async syntax (python 2 parsable)."""
+    response = []
+    while True:
+        try:
+            response.append(run(async_iterator.__anext__()))
+        except StopAsyncIteration:  # noqa
+            return response
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+@unittest.skipIf(AsyncClient is None, 'asyncio and aiohttp are required')
+class AsyncClientTest(TestCase):
+    def setUp(self):
+        super(AsyncClientTest, self).setUp()
+        self.server = StubServer().start()
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        self.client = self.get_client()
+        self.project_client = self.get_project_client()
+        self.documents_path = '/api/collections/users/documents/'
+
+    def tearDown(self):
+        run(self.client.close())
+        asyncio.get_event_loop().close()
+        self.server.stop()
+        super(AsyncClientTest, self).tearDown()
+
+    def get_client(self, **kwargs):
+        async_client = []
+
+        def create():
+            # aiohttp session should be created inside the event loop
+            async_client.append(AsyncClient(host='deform.io', **kwargs))
+
+        asyncio.get_event_loop().call_soon(create)
+        run(asyncio.sleep(0))
+        return async_client[0]
+
+    def get_project_client(self):
+        # project subdomains of the local server could not be resolved
+        return AsyncProjectClient(
+            base_uri=self.server.url + '/api/',
+            auth_header='Token token',
+            **self.client.http_kwargs
+        )
+
+    def test_resource_tree(self):
+        project_client = self.client.auth('token', 'token', 'project')
+        assert_that(project_client, instance_of(AsyncProjectClient))
+        for name in ['info', 'collections', 'collection', 'documents',
+                     'document']:
+            assert_that(hasattr(project_client, name), equal_to(True))
+        assert_that(
+            hasattr(project_client.documents, 'export'),
+            equal_to(False)
+        )
+        session_client = self.client.auth('session', 'session')
+        for name in ['user', 'projects', 'project']:
+            assert_that(hasattr(session_client, name), equal_to(True))
+        assert_that(
+            session_client.use_project('project'),
+            instance_of(AsyncProjectClient)
+        )
+
+    def test_get(self):
+        self.server.add(
+            'GET',
+            self.documents_path + 'gena/',
+            json={'_id': 'gena', 'name': 'Gena'}
+        )
+        response = run(self.project_client.document.get(
+            collection='users',
+            identity='gena'
+        ))
+        assert_that(response, equal_to({'_id': 'gena', 'name': 'Gena'}))
+        assert_that(
+            self.server.calls[0]['headers'],
+            has_entries({'Authorization': 'Token token'})
+        )
+
+    def test_not_found(self):
+        self.server.add(
+            'GET',
+            self.documents_path + 'gena/',
+            status=404,
+            json={'message': 'Not found'}
+        )
+        assert_that(
+            calling(run).with_args(self.project_client.document.get(
+                collection='users',
+                identity='gena'
+            )),
+            raises(NotFoundError, 'Not found')
+        )
+
+    def test_save(self):
+        self.server.add(
+            'PUT',
+            self.documents_path + 'gena/',
+            status=201,
+            json={'_id': 'gena'}
+        )
+        response = run(self.project_client.document.save(
+            collection='users',
+            identity='gena',
+            data={'name': 'Gena'}
+        ))
+        assert_that(
+            response,
+            equal_to({'created': True, 'result': {'_id': 'gena'}})
+        )
+        assert_that(
+            json.loads(self.server.calls[0]['body'].decode()),
+            equal_to({'name': 'Gena'})
+        )
+
+    def test_find(self):
+        self.server.add(
+            'POST',
+            self.documents_path,
+            json={'items': [{'_id': 1}, {'_id': 2}], 'links': {'next': 'x'}}
+        )
+        self.server.add(
+            'POST',
+            self.documents_path,
+            json={'items': [{'_id': 3}], 'links': {}}
+        )
+        items = collect(self.project_client.documents.find(
+            collection='users',
+            filter={'age': 27}
+        ))
+        assert_that(items, equal_to([{'_id': 1}, {'_id': 2}, {'_id': 3}]))
+        assert_that(
+            [i['query'] for i in self.server.calls],
+            equal_to(['page=1', 'page=2'])
+        )
+        assert_that(
+            self.server.calls[0]['headers'],
+            has_entries({'X-Action': 'find'})
+        )
+
+    def test_find_batches(self):
+        self.server.add(
+            'POST',
+            self.documents_path,
+            json={'items': [{'_id': 1}, {'_id': 2}, {'_id': 3}], 'links': {}}
+        )
+        batches = collect(self.project_client.documents.find_batches(
+            collection='users',
+            batch_size=2
+        ))
+        assert_that(
+            batches,
+            equal_to([[{'_id': 1}, {'_id': 2}], [{'_id': 3}]])
+        )
+
+    def test_count(self):
+        self.server.add(
+            'POST',
+            self.documents_path,
+            json={'items': [{'_id': 1}], 'total': 10}
+        )
+        assert_that(
+            run(self.project_client.documents.count(collection='users')),
+            equal_to(10)
+        )
+
+    def test_unsupported_iteration_options(self):
+        assert_that(
+            calling(self.project_client.documents.find).with_args(
+                collection='users',
+                workers=4
+            ),
+            raises(ValueError, '^workers is not supported by AsyncClient$')
+        )
+
+    def test_create_many(self):
+        self.server.add(
+            'POST',
+            self.documents_path,
+            status=201,
+            json={'_id': 'created'}
+        )
+        self.server.add(
+            'PUT',
+            self.documents_path + 'gena/',
+            status=200,
+            json={'_id': 'gena'}
+        )
+        results = collect(self.project_client.document.create_many(
+            collection='users',
+            records=[{'name': 'a'}, {'_id': 'gena'}],
+            workers=2
+        ))
+        assert_that(
+            sorted(results, key=lambda x: x['index']),
+            equal_to([
+                {'index': 0, 'id': 'created', 'created': True, 'error': None},
+                {'index': 1, 'id': 'gena', 'created': False, 'error': None},
+            ])
+        )
+
+    def test_retry(self):
+        run(self.client.close())
+        self.client = self.get_client(
+            retry_policy=RetryPolicy(
+                backoff_factor=0,
+                budget=RetryBudget(min_per_second=0)
+            )
+        )
+        project_client = self.get_project_client()
+        self.server.add('GET', self.documents_path + 'gena/', status=503)
+        self.server.add(
+            'GET',
+            self.documents_path + 'gena/',
+            json={'_id': 'gena'}
+        )
+        response = run(project_client.document.get(
+            collection='users',
+            identity='gena'
+        ))
+        assert_that(response, equal_to({'_id': 'gena'}))
+        assert_that(len(self.server.calls), equal_to(2))
+
+    def test_compression(self):
+        run(self.client.close())
+        self.client = self.get_client(
+            compression_policy=CompressionPolicy(min_size=10)
+        )
+        project_client = self.get_project_client()
+        self.server.add(
+            'PUT',
+            self.documents_path + 'gena/',
+            json={'_id': 'gena'},
+            headers={'Content-Encoding': 'gzip'}
+        )
+        response = run(project_client.document.save(
+            collection='users',
+            identity='gena',
+            data={'name': 'Gena'}
+        ))
+        assert_that(response['result'], equal_to({'_id': 'gena'}))
+        assert_that(
+            self.server.calls[0]['headers'],
+            has_entries({'Content-Encoding': 'gzip'})
+        )
+        assert_that(
+            json.loads(self.server.calls[0]['body'].decode()),
+            equal_to({'name': 'Gena'})
+        )
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import mock
+import responses
+
+from hamcrest import assert_that, calling, equal_to, raises
+from pydeform.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from pydeform.exceptions import CircuitOpenError, HTTPError, NotFoundError
+from pydeform.utils import do_http_request
+from testutils import TestCase
+
+
+class CircuitBreakerTest(TestCase):
+    def setUp(self):
+        super(CircuitBreakerTest, self).setUp()
+        self.time_patcher = mock.patch('pydeform.breaker.time.time')
+        self.time = self.time_patcher.start()
+        self.time.return_value = 100
+
+    def tearDown(self):
+        self.time_patcher.stop()
+        super(CircuitBreakerTest, self).tearDown()
+
+    def test_should_open_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, error_rate=None)
+        for i in range(2):
+            breaker.record('a.deform.io', success=False)
+        assert_that(breaker.get_state('a.deform.io'), equal_to(CLOSED))
+        breaker.record('a.deform.io', success=False)
+        assert_that(breaker.get_state('a.deform.io'), equal_to(OPEN))
+        assert_that(
+            calling(breaker.before_request).with_args('a.deform.io'),
+            raises(CircuitOpenError, '^Circuit breaker is open for a')
+        )
+        # other hosts are not affected
+        breaker.before_request('b.deform.io')
+
+    def test_should_open_by_error_rate(self):
+        breaker = CircuitBreaker(
+            failure_threshold=100,
+            error_rate=0.5,
+            window_size=4
+        )
+        for success in [False, True, True]:
+            breaker.record('deform.io', success=success)
+        assert_that(breaker.get_state('deform.io'), equal_to(CLOSED))
+        breaker.record('deform.io', success=False)
+        assert_that(breaker.get_state('deform.io'), equal_to(OPEN))
+
+    def test_half_open(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        breaker.record('deform.io', success=False)
+        self.time.return_value = 111
+        breaker.before_request('deform.io')
+        assert_that(breaker.get_state('deform.io'), equal_to(HALF_OPEN))
+        # only one probe at a time
+        assert_that(
+            calling(breaker.before_request).with_args('deform.io'),
+            raises(CircuitOpenError)
+        )
+        breaker.record('deform.io', success=False)
+        assert_that(breaker.get_state('deform.io'), equal_to(OPEN))
+
+        self.time.return_value = 122
+        breaker.before_request('deform.io')
+        breaker.record('deform.io', success=True)
+        assert_that(breaker.get_state('deform.io'), equal_to(CLOSED))
+        breaker.before_request('deform.io')
+
+
+class CircuitBreakerTest__do_http_request(TestCase):
+    def request(self, url, circuit_breaker):
+        return do_http_request(
+            method='GET',
+            request_kwargs={'url': url},
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults,
+            circuit_breaker=circuit_breaker
+        )
+
+    @responses.activate
+    def test_me(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        failing_url = 'http://a.chib.me/users/'
+        not_found_url = 'http://b.chib.me/users/'
+        responses.add('GET', failing_url, status=500, json={})
+        responses.add('GET', not_found_url, status=404, json={})
+
+        for i in range(2):
+            assert_that(
+                calling(self.request).with_args(failing_url, breaker),
+                raises(HTTPError)
+            )
+            assert_that(
+                calling(self.request).with_args(not_found_url, breaker),
+                raises(NotFoundError)
+            )
+        assert_that(
+            calling(self.request).with_args(failing_url, breaker),
+            raises(CircuitOpenError)
+        )
+        assert_that(len(responses.calls), equal_to(4))
+        assert_that(breaker.get_state('b.chib.me'), equal_to(CLOSED))
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from hamcrest import assert_that, calling, equal_to, instance_of, raises
+from pydeform.buffer import WriteBuffer, merge_update_data
+from pydeform.exceptions import DeformException
+from testutils import TestCase
+
+
+class FakeDocumentResource(object):
+    def __init__(self, fail_identity=None, error_class=DeformException):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.called = threading.Event()
+        self.fail_identity = fail_identity
+        self.error_class = error_class
+
+    def _call(self, method, params):
+        with self.lock:
+            self.calls.append((method, params))
+        self.called.set()
+        if params.get('identity') == self.fail_identity:
+            raise self.error_class()
+
+    def save(self, **params):
+        self._call('save', params)
+
+    def update(self, **params):
+        self._call('update', params)
+
+
+class WriteBufferTest(TestCase):
+    def setUp(self):
+        super(WriteBufferTest, self).setUp()
+        self.document_resource = FakeDocumentResource(fail_identity='bad')
+
+    def get_buffer(self, **kwargs):
+        kwargs.setdefault('flush_interval', 60)
+        return WriteBuffer(document_resource=self.document_resource, **kwargs)
+
+    def test_should_flush_on_close(self):
+        with self.get_buffer() as buffer:
+            buffer.save(collection='events', data={'type': 'click'})
+            buffer.update(collection='users', identity='gena', data={'a': 1})
+            assert_that(self.document_resource.calls, equal_to([]))
+        assert_that(
+            sorted(self.document_resource.calls, key=lambda x: x[0]),
+            equal_to([
+                ('save', {'collection': 'events', 'data': {'type': 'click'}}),
+                ('update', {
+                    'collection': 'users',
+                    'identity': 'gena',
+                    'data': {'a': 1}
+                }),
+            ])
+        )
+
+    def test_should_flush_by_size(self):
+        buffer = self.get_buffer(max_size=2)
+        buffer.save(collection='events', data={'type': 'click'})
+        buffer.save(collection='events', data={'type': 'scroll'})
+        assert_that(self.document_resource.called.wait(5), equal_to(True))
+        buffer.close()
+
+    def test_should_flush_by_interval(self):
+        buffer = self.get_buffer(flush_interval=0.01)
+        buffer.save(collection='events', data={'type': 'click'})
+        assert_that(self.document_resource.called.wait(5), equal_to(True))
+        buffer.close()
+
+    def test_should_keep_order_of_document_writes(self):
+        with self.get_buffer(workers=4) as buffer:
+            for i in range(20):
+                buffer.update(
+                    collection='users',
+                    identity='gena',
+                    data={'value': i}
+                )
+        assert_that(
+            [i[1]['data']['value'] for i in self.document_resource.calls],
+            equal_to(list(range(20)))
+        )
+
+    def test_errors(self):
+        errors = []
+        with self.get_buffer(
+            on_error=lambda operation, error: errors.append((operation, error))
+        ) as buffer:
+            buffer.update(collection='users', identity='bad', data={})
+            buffer.update(collection='users', identity='gena', data={})
+        assert_that(len(errors), equal_to(1))
+        assert_that(errors[0][0]['params']['identity'], equal_to('bad'))
+        assert_that(errors[0][1], instance_of(DeformException))
+        assert_that(len(self.document_resource.calls), equal_to(2))
+
+        with self.get_buffer() as buffer:
+            buffer.update(collection='users', identity='bad', data={})
+        assert_that(len(buffer.errors), equal_to(1))
+
+    def test_unexpected_errors(self):
+        self.document_resource = FakeDocumentResource(
+            fail_identity='bad',
+            error_class=TypeError
+        )
+        errors = []
+        buffer = self.get_buffer(
+            max_size=1,
+            max_pending=1,
+            on_error=lambda operation, error: errors.append((operation, error))
+        )
+        for identity in ['bad', 'gena', 'bad', 'vova']:
+            buffer.update(collection='users', identity=identity, data={})
+        buffer.close()
+        assert_that(
+            [i[1]['identity'] for i in self.document_resource.calls],
+            equal_to(['bad', 'gena', 'bad', 'vova'])
+        )
+        assert_that(len(errors), equal_to(2))
+        assert_that(errors[0][1], instance_of(TypeError))
+
+    def test_on_error_errors(self):
+        def on_error(operation, error):
+            raise ValueError()
+
+        with self.get_buffer(on_error=on_error) as buffer:
+            buffer.update(collection='users', identity='bad', data={})
+            buffer.update(collection='users', identity='gena', data={})
+        assert_that(len(self.document_resource.calls), equal_to(2))
+        assert_that(len(buffer.errors), equal_to(1))
+        assert_that(buffer.errors[0][1], instance_of(ValueError))
+
+    def test_should_raise_error_if_closed(self):
+        buffer = self.get_buffer()
+        buffer.close()
+        assert_that(
+            calling(buffer.save).with_args(collection='users', data={}),
+            raises(ValueError, '^Write buffer is closed$')
+        )
+
+    def test_coalesce(self):
+        with self.get_buffer(coalesce=True) as buffer:
+            buffer.update(
+                collection='counters',
+                identity='clicks',
+                data={'status': 'new', '$inc': {'value': 1}}
+            )
+            buffer.update(
+                collection='counters',
+                identity='clicks',
+                data={'status': 'active', '$inc': {'value': 2}}
+            )
+            buffer.update(
+                collection='counters',
+                identity='views',
+                data={'$inc': {'value': 1}}
+            )
+            buffer.save(
+                collection='counters',
+                identity='clicks',
+                data={'value': 0}
+            )
+            buffer.update(
+                collection='counters',
+                identity='clicks',
+                data={'$inc': {'value': 5}}
+            )
+        calls = [
+            i for i in self.document_resource.calls
+            if i[1]['identity'] == 'clicks'
+        ]
+        assert_that(
+            [(i[0], i[1]['data']) for i in calls],
+            equal_to([
+                ('update', {'status': 'active', '$inc': {'value': 3}}),
+                ('save', {'value': 0}),
+                ('update', {'$inc': {'value': 5}}),
+            ])
+        )
+        assert_that(len(self.document_resource.calls), equal_to(4))
+
+
+class Test__merge_update_data(TestCase):
+    def test_later_values_win(self):
+        assert_that(
+            merge_update_data(
+                {'a': 1, 'b': 2, '$set': {'c': 3}},
+                {'a': 10, '$set': {'c': 30, 'd': 40}}
+            ),
+            equal_to({'a': 10, 'b': 2, '$set': {'c': 30, 'd': 40}})
+        )
+
+    def test_increments_are_summed(self):
+        assert_that(
+            merge_update_data(
+                {'$inc': {'a': 1, 'b': 1}},
+                {'$inc': {'a': 2.5, 'c': 1}}
+            ),
+            equal_to({'$inc': {'a': 3.5, 'b': 1, 'c': 1}})
+        )
+
+    def test_could_not_merge(self):
+        experiments = [
+            ({'$push': {'a': 1}}, {'b': 1}),
+            ({'a': 1}, {'$inc': {'a': 1}}),
+            ({'$inc': {'a': 1}}, {'a.b': 1}),
+            ({'a': 1}, {'$set': {'a': 2}}),
+            ({'a': {'b': 1}}, {'a.c': 2}),
+            ({'$inc': {'a': 'one'}}, {}),
+            ([1], {}),
+        ]
+        for previous, current in experiments:
+            assert_that(merge_update_data(previous, current), equal_to(None))
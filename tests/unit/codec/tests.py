@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import datetime
+import json
+import sys
+import unittest
+
+import mock
+
+from hamcrest import (
+    assert_that,
+    calling,
+    equal_to,
+    has_entries,
+    instance_of,
+    raises
+)
+from pydeform.client import ProjectClient
+from pydeform.codec import (
+    JSONCodec,
+    OrjsonCodec,
+    format_date,
+    get_fast_json_codec
+)
+from testutils import StubServer, TestCase
+
+try:
+    import orjson  # noqa
+except ImportError:
+    orjson = None
+
+
+class JSONCodecTest(TestCase):
+    def test_dumps_and_loads(self):
+        codec = JSONCodec()
+        data = codec.dumps({'name': u'Гена'})
+        assert_that(data, instance_of(bytes))
+        assert_that(codec.loads(data), equal_to({'name': u'Гена'}))
+
+    def test_dates(self):
+        date = datetime.date(1990, 3, 2)
+        data = JSONCodec().dumps({
+            'date': date,
+            'datetime': datetime.datetime(1990, 3, 2, 10, 9, 8),
+        })
+        assert_that(
+            json.loads(data.decode()),
+            equal_to({
+                'date': format_date(date),
+                'datetime': '1990-03-02T10:09:08Z',
+            })
+        )
+
+    def test_should_not_allow_nan(self):
+        for value in [float('nan'), float('inf'), float('-inf')]:
+            assert_that(
+                calling(JSONCodec().dumps).with_args({'value': value}),
+                raises(ValueError)
+            )
+
+    def test_prepare_request_kwargs(self):
+        request_kwargs = {
+            'url': 'http://chib.me/',
+            'json': {'age': 27},
+            'headers': {'X-Action': 'find'},
+        }
+        assert_that(
+            JSONCodec().prepare_request_kwargs(request_kwargs),
+            equal_to({
+                'url': 'http://chib.me/',
+                'data': b'{"age": 27}',
+                'headers': {
+                    'X-Action': 'find',
+                    'Content-Type': 'application/json',
+                },
+            })
+        )
+        assert_that(request_kwargs, has_entries({'json': {'age': 27}}))
+
+
+@unittest.skipIf(orjson is None, 'orjson is required')
+class OrjsonCodecTest(TestCase):
+    def setUp(self):
+        super(OrjsonCodecTest, self).setUp()
+        self.server = StubServer().start()
+        self.project_client = ProjectClient(
+            base_uri=self.server.url + '/api/',
+            auth_header='Token token',
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults,
+            json_codec=OrjsonCodec()
+        )
+        self.documents_path = '/api/collections/users/documents/'
+
+    def tearDown(self):
+        self.server.stop()
+        super(OrjsonCodecTest, self).tearDown()
+
+    def test_dumps(self):
+        assert_that(
+            OrjsonCodec().dumps({
+                'created': datetime.datetime(2016, 1, 2, 3, 4, 5),
+                1: 'one',
+            }),
+            equal_to(b'{"created":"2016-01-02T03:04:05Z","1":"one"}')
+        )
+
+    def test_get_fast_json_codec(self):
+        assert_that(get_fast_json_codec(), instance_of(OrjsonCodec))
+        with mock.patch.dict(sys.modules, {'orjson': None}):
+            assert_that(get_fast_json_codec(), instance_of(JSONCodec))
+
+    def test_find(self):
+        self.server.add(
+            'POST',
+            self.documents_path,
+            json={'items': [{'_id': 1}, {'_id': 2}], 'links': {}}
+        )
+        items = list(self.project_client.documents.find(
+            collection='users',
+            filter={'age': 27}
+        ))
+        assert_that(items, equal_to([{'_id': 1}, {'_id': 2}]))
+        assert_that(
+            self.server.calls[0]['body'],
+            equal_to(b'{"filter":{"age":27}}')
+        )
+        assert_that(
+            self.server.calls[0]['headers'],
+            has_entries({'Content-Type': 'application/json'})
+        )
+
+    def test_get(self):
+        self.server.add(
+            'GET',
+            self.documents_path + 'gena/',
+            json={'_id': 'gena'}
+        )
+        assert_that(
+            self.project_client.document.get(
+                collection='users',
+                identity='gena'
+            ),
+            equal_to({'_id': 'gena'})
+        )
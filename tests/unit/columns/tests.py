@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import numpy
+import responses
+from hamcrest import assert_that, equal_to
+from pydeform.columns import build_columns
+from pydeform.resources.utils import iterate_by_pagination
+from testutils import TestCase
+
+
+class Test__build_columns(TestCase):
+    def test_dtypes(self):
+        items = [
+            {
+                'count': 1,
+                'rating': 1.5,
+                'active': True,
+                'name': 'gena',
+                'created': '2016-01-02T10:09:08.123Z',
+                'tags': ['a'],
+            },
+            {
+                'count': 2,
+                'rating': 2.5,
+                'active': False,
+                'name': 'vova',
+                'created': '2016-01-03T10:09:08Z',
+                'tags': ['b'],
+            },
+        ]
+        response = build_columns(
+            items,
+            fields=['count', 'rating', 'active', 'name', 'created', 'tags']
+        )
+        assert_that(response['count'].dtype, equal_to(numpy.int64))
+        assert_that(response['rating'].dtype, equal_to(numpy.float64))
+        assert_that(response['active'].dtype, equal_to(numpy.bool_))
+        assert_that(response['name'].dtype.kind, equal_to('U'))
+        assert_that(
+            response['created'].dtype,
+            equal_to(numpy.dtype('datetime64[ms]'))
+        )
+        assert_that(response['tags'].dtype, equal_to(numpy.object_))
+        assert_that(response['count'].tolist(), equal_to([1, 2]))
+        assert_that(response['name'].tolist(), equal_to(['gena', 'vova']))
+        assert_that(
+            response['created'][0],
+            equal_to(numpy.datetime64('2016-01-02T10:09:08.123'))
+        )
+
+    def test_missing_values_are_masked(self):
+        items = [
+            {'count': 1},
+            {'count': None},
+            {},
+            {'count': 4},
+        ]
+        response = build_columns(items, fields=['count', 'name'])
+        assert_that(response['count'].dtype, equal_to(numpy.int64))
+        assert_that(
+            response['count'].mask.tolist(),
+            equal_to([False, True, True, False])
+        )
+        assert_that(response['count'].tolist(), equal_to([1, None, None, 4]))
+        assert_that(response['name'].mask.tolist(), equal_to([True] * 4))
+
+    def test_mixed_values(self):
+        response = build_columns(
+            [{'value': 1}, {'value': 1.5}, {'value': None}],
+            fields=['value']
+        )
+        assert_that(response['value'].dtype, equal_to(numpy.float64))
+        assert_that(response['value'].tolist(), equal_to([1.0, 1.5, None]))
+
+        response = build_columns(
+            [{'value': 1}, {'value': 'hello'}],
+            fields=['value']
+        )
+        assert_that(response['value'].dtype, equal_to(numpy.object_))
+        assert_that(response['value'].tolist(), equal_to([1, 'hello']))
+
+    def test_invalid_datetimes_are_strings(self):
+        response = build_columns(
+            [{'value': '2016-13-45'}, {'value': '2016-01-02'}],
+            fields=['value']
+        )
+        assert_that(response['value'].dtype.kind, equal_to('U'))
+        assert_that(
+            response['value'].tolist(),
+            equal_to(['2016-13-45', '2016-01-02'])
+        )
+
+    def test_datetimes_mixed_with_strings_are_not_changed(self):
+        values = ['2016-01-01', '2016-01-02T10:00:00Z', None, 'hello']
+        response = build_columns(
+            [{'value': value} for value in values],
+            fields=['value']
+        )
+        assert_that(response['value'].dtype.kind, equal_to('U'))
+        assert_that(response['value'].tolist(), equal_to(values))
+
+        response = build_columns(
+            [{'value': '2016-01-01T10:00'}, {'value': 1}],
+            fields=['value']
+        )
+        assert_that(response['value'].dtype, equal_to(numpy.object_))
+        assert_that(
+            response['value'].tolist(),
+            equal_to(['2016-01-01T10:00', 1])
+        )
+
+    def test_big_integers(self):
+        response = build_columns(
+            [{'value': 2 ** 63}, {'value': -2 ** 63 - 1}],
+            fields=['value']
+        )
+        assert_that(response['value'].dtype, equal_to(numpy.object_))
+        assert_that(
+            response['value'].tolist(),
+            equal_to([2 ** 63, -2 ** 63 - 1])
+        )
+
+        response = build_columns(
+            [{'value': 2 ** 63 - 1}, {'value': 2 ** 63}],
+            fields=['value']
+        )
+        assert_that(response['value'].dtype, equal_to(numpy.object_))
+        assert_that(
+            response['value'].tolist(),
+            equal_to([2 ** 63 - 1, 2 ** 63])
+        )
+
+    def test_nested_fields(self):
+        response = build_columns(
+            [{'address': {'city': 'Moscow'}}, {'address': None}],
+            fields=['address.city']
+        )
+        assert_that(
+            response['address.city'].tolist(),
+            equal_to(['Moscow', None])
+        )
+
+    def test_should_grow(self):
+        items = [{'count': i} for i in range(3000)]
+        response = build_columns(items, fields=['count'], size=10)
+        assert_that(response['count'].tolist(), equal_to(list(range(3000))))
+
+
+class Test__PaginationIterator__to_columns(TestCase):
+    @responses.activate
+    def test_me(self):
+        url = 'http://chib.me/users/'
+        responses.add(
+            'GET',
+            url,
+            json={
+                'links': {},
+                'total': 2,
+                'items': [{'age': 26}, {'age': 27}]
+            }
+        )
+        response = iterate_by_pagination(
+            method='GET',
+            request_kwargs={'url': url},
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults
+        ).to_columns(fields=['age'])
+        assert_that(response['age'].tolist(), equal_to([26, 27]))
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+import gzip
+import io
+import json
+import unittest
+
+from hamcrest import (
+    assert_that,
+    calling,
+    contains_string,
+    equal_to,
+    has_entries,
+    has_key,
+    is_not,
+    less_than,
+    raises
+)
+from pydeform.client import ProjectClient
+from pydeform.compression import CompressionPolicy
+from pydeform.transport import Urllib3Transport
+from testutils import StubServer, TestCase
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class CompressionPolicyTest(TestCase):
+    def test_should_not_compress_small_bodies(self):
+        policy = CompressionPolicy(min_size=100)
+        request_kwargs = policy.prepare_request_kwargs({
+            'url': 'http://chib.me/',
+            'json': {'name': 'gena'},
+            'headers': {'X-Action': 'find'},
+        })
+        assert_that(
+            request_kwargs,
+            equal_to({
+                'url': 'http://chib.me/',
+                'data': b'{"name": "gena"}',
+                'headers': {
+                    'X-Action': 'find',
+                    'Content-Type': 'application/json',
+                },
+            })
+        )
+
+    def test_should_compress_large_bodies(self):
+        policy = CompressionPolicy(min_size=100)
+        payload = {'name': 'gena' * 100}
+        request_kwargs = policy.prepare_request_kwargs({'json': payload})
+        assert_that(
+            request_kwargs['headers'],
+            has_entries({'Content-Encoding': 'gzip'})
+        )
+        body = gzip.GzipFile(fileobj=io.BytesIO(request_kwargs['data']))
+        assert_that(json.loads(body.read().decode()), equal_to(payload))
+
+    def test_should_not_change_multipart_requests(self):
+        request_kwargs = {'json': None, 'files': {'name': (None, 'gena')}}
+        assert_that(
+            CompressionPolicy(min_size=0).prepare_request_kwargs(
+                request_kwargs
+            ),
+            equal_to(request_kwargs)
+        )
+
+    def test_unknown_algorithm(self):
+        assert_that(
+            calling(CompressionPolicy).with_args(algorithm='lzma'),
+            raises(ValueError, 'Unknown compression "lzma"')
+        )
+
+
+class CompressionRoundTripTest(TestCase):
+    def setUp(self):
+        super(CompressionRoundTripTest, self).setUp()
+        self.server = StubServer().start()
+        self.document_path = '/api/collections/users/documents/gena/'
+        self.data = {'_id': 'gena', 'bio': 'developer ' * 200}
+
+    def tearDown(self):
+        self.server.stop()
+        super(CompressionRoundTripTest, self).tearDown()
+
+    def get_project_client(self, requests_session, compression_policy):
+        return ProjectClient(
+            base_uri=self.server.url + '/api/',
+            auth_header='Token token',
+            requests_session=requests_session,
+            request_defaults=self.request_defaults,
+            compression_policy=compression_policy
+        )
+
+    def save(self, project_client):
+        self.server.add(
+            'PUT',
+            self.document_path,
+            json=self.data,
+            headers={'Content-Encoding': 'gzip'}
+        )
+        response = project_client.document.save(
+            collection='users',
+            identity='gena',
+            data=self.data
+        )
+        assert_that(response['result'], equal_to(self.data))
+        call = self.server.calls[0]
+        assert_that(json.loads(call['body'].decode()), equal_to(self.data))
+        return call
+
+    def test_requests_session(self):
+        call = self.save(self.get_project_client(
+            self.requests_session,
+            CompressionPolicy()
+        ))
+        assert_that(
+            call['headers'],
+            has_entries({
+                'Content-Encoding': 'gzip',
+                'Content-Type': 'application/json',
+            })
+        )
+        assert_that(
+            int(call['headers']['Content-Length']),
+            less_than(len(call['body']))
+        )
+
+    def test_urllib3_transport(self):
+        transport = Urllib3Transport()
+        call = self.save(self.get_project_client(
+            transport,
+            CompressionPolicy()
+        ))
+        transport.close()
+        assert_that(
+            call['headers'],
+            has_entries({
+                'Content-Encoding': 'gzip',
+                'Accept-Encoding': contains_string('gzip'),
+            })
+        )
+
+    def test_without_policy(self):
+        call = self.save(self.get_project_client(self.requests_session, None))
+        assert_that(call['headers'], is_not(has_key('Content-Encoding')))
+
+    @unittest.skipIf(zstandard is None, 'zstandard is required')
+    def test_zstd(self):
+        call = self.save(self.get_project_client(
+            self.requests_session,
+            CompressionPolicy(algorithm='zstd')
+        ))
+        assert_that(
+            call['headers'],
+            has_entries({'Content-Encoding': 'zstd'})
+        )
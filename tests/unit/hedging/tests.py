@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from hamcrest import assert_that, calling, equal_to, instance_of, none, raises
+from pydeform import Client
+from pydeform.hedging import Hedger, HedgingPolicy
+from testutils import TestCase
+
+
+class FakeResponse(object):
+    def __init__(self, name):
+        self.name = name
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+class SlowFirstCall(object):
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+        self.responses = []
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        response = FakeResponse(call)
+        self.responses.append(response)
+        if call == 1:
+            self.release.wait(5)
+        return response
+
+
+class HedgerTest(TestCase):
+    def get_hedger(self, **kwargs):
+        kwargs.setdefault('min_samples', 5)
+        return HedgingPolicy(**kwargs).get_hedger('key')
+
+    def test_should_learn_delay(self):
+        hedger = self.get_hedger(percentile=90, min_delay=0)
+        for i in range(4):
+            hedger.record(i)
+        assert_that(hedger.get_delay(), none())
+        hedger.record(4)
+        assert_that(hedger.get_delay(), equal_to(4))
+
+    def test_delay_bounds(self):
+        hedger = self.get_hedger(min_delay=1, max_delay=2)
+        for i in range(5):
+            hedger.record(0.1)
+        assert_that(hedger.get_delay(), equal_to(1))
+
+    def test_should_send_duplicate_for_slow_request(self):
+        hedger = self.get_hedger(min_delay=0.01)
+        for i in range(5):
+            hedger.record(0.01)
+        func = SlowFirstCall()
+        response = hedger.send(func)
+        assert_that(response.name, equal_to(2))
+        assert_that(func.calls, equal_to(2))
+        func.release.set()
+        slow_response = [i for i in func.responses if i.name == 1][0]
+        assert_that(slow_response.closed.wait(5), equal_to(True))
+
+    def test_should_not_hedge_until_learned(self):
+        hedger = self.get_hedger()
+        func = SlowFirstCall()
+        func.release.set()
+        assert_that(hedger.send(func).name, equal_to(1))
+        assert_that(func.calls, equal_to(1))
+
+    def test_should_raise_error_if_all_failed(self):
+        hedger = self.get_hedger(min_delay=0.01)
+        for i in range(5):
+            hedger.record(0.01)
+
+        def func():
+            raise ValueError('failed')
+
+        assert_that(calling(hedger.send).with_args(func), raises(ValueError))
+
+
+class HedgingPolicyTest__Client(TestCase):
+    def test_should_hedge_only_reads(self):
+        client = Client('deform.io', hedging_policy=HedgingPolicy())
+        project_client = client.auth('token', 'token', project_id='one')
+        assert_that(project_client.document.get.hedger, instance_of(Hedger))
+        assert_that(
+            project_client.documents.find.hedger,
+            instance_of(Hedger)
+        )
+        assert_that(
+            project_client.documents.count.hedger,
+            instance_of(Hedger)
+        )
+        assert_that(project_client.document.create.hedger, none())
+        assert_that(project_client.documents.update.hedger, none())
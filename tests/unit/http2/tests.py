@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from hamcrest import assert_that, calling, equal_to, has_entries, raises
+from pydeform.client import ProjectClient
+from pydeform.compression import CompressionPolicy
+from pydeform.exceptions import NotFoundError
+from pydeform.utils import iterate_concurrently
+from testutils import H2CStubServer, StubServer, TestCase
+
+try:
+    import h2  # noqa
+    from pydeform.http2 import HTTP2Session, _import_httpx
+    _import_httpx()
+except ImportError:
+    HTTP2Session = None
+
+
+@unittest.skipIf(HTTP2Session is None, 'httpx and h2 are required')
+class HTTP2SessionTest(TestCase):
+    def setUp(self):
+        super(HTTP2SessionTest, self).setUp()
+        self.server = H2CStubServer().start()
+        self.session = HTTP2Session(prior_knowledge=True)
+        self.project_client = ProjectClient(
+            base_uri=self.server.url + '/api/',
+            auth_header='Token token',
+            requests_session=self.session,
+            request_defaults=self.request_defaults,
+            compression_policy=CompressionPolicy(min_size=20)
+        )
+        self.document_path = '/api/collections/users/documents/gena/'
+
+    def tearDown(self):
+        self.session.close()
+        self.server.stop()
+        super(HTTP2SessionTest, self).tearDown()
+
+    def test_get(self):
+        self.server.add('GET', self.document_path, json={'_id': 'gena'})
+        response = self.project_client.document.get(
+            collection='users',
+            identity='gena'
+        )
+        assert_that(response, equal_to({'_id': 'gena'}))
+        assert_that(
+            self.server.calls[0],
+            has_entries({
+                'http_version': 'HTTP/2',
+                'headers': has_entries({'authorization': 'Token token'}),
+            })
+        )
+
+    def test_proxies(self):
+        proxy_server = StubServer().start()
+        url = 'http://deform.invalid/api/collections/users/documents/gena/'
+        proxy_server.add('GET', url, json={'_id': 'gena'})
+        session = HTTP2Session()
+        project_client = ProjectClient(
+            base_uri='http://deform.invalid/api/',
+            auth_header='Token token',
+            requests_session=session,
+            request_defaults=dict(
+                self.request_defaults,
+                proxies={'http': proxy_server.url}
+            )
+        )
+        try:
+            response = project_client.document.get(
+                collection='users',
+                identity='gena'
+            )
+        finally:
+            session.close()
+            proxy_server.stop()
+        assert_that(response, equal_to({'_id': 'gena'}))
+        assert_that(proxy_server.calls[0]['path'], equal_to(url))
+
+    def test_errors(self):
+        self.server.add(
+            'GET',
+            self.document_path,
+            status=404,
+            json={'message': 'Not found'}
+        )
+        assert_that(
+            calling(self.project_client.document.get).with_args(
+                collection='users',
+                identity='gena'
+            ),
+            raises(NotFoundError, 'Not found')
+        )
+
+    def test_find(self):
+        self.server.add(
+            'POST',
+            '/api/collections/users/documents/',
+            json={'items': [{'_id': 1}, {'_id': 2}], 'links': {}}
+        )
+        items = list(self.project_client.documents.find(
+            collection='users',
+            filter={'age': 27},
+            stream_items=True
+        ))
+        assert_that(items, equal_to([{'_id': 1}, {'_id': 2}]))
+        assert_that(self.server.calls[0]['query'], equal_to('page=1'))
+        assert_that(
+            self.server.calls[0]['body'],
+            equal_to(b'{"filter": {"age": 27}}')
+        )
+        assert_that(
+            self.server.calls[0]['headers'],
+            has_entries({'content-encoding': 'gzip'})
+        )
+
+    def test_concurrent_requests_are_multiplexed(self):
+        self.server.add('GET', self.document_path, json={'_id': 'gena'})
+
+        def get(i):
+            return self.project_client.document.get(
+                collection='users',
+                identity='gena'
+            )
+
+        responses = list(iterate_concurrently(get, range(50), workers=16))
+        assert_that(len(responses), equal_to(50))
+        assert_that(self.server.connections, equal_to(1))
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import mock
+
+from hamcrest import assert_that, close_to, equal_to
+from pydeform import Client
+from pydeform.limiter import RateLimiter
+from testutils import TestCase
+
+
+class RateLimiterTest(TestCase):
+    def setUp(self):
+        super(RateLimiterTest, self).setUp()
+        self.time_patcher = mock.patch('pydeform.limiter.time.time')
+        self.time = self.time_patcher.start()
+        self.time.return_value = 100
+
+    def tearDown(self):
+        self.time_patcher.stop()
+        super(RateLimiterTest, self).tearDown()
+
+    def test_global_rate(self):
+        limiter = RateLimiter(rate=2)
+        assert_that(limiter.reserve(), equal_to(0))
+        assert_that(limiter.reserve(), equal_to(0))
+        assert_that(limiter.reserve(), close_to(0.5, 0.001))
+        assert_that(limiter.reserve(), close_to(1, 0.001))
+        self.time.return_value = 102
+        assert_that(limiter.reserve(), equal_to(0))
+
+    def test_project_rate(self):
+        limiter = RateLimiter(rate=100, project_rate=1)
+        assert_that(limiter.reserve('a.deform.io'), equal_to(0))
+        assert_that(limiter.reserve('b.deform.io'), equal_to(0))
+        assert_that(limiter.reserve('a.deform.io'), close_to(1, 0.001))
+
+    @mock.patch('pydeform.limiter.time.sleep')
+    def test_acquire(self, sleep):
+        limiter = RateLimiter(rate=1)
+        limiter.acquire()
+        assert_that(sleep.called, equal_to(False))
+        limiter.acquire()
+        sleep.assert_called_once_with(1)
+
+
+class RateLimiterTest__Client(TestCase):
+    def test_should_be_shared_by_project_clients(self):
+        limiter = RateLimiter(rate=10)
+        client = Client('deform.io', rate_limiter=limiter)
+        project_clients = [
+            client.auth('token', 'token', project_id='one'),
+            client.auth('session', 'session').use_project('two'),
+        ]
+        for project_client in project_clients:
+            assert_that(
+                project_client.document.get.get_http_kwargs()['rate_limiter'],
+                equal_to(limiter)
+            )
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import responses
+
+from hamcrest import assert_that, equal_to, instance_of
+from pydeform import Client
+from pydeform.pool import BoundedSession, create_requests_session
+from testutils import TestCase
+
+
+class Test__create_requests_session(TestCase):
+    def test_pool_options(self):
+        session = create_requests_session(
+            pool_connections=20,
+            pool_maxsize=64,
+            pool_block=True,
+            keep_alive=False
+        )
+        adapter = session.get_adapter('https://project.deform.io/')
+        assert_that(adapter._pool_connections, equal_to(20))
+        assert_that(adapter._pool_maxsize, equal_to(64))
+        assert_that(adapter._pool_block, equal_to(True))
+        assert_that(session.headers['Connection'], equal_to('close'))
+
+    def test_client(self):
+        client = Client('deform.io', pool_maxsize=64, max_connections=100)
+        assert_that(client.requests_session, instance_of(BoundedSession))
+        assert_that(
+            client.requests_session.get_adapter('https://a.deform.io/')
+            ._pool_maxsize,
+            equal_to(64)
+        )
+        assert_that(client.requests_session.max_connections, equal_to(100))
+
+
+class BoundedSessionTest(TestCase):
+    def is_connection_available(self, session):
+        if session.connections.acquire(False):
+            session.connections.release()
+            return True
+        return False
+
+    @responses.activate
+    def test_should_release_connections(self):
+        url = 'http://chib.me/users/'
+        responses.add('GET', url, json={})
+        session = BoundedSession(max_connections=1)
+
+        session.get(url)
+        assert_that(self.is_connection_available(session), equal_to(True))
+
+        response = session.get(url, stream=True)
+        assert_that(self.is_connection_available(session), equal_to(False))
+        response.close()
+        assert_that(self.is_connection_available(session), equal_to(True))
+
+    @responses.activate
+    def test_should_release_connection_on_error(self):
+        session = BoundedSession(max_connections=1)
+        try:
+            session.get('http://chib.me/not-registered/')
+        except Exception:
+            pass
+        assert_that(self.is_connection_available(session), equal_to(True))
+
+    @responses.activate
+    def test_should_follow_redirects(self):
+        url = 'http://chib.me/users/'
+        responses.add(
+            'GET',
+            'http://chib.me/old-users/',
+            status=301,
+            headers={'Location': url}
+        )
+        responses.add('GET', url, json={'_id': 'gena'})
+        session = BoundedSession(max_connections=1)
+        result = {}
+
+        def get(stream):
+            response = session.get('http://chib.me/old-users/', stream=stream)
+            result[stream] = response.json()
+            response.close()
+
+        for stream in [False, True]:
+            # redirect hop used to wait for the slot of the first request
+            thread = threading.Thread(target=get, args=(stream,))
+            thread.daemon = True
+            thread.start()
+            thread.join(5)
+            assert_that(thread.is_alive(), equal_to(False))
+            assert_that(result[stream], equal_to({'_id': 'gena'}))
+            assert_that(
+                self.is_connection_available(session),
+                equal_to(True)
+            )
@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 import os
-import types
 import json
 
 import responses
@@ -10,10 +9,17 @@ from hamcrest import (
     equal_to,
     has_entries,
     has_entry,
+    has_key,
     instance_of,
+    is_not,
     raises
 )
-from pydeform.resources.base import ResourceMethodBase
+from pydeform.exceptions import ValidationError
+from pydeform.resources.base import (
+    CreateManyResourceMethod,
+    ResourceMethodBase
+)
+from pydeform.resources.utils import PaginationIterator
 from pydeform.utils import flatten, uri_join
 from testutils import TestCase, check_timeout
 
@@ -233,6 +239,81 @@ class TestResourceMethodBase__get_context(TestCase):
         )
 
 
+class TestResourceMethodBase__get_http_kwargs(TestCase):
+    def test_me(self):
+        class ResourceMethod(ResourceMethodBase):
+            method = 'get'
+
+        retry_policy = object()
+        json_codec = object()
+        instance = ResourceMethod(
+            base_uri='http://chib.me/',
+            path=['users'],
+            auth_header='Token 123',
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults,
+            retry_policy=retry_policy,
+            json_codec=json_codec
+        )
+        assert_that(
+            instance.get_http_kwargs(),
+            equal_to({
+                'requests_session': self.requests_session,
+                'request_defaults': self.request_defaults,
+                'retry_policy': retry_policy,
+                'json_codec': json_codec,
+                'hedger': None,
+            })
+        )
+
+
+class TestResourceMethodBase__get_request_plan(TestCase):
+    def test_should_compile_once(self):
+        calls = []
+
+        class ResourceMethod(ResourceMethodBase):
+            action = 'find'
+            params = {
+                'identity': {
+                    'dest': 'uri'
+                },
+            }
+            params_required = ['identity']
+
+            def get_params_definitions(self):
+                calls.append('get_params_definitions')
+                return super(ResourceMethod, self).get_params_definitions()
+
+        instance = ResourceMethod(
+            base_uri='http://chib.me/',
+            path=['users', '{identity}'],
+            auth_header='Token 123',
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults
+        )
+        for identity in ['gena', 'vova']:
+            context = instance.get_context({'identity': identity})
+            assert_that(
+                context,
+                equal_to({
+                    'url': 'http://chib.me/users/%s/' % identity,
+                    'headers': {
+                        'Authorization': 'Token 123',
+                        'X-Action': 'find',
+                        'Content-Type': 'application/json',
+                    },
+                })
+            )
+        assert_that(calls, equal_to(['get_params_definitions']))
+
+        # compiled headers are not shared with the contexts
+        context['headers']['X-Custom'] = 'value'
+        assert_that(
+            instance.get_context({'identity': 'gena'})['headers'],
+            is_not(has_key('X-Custom'))
+        )
+
+
 class TestResourceMethodBase__call(TestCase):
     def setUp(self):
         super(TestResourceMethodBase__call, self).setUp()
@@ -317,7 +398,7 @@ class TestResourceMethodBase__call(TestCase):
         )
 
     @responses.activate
-    def test_should_return_generator_if_paginatable(self):
+    def test_should_return_iterator_if_paginatable(self):
         class ResourceMethod(ResourceMethodBase):
             method = 'get'
             params = {
@@ -355,7 +436,7 @@ class TestResourceMethodBase__call(TestCase):
 
         instance = self.get_instance(ResourceMethod)
         response = instance(name='gena', surname='chibisov')
-        assert_that(response, instance_of(types.GeneratorType))
+        assert_that(response, instance_of(PaginationIterator))
         assert_that(
             [i for i in response],
             equal_to(page_1_result + page_2_result)
@@ -512,3 +593,78 @@ class TestResourceMethodBase__call(TestCase):
 
         instance = self.get_instance(ResourceMethod)
         check_timeout(instance)
+
+
+class TestCreateManyResourceMethod__call(TestCase):
+    def setUp(self):
+        super(TestCreateManyResourceMethod__call, self).setUp()
+
+        self.base_uri = 'http://chib.me/'
+        self.instance = CreateManyResourceMethod(
+            base_uri=self.base_uri,
+            path=['users', '{identity}'],
+            auth_header='Token 123',
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults
+        )
+
+    @responses.activate
+    def test_me(self):
+        def create_callback(request):
+            data = json.loads(request.body)
+            if data['name'] == 'invalid':
+                return 422, {}, json.dumps({
+                    'message': 'Validation error',
+                    'errors': [{'property': 'name', 'message': 'invalid'}]
+                })
+            return 201, {}, json.dumps(dict(data, _id='generated'))
+
+        responses.add_callback(
+            'POST',
+            self.base_uri + 'users/',
+            callback=create_callback
+        )
+        responses.add(
+            'PUT',
+            self.base_uri + 'users/gena/',
+            json={'_id': 'gena'},
+            status=200
+        )
+
+        response = self.instance(
+            records=[
+                {'name': 'vova'},
+                {'_id': 'gena', 'name': 'gena'},
+                {'name': 'invalid'},
+            ],
+            workers=2
+        )
+        results = sorted(response, key=lambda x: x['index'])
+        assert_that(
+            [(i['index'], i['id'], i['created']) for i in results],
+            equal_to([
+                (0, 'generated', True),
+                (1, 'gena', False),
+                (2, None, False),
+            ])
+        )
+        assert_that(results[0]['error'], equal_to(None))
+        assert_that(results[2]['error'], instance_of(ValidationError))
+
+    @responses.activate
+    def test_should_do_nothing_until_consumed(self):
+        responses.add('POST', self.base_uri + 'users/', json={'_id': 'a'})
+        read = []
+
+        def read_records():
+            for name in ['vova', 'gena']:
+                read.append(name)
+                yield {'name': name}
+
+        response = self.instance(records=read_records(), workers=2)
+        assert_that(read, equal_to([]))
+        assert_that(len(responses.calls), equal_to(0))
+
+        assert_that(len(list(response)), equal_to(2))
+        assert_that(read, equal_to(['vova', 'gena']))
+        assert_that(len(responses.calls), equal_to(2))
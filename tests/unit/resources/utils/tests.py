@@ -1,24 +1,51 @@
 # -*- coding: utf-8 -*-
 import datetime
 import os
-import types
 import json
+import sys
 
 import responses
-from hamcrest import assert_that, equal_to, has_entry, instance_of
+from hamcrest import (
+    assert_that,
+    calling,
+    equal_to,
+    has_entry,
+    instance_of,
+    raises
+)
 from pydeform.resources.utils import (
+    PaginationIterator,
+    RequestPlan,
     get_headers,
     get_params_by_destination,
     get_payload,
     get_query_params,
     get_url,
+    iterate_batches_by_pagination,
     iterate_by_pagination,
-    prepare_payload
+    has_files
 )
-from pydeform.utils import flatten, format_date, format_datetime
+from pydeform.utils import flatten, format_datetime
 from testutils import TestCase
 
 
+def add_numbered_pages(method, url, pages, query=''):
+    for page, items in enumerate(pages, 1):
+        responses.add(
+            method,
+            url + '?%spage=%s' % (query, page),
+            json={
+                'links': {
+                    'next': 'http://next/' if page < len(pages) else None
+                },
+                'page': page,
+                'pages': len(pages),
+                'items': items
+            },
+            match_querystring=True
+        )
+
+
 class ResourcesUtilesTest__get_params_by_destination(TestCase):
     def test_me(self):
         definitions = {
@@ -105,6 +132,107 @@ class ResourcesUtilesTest__get_url(TestCase):
         )
 
 
+class ResourcesUtilesTest__RequestPlan(TestCase):
+    def setUp(self):
+        super(ResourcesUtilesTest__RequestPlan, self).setUp()
+        self.definitions = {
+            'collection': {'dest': 'uri'},
+            'identity': {'dest': 'uri'},
+            'property': {'dest': 'uri'},
+            'fields': {'dest': 'query_params'},
+            'data': {'dest': 'payload'},
+        }
+        self.path = ['collections', '{collection}', 'documents',
+                     '{identity}', '{property}']
+        self.plan = RequestPlan(
+            base_uri='https://chib.me/api',
+            path=self.path,
+            definitions=self.definitions,
+            headers={'Authorization': 'Token 123'},
+            params_required=['identity']
+        )
+
+    def test_get_url(self):
+        experiments = [
+            {'collection': 'users', 'identity': 'gena'},
+            {'collection': 'users', 'identity': 'a b/c', 'property': 'x'},
+            {'collection': 'users', 'identity': 1, 'property': ['a', 'b']},
+            {'collection': 'users'},
+            {},
+        ]
+        for params in experiments:
+            assert_that(
+                self.plan.get_url(params),
+                equal_to(get_url(
+                    base_uri='https://chib.me/api',
+                    path=self.path,
+                    params=params,
+                    definitions=self.definitions
+                ))
+            )
+
+    def test_get_url_constant_segments(self):
+        experiments = [
+            ['collections', '{collection}', 'documents', 'my docs', '{id}'],
+            ['{collection}', 'a', 'b', '{id}', 'c'],
+            ['users', 'all'],
+            [],
+        ]
+        definitions = {
+            'collection': {'dest': 'uri'},
+            'id': {'dest': 'uri'},
+        }
+        for path in experiments:
+            for base_uri in ['https://chib.me/api', 'https://chib.me/api/']:
+                plan = RequestPlan(
+                    base_uri=base_uri,
+                    path=path,
+                    definitions=definitions,
+                    headers={}
+                )
+                for params in [{'collection': 'users', 'id': 'x y'}, {}]:
+                    assert_that(
+                        plan.get_url(params),
+                        equal_to(get_url(
+                            base_uri=base_uri,
+                            path=path,
+                            params=params,
+                            definitions=definitions
+                        ))
+                    )
+
+    def test_get_params_by_destination(self):
+        params = {
+            'collection': 'users',
+            'identity': 'gena',
+            'fields': ['name'],
+            'data': {'name': 'gena'},
+        }
+        assert_that(
+            self.plan.get_params_by_destination(params),
+            equal_to(get_params_by_destination(params, self.definitions))
+        )
+        assert_that(
+            calling(self.plan.get_params_by_destination).with_args(
+                {'unknown': 1}
+            ),
+            raises(KeyError)
+        )
+
+    def test_headers(self):
+        assert_that(
+            self.plan.headers,
+            equal_to({'Authorization': 'Token 123'})
+        )
+        assert_that(
+            self.plan.json_headers,
+            equal_to({
+                'Authorization': 'Token 123',
+                'Content-Type': 'application/json',
+            })
+        )
+
+
 class ResourcesUtilesTest__get_headers(TestCase):
     def setUp(self):
         super(ResourcesUtilesTest__get_headers, self).setUp()
@@ -160,76 +288,26 @@ class ResourcesUtilesTest__get_query_params(TestCase):
         )
 
 
-class ResourcesUtilesTest__prepare_payload(TestCase):
-    def expect_response(self, value, expected, with_files=False):
+class ResourcesUtilesTest__has_files(TestCase):
+    def test_me(self):
+        file_object = open(os.path.join(self.CONFIG['FILES_PATH'], '1.txt'))
         experiments = [
-            {
-                'value': value,
-                'expected': expected
-            },
-            {
-                'value': [1, 2, value],
-                'expected': [1, 2, expected]
-            },
-            {
-                'value': (1, 2, value),
-                'expected': (1, 2, expected)
-            },
-            {
-                'value': {
-                    'key': value
-                },
-                'expected': {
-                    'key': expected
-                }
-            },
-            {
-                'value': {
-                    'key': (0, 1, value)
-                },
-                'expected': {
-                    'key': (0, 1, expected)
-                }
-            },
+            {'value': None, 'expected': False},
+            {'value': u'Привет', 'expected': False},
+            {'value': datetime.date(1990, 3, 2), 'expected': False},
+            {'value': {'a': [1, (2, {'b': 'c'})]}, 'expected': False},
+            {'value': file_object, 'expected': True},
+            {'value': [1, 2, file_object], 'expected': True},
+            {'value': {'key': (0, 1, file_object)}, 'expected': True},
         ]
-
         for exp in experiments:
-            assert_that(
-                prepare_payload(exp['value']),
-                equal_to((with_files, exp['expected']))
-            )
-
-    def test_none(self):
-        self.expect_response(None, None)
-
-    def test_strings(self):
-        self.expect_response('hello', 'hello')
-        self.expect_response(u'Привет', u'Привет')
-
-    def test_int(self):
-        self.expect_response(1, 1)
-
-    def test_float(self):
-        self.expect_response(1.12, 1.12)
-
-    def test_date(self):
-        date = datetime.date(year=1990, month=3, day=2)
-        self.expect_response(date, format_date(date))
-
-    def test_datetime(self):
-        value = datetime.datetime(
-            year=1990,
-            month=3,
-            day=2,
-            hour=10,
-            minute=9,
-            second=8
-        )
-        self.expect_response(value, format_datetime(value))
+            assert_that(has_files(exp['value']), equal_to(exp['expected']))
 
-    def test_file(self):
-        value = open(os.path.join(self.CONFIG['FILES_PATH'], '1.txt'))
-        self.expect_response(value, value, with_files=True)
+    def test_deeply_nested(self):
+        value = 'leaf'
+        for i in range(sys.getrecursionlimit() * 2):
+            value = {'child': [value]}
+        assert_that(has_files(value), equal_to(False))
 
 
 class ResourcesUtilesTest__get_payload(TestCase):
@@ -295,6 +373,32 @@ class ResourcesUtilesTest__get_payload(TestCase):
             })
         )
 
+    def test_should_not_rebuild_payload(self):
+        data = {
+            'created': datetime.datetime(1990, 3, 2, 10, 9, 8),
+            'tags': ('a', 'b'),
+        }
+        payload = get_payload({'data': data}, self.definitions)
+        assert_that(payload['type'], equal_to('json'))
+        assert_that(payload['data'] is data, equal_to(True))
+
+    def test_params_with_dates_and_files(self):
+        created = datetime.datetime(1990, 3, 2, 10, 9, 8)
+        avatar = open(os.path.join(self.CONFIG['FILES_PATH'], '1.txt'))
+        assert_that(
+            get_payload(
+                {'data': {'created': created, 'avatar': avatar}},
+                self.definitions
+            ),
+            equal_to({
+                'type': 'files',
+                'data': {
+                    'created': (None, json.dumps(format_datetime(created))),
+                    'avatar': avatar,
+                }
+            })
+        )
+
     def test_params_with_files(self):
         params = {
             'data': {
@@ -308,7 +412,7 @@ class ResourcesUtilesTest__get_payload(TestCase):
                 }
             }
         }
-        expected_data = flatten(prepare_payload(params['data'])[1])
+        expected_data = flatten(params['data'])
         expected_data['user.name'] = (
             None, 
             json.dumps(expected_data['user.name'])
@@ -351,7 +455,7 @@ class ResourcesUtilesTest__iterate_by_pagination(TestCase):
         return [i for i in generator]
 
     @responses.activate
-    def test_should_return_generator(self):
+    def test_should_return_iterator(self):
         responses.add(
             self.method,
             self.url,
@@ -368,7 +472,7 @@ class ResourcesUtilesTest__iterate_by_pagination(TestCase):
                 requests_session=self.requests_session,
                 request_defaults=self.request_defaults
             ),
-            instance_of(types.GeneratorType)
+            instance_of(PaginationIterator)
         )
 
     @responses.activate
@@ -502,3 +606,389 @@ class ResourcesUtilesTest__iterate_by_pagination(TestCase):
             self.get_list_from_generator(response),
             equal_to(page_1_results)
         )
+
+    @responses.activate
+    def test_prefetch(self):
+        page_1_results = [1, 2, 3]
+        page_2_results = [4, 5, 6]
+        responses.add(
+            self.method,
+            self.url + '?page=1',
+            json={
+                'links': {
+                    'next': 'http://next/blablabla'
+                },
+                'items': page_1_results
+            },
+            match_querystring=True
+        )
+        responses.add(
+            self.method,
+            self.url + '?page=2',
+            json={
+                'links': {},
+                'items': page_2_results
+            },
+            match_querystring=True
+        )
+
+        response = iterate_by_pagination(
+            method=self.method,
+            request_kwargs=self.request_kwargs,
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults,
+            prefetch=2
+        )
+        assert_that(
+            self.get_list_from_generator(response),
+            equal_to(page_1_results + page_2_results)
+        )
+
+    @responses.activate
+    def test_workers(self):
+        pages = [[1, 2], [3, 4], [5, 6], [7]]
+        add_numbered_pages(self.method, self.url, pages)
+
+        response = iterate_by_pagination(
+            method=self.method,
+            request_kwargs=self.request_kwargs,
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults,
+            workers=3
+        )
+        assert_that(
+            self.get_list_from_generator(response),
+            equal_to([1, 2, 3, 4, 5, 6, 7])
+        )
+
+    @responses.activate
+    def test_workers_unordered(self):
+        pages = [[1, 2], [3, 4], [5, 6], [7]]
+        add_numbered_pages(self.method, self.url, pages)
+
+        response = iterate_by_pagination(
+            method=self.method,
+            request_kwargs=self.request_kwargs,
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults,
+            workers=3,
+            ordered=False
+        )
+        assert_that(
+            sorted(self.get_list_from_generator(response)),
+            equal_to([1, 2, 3, 4, 5, 6, 7])
+        )
+
+    def test_prefetch_and_workers_together(self):
+        assert_that(
+            calling(iterate_by_pagination).with_args(
+                method=self.method,
+                request_kwargs=self.request_kwargs,
+                requests_session=self.requests_session,
+                request_defaults=self.request_defaults,
+                prefetch=2,
+                workers=2
+            ),
+            raises(ValueError)
+        )
+
+    @responses.activate
+    def test_keyset(self):
+        requests_bodies = []
+
+        def callback(request):
+            body = json.loads(request.body)
+            requests_bodies.append(body)
+            if 'filter' not in body:
+                result = {'links': {'next': 'yes'}, 'items': [{'_id': 1}]}
+            else:
+                result = {'links': {}, 'items': [{'_id': 2}]}
+            return 200, {}, json.dumps(result)
+
+        responses.add_callback('POST', self.url, callback=callback)
+
+        response = iterate_by_pagination(
+            method='POST',
+            request_kwargs={'url': self.url, 'params': {'per_page': 1}},
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults,
+            keyset='_id'
+        )
+        assert_that(
+            self.get_list_from_generator(response),
+            equal_to([{'_id': 1}, {'_id': 2}])
+        )
+        assert_that(
+            requests_bodies,
+            equal_to([{}, {'filter': {'_id': {'$gt': 1}}}])
+        )
+        assert_that(
+            responses.calls[0].request.url,
+            equal_to(self.url + '?per_page=1&sort=_id')
+        )
+
+    @responses.activate
+    def test_keyset_with_filter_and_descending_sort(self):
+        requests_bodies = []
+
+        def callback(request):
+            body = json.loads(request.body)
+            requests_bodies.append(body)
+            links = {} if len(requests_bodies) > 1 else {'next': 'yes'}
+            return 200, {}, json.dumps({
+                'links': links,
+                'items': [{'_id': 10 - len(requests_bodies)}]
+            })
+
+        responses.add_callback('POST', self.url, callback=callback)
+
+        response = iterate_by_pagination(
+            method='POST',
+            request_kwargs={
+                'url': self.url,
+                'json': {'filter': {'name': 'gena'}}
+            },
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults,
+            keyset='-_id'
+        )
+        assert_that(
+            self.get_list_from_generator(response),
+            equal_to([{'_id': 9}, {'_id': 8}])
+        )
+        assert_that(
+            requests_bodies[1],
+            equal_to({
+                'filter': {
+                    '$and': [{'name': 'gena'}, {'_id': {'$lt': 9}}]
+                }
+            })
+        )
+
+    @responses.activate
+    def test_stream_items(self):
+        add_numbered_pages(
+            self.method,
+            self.url,
+            [[{'id': 1}, {'id': 2}], [{'id': 3}]]
+        )
+
+        response = iterate_by_pagination(
+            method=self.method,
+            request_kwargs=self.request_kwargs,
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults,
+            stream_items=True
+        )
+        assert_that(
+            self.get_list_from_generator(response),
+            equal_to([{'id': 1}, {'id': 2}, {'id': 3}])
+        )
+
+
+class ResourcesUtilesTest__iterate_batches_by_pagination(TestCase):
+    def setUp(self):
+        super(ResourcesUtilesTest__iterate_batches_by_pagination, self).setUp()
+
+        self.method = 'GET'
+        self.url = 'http://chib.me/users/'
+        self.request_kwargs = {
+            'url': self.url
+        }
+
+    def get_batches(self, **kwargs):
+        return list(
+            iterate_batches_by_pagination(
+                method=self.method,
+                request_kwargs=self.request_kwargs,
+                requests_session=self.requests_session,
+                request_defaults=self.request_defaults,
+                **kwargs
+            )
+        )
+
+    @responses.activate
+    def test_pages(self):
+        add_numbered_pages(
+            self.method,
+            self.url,
+            [[1, 2, 3], [4, 5, 6], [7]]
+        )
+        assert_that(
+            self.get_batches(),
+            equal_to([[1, 2, 3], [4, 5, 6], [7]])
+        )
+
+    @responses.activate
+    def test_batch_size(self):
+        add_numbered_pages(
+            self.method,
+            self.url,
+            [[1, 2, 3], [4, 5, 6], [7]]
+        )
+        assert_that(
+            self.get_batches(batch_size=2),
+            equal_to([[1, 2], [3, 4], [5, 6], [7]])
+        )
+        responses.calls.reset()
+        assert_that(
+            self.get_batches(batch_size=3),
+            equal_to([[1, 2, 3], [4, 5, 6], [7]])
+        )
+        responses.calls.reset()
+        assert_that(
+            self.get_batches(batch_size=10),
+            equal_to([[1, 2, 3, 4, 5, 6, 7]])
+        )
+
+    @responses.activate
+    def test_batch_size_with_stream_items(self):
+        add_numbered_pages(
+            self.method,
+            self.url,
+            [[1, 2, 3], [4, 5, 6], [7]]
+        )
+        assert_that(
+            self.get_batches(batch_size=2, stream_items=True),
+            equal_to([[1, 2], [3, 4], [5, 6], [7]])
+        )
+
+
+class ResourcesUtilesTest__PaginationIterator__checkpoint(TestCase):
+    def setUp(self):
+        super(
+            ResourcesUtilesTest__PaginationIterator__checkpoint,
+            self
+        ).setUp()
+
+        self.url = 'http://chib.me/users/'
+
+    def get_iterator(self, sort='name', **kwargs):
+        return iterate_by_pagination(
+            method='POST',
+            request_kwargs={
+                'url': self.url,
+                'params': {'sort': sort},
+                'json': {'filter': {'age': 26}}
+            },
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults,
+            **kwargs
+        )
+
+    @responses.activate
+    def test_pages(self):
+        add_numbered_pages(
+            'POST',
+            self.url,
+            [[1, 2, 3], [4, 5, 6], [7]],
+            query='sort=name&'
+        )
+
+        iterator = self.get_iterator()
+        assert_that(
+            iterator.checkpoint(),
+            equal_to({
+                'page': 1,
+                'offset': 0,
+                'sort': 'name',
+                'filter': {'age': 26}
+            })
+        )
+        assert_that([next(iterator) for i in range(4)], equal_to([1, 2, 3, 4]))
+        checkpoint = iterator.checkpoint()
+        assert_that(
+            checkpoint,
+            equal_to({
+                'page': 2,
+                'offset': 1,
+                'sort': 'name',
+                'filter': {'age': 26}
+            })
+        )
+        iterator.close()
+
+        responses.calls.reset()
+        response = iterate_by_pagination(
+            method='POST',
+            request_kwargs={'url': self.url},
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults,
+            checkpoint=json.loads(json.dumps(checkpoint))
+        )
+        assert_that(list(response), equal_to([5, 6, 7]))
+        assert_that(
+            json.loads(responses.calls[0].request.body),
+            equal_to({'filter': {'age': 26}})
+        )
+        assert_that(
+            responses.calls[0].request.url,
+            equal_to(self.url + '?sort=name&page=2')
+        )
+
+    @responses.activate
+    def test_page_end(self):
+        add_numbered_pages(
+            'POST',
+            self.url,
+            [[1, 2], [3]],
+            query='sort=name&'
+        )
+
+        iterator = self.get_iterator()
+        assert_that([next(iterator) for i in range(2)], equal_to([1, 2]))
+        assert_that(iterator.checkpoint()['offset'], equal_to(2))
+        assert_that(list(iterator), equal_to([3]))
+        assert_that(iterator.checkpoint()['page'], equal_to(3))
+
+    @responses.activate
+    def test_keyset(self):
+        responses.add(
+            'POST',
+            self.url,
+            json={'links': {'next': 'yes'}, 'items': [{'_id': 'a'}]}
+        )
+        iterator = self.get_iterator(sort='_id', keyset='_id')
+        assert_that(
+            iterator.checkpoint(),
+            equal_to({
+                'keyset': '_id',
+                'last_value': None,
+                'sort': '_id',
+                'filter': {'age': 26}
+            })
+        )
+        next(iterator)
+        assert_that(iterator.checkpoint()['last_value'], equal_to('a'))
+
+    def test_dates_in_filter(self):
+        iterator = iterate_by_pagination(
+            method='POST',
+            request_kwargs={
+                'url': self.url,
+                'params': {'sort': 'name'},
+                'json': {
+                    'filter': {
+                        'created': {'$gt': datetime.datetime(2017, 1, 2)}
+                    }
+                }
+            },
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults
+        )
+        checkpoint = iterator.checkpoint()
+        assert_that(
+            checkpoint['filter'],
+            equal_to({'created': {'$gt': '2017-01-02T00:00:00Z'}})
+        )
+        assert_that(
+            json.loads(json.dumps(checkpoint)),
+            equal_to(checkpoint)
+        )
+
+    def test_unordered(self):
+        iterator = self.get_iterator(workers=2, ordered=False)
+        assert_that(
+            calling(iterator.checkpoint),
+            raises(ValueError)
+        )
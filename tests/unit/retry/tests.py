@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import mock
+import responses
+from requests.exceptions import ConnectTimeout
+
+from hamcrest import assert_that, calling, equal_to, raises
+from pydeform.exceptions import HTTPError
+from pydeform.retry import RetryBudget, RetryPolicy
+from pydeform.utils import do_http_request
+from testutils import TestCase
+
+
+class RetryBudgetTest(TestCase):
+    def test_should_limit_retries_by_ratio(self):
+        budget = RetryBudget(ratio=0.5, min_per_second=0, max_tokens=1)
+        assert_that(budget.withdraw(), equal_to(True))
+        assert_that(budget.withdraw(), equal_to(False))
+        budget.deposit()
+        assert_that(budget.withdraw(), equal_to(False))
+        budget.deposit()
+        assert_that(budget.withdraw(), equal_to(True))
+
+
+class RetryPolicyTest__do_http_request(TestCase):
+    url = 'http://chib.me/users/'
+
+    def setUp(self):
+        super(RetryPolicyTest__do_http_request, self).setUp()
+        self.sleep_patcher = mock.patch('pydeform.utils.time.sleep')
+        self.sleep = self.sleep_patcher.start()
+        self.retry_policy = RetryPolicy(
+            max_retries=2,
+            budget=RetryBudget(min_per_second=0)
+        )
+
+    def tearDown(self):
+        self.sleep_patcher.stop()
+        super(RetryPolicyTest__do_http_request, self).tearDown()
+
+    def request(self, method='GET', **kwargs):
+        return do_http_request(
+            method=method,
+            request_kwargs=dict({'url': self.url}, **kwargs),
+            requests_session=self.requests_session,
+            request_defaults=self.request_defaults,
+            retry_policy=self.retry_policy
+        )
+
+    @responses.activate
+    def test_should_retry_server_errors_of_idempotent_methods(self):
+        responses.add('GET', self.url, status=502, json={})
+        responses.add('GET', self.url, status=200, json={'ok': True})
+        assert_that(self.request().json(), equal_to({'ok': True}))
+        assert_that(len(responses.calls), equal_to(2))
+        assert_that(self.sleep.call_count, equal_to(1))
+
+    @responses.activate
+    def test_should_stop_after_max_retries(self):
+        responses.add('GET', self.url, status=500, json={})
+        assert_that(calling(self.request), raises(HTTPError))
+        assert_that(len(responses.calls), equal_to(3))
+
+    @responses.activate
+    def test_should_not_retry_post_by_default(self):
+        responses.add('POST', self.url, status=500, json={})
+        assert_that(
+            calling(self.request).with_args(method='POST'),
+            raises(HTTPError)
+        )
+        assert_that(len(responses.calls), equal_to(1))
+
+        self.retry_policy.retry_post = True
+        assert_that(
+            calling(self.request).with_args(method='POST'),
+            raises(HTTPError)
+        )
+        assert_that(len(responses.calls), equal_to(4))
+
+    @responses.activate
+    def test_should_honor_retry_after(self):
+        responses.add(
+            'POST',
+            self.url,
+            status=429,
+            json={},
+            headers={'Retry-After': '3'}
+        )
+        responses.add('POST', self.url, status=200, json={})
+        self.request(method='POST')
+        self.sleep.assert_called_once_with(3.0)
+
+    @responses.activate
+    def test_should_always_retry_connect_timeout(self):
+        responses.add('POST', self.url, body=ConnectTimeout())
+        responses.add('POST', self.url, status=200, json={})
+        self.request(method='POST')
+        assert_that(len(responses.calls), equal_to(2))
+
+    @responses.activate
+    def test_should_not_retry_client_errors(self):
+        responses.add('GET', self.url, status=404, json={})
+        assert_that(calling(self.request), raises(HTTPError))
+        assert_that(len(responses.calls), equal_to(1))
+
+    @responses.activate
+    def test_should_respect_budget(self):
+        self.retry_policy.budget = RetryBudget(
+            ratio=0,
+            min_per_second=0,
+            max_tokens=1
+        )
+        responses.add('GET', self.url, status=500, json={})
+        assert_that(calling(self.request), raises(HTTPError))
+        assert_that(len(responses.calls), equal_to(2))
+
+    def test_backoff_should_be_bounded(self):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+        for attempt in range(1, 10):
+            delay = policy.get_backoff(attempt)
+            max_delay = min(5, 2 ** (attempt - 1))
+            assert_that(0 <= delay <= max_delay, equal_to(True))
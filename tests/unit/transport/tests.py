@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import io
+import socket
+
+from requests.exceptions import ConnectionError
+
+from hamcrest import (
+    assert_that,
+    calling,
+    contains_string,
+    equal_to,
+    has_entries,
+    raises
+)
+from pydeform.client import ProjectClient
+from pydeform.exceptions import NotFoundError
+from pydeform.transport import Urllib3Transport
+from testutils import StubServer, TestCase
+
+
+class Urllib3TransportTest(TestCase):
+    def setUp(self):
+        super(Urllib3TransportTest, self).setUp()
+        self.server = StubServer().start()
+        self.transport = Urllib3Transport()
+        self.project_client = ProjectClient(
+            base_uri=self.server.url + '/api/',
+            auth_header='Token token',
+            requests_session=self.transport,
+            request_defaults=self.request_defaults
+        )
+        self.documents_path = '/api/collections/users/documents/'
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+        super(Urllib3TransportTest, self).tearDown()
+
+    def test_get(self):
+        self.server.add(
+            'GET',
+            self.documents_path + 'gena/',
+            json={'_id': 'gena'}
+        )
+        response = self.project_client.document.get(
+            collection='users',
+            identity='gena'
+        )
+        assert_that(response, equal_to({'_id': 'gena'}))
+        assert_that(
+            self.server.calls[0]['headers'],
+            has_entries({'Authorization': 'Token token'})
+        )
+
+    def test_find(self):
+        self.server.add(
+            'POST',
+            self.documents_path,
+            json={'items': [{'_id': 1}], 'links': {}}
+        )
+        items = list(self.project_client.documents.find(
+            collection='users',
+            filter={'age': 27}
+        ))
+        assert_that(items, equal_to([{'_id': 1}]))
+        assert_that(self.server.calls[0]['query'], equal_to('page=1'))
+        assert_that(
+            self.server.calls[0]['headers'],
+            has_entries({
+                'Content-Type': 'application/json',
+                'X-Action': 'find',
+            })
+        )
+        assert_that(
+            self.server.calls[0]['body'],
+            equal_to(b'{"filter": {"age": 27}}')
+        )
+
+    def test_errors(self):
+        self.server.add(
+            'GET',
+            self.documents_path + 'gena/',
+            status=404,
+            json={'message': 'Not found'}
+        )
+        assert_that(
+            calling(self.project_client.document.get).with_args(
+                collection='users',
+                identity='gena'
+            ),
+            raises(NotFoundError, 'Not found')
+        )
+
+    def test_connection_error(self):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        url = 'http://127.0.0.1:%s/' % sock.getsockname()[1]
+        sock.close()
+        assert_that(
+            calling(self.transport.get).with_args(url),
+            raises(ConnectionError)
+        )
+
+    def test_files(self):
+        self.server.add('POST', '/upload/', json={})
+        self.transport.post(
+            self.server.url + '/upload/',
+            files={
+                'name': (None, 'gena'),
+                'avatar': ('avatar.png', io.BytesIO(b'image'), 'image/png'),
+            }
+        )
+        call = self.server.calls[0]
+        assert_that(
+            call['headers']['Content-Type'],
+            contains_string('multipart/form-data; boundary=')
+        )
+        body = call['body'].decode()
+        assert_that(body, contains_string('name="name"\r\n\r\ngena'))
+        assert_that(body, contains_string('filename="avatar.png"'))
+        assert_that(body, contains_string('Content-Type: image/png'))
+
+    def test_stream(self):
+        self.server.add('GET', '/export/', json=[1, 2, 3])
+        response = self.transport.get(
+            self.server.url + '/export/',
+            stream=True
+        )
+        assert_that(
+            b''.join(response.iter_content(2)),
+            equal_to(b'[1, 2, 3]')
+        )
+
+    def test_redirects(self):
+        self.server.add(
+            'GET',
+            '/old/',
+            status=302,
+            headers={'Location': self.server.url + '/new/'}
+        )
+        self.server.add('GET', '/new/', json={'new': True})
+        response = self.transport.get(self.server.url + '/old/')
+        assert_that(response.json(), equal_to({'new': True}))
+
+        response = self.transport.get(
+            self.server.url + '/old/',
+            allow_redirects=False
+        )
+        assert_that(response.status_code, equal_to(302))
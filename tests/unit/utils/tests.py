@@ -1,6 +1,25 @@
 # -*- coding: utf-8 -*-
-from hamcrest import assert_that, equal_to
-from pydeform.utils import flatten, get_base_uri, uri_join
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+from random import Random
+
+from hamcrest import assert_that, calling, equal_to, raises
+from pydeform.utils import (
+    flatten,
+    get_base_uri,
+    iterate_concurrently,
+    iterate_in_background,
+    iterate_json_array_property,
+    merge_request_defaults,
+    quote_uri_part,
+    read_records,
+    uri_join,
+    write_ndjson
+)
 from testutils import TestCase
 
 
@@ -69,6 +88,27 @@ class Test__uri_join(TestCase):
         )
 
 
+class Test__quote_uri_part(TestCase):
+    def test_me(self):
+        experiments = [
+            ('gena', 'gena'),
+            ('/a b/', 'a+b'),
+            ('a/b', 'a%2Fb'),
+            (1, '1'),
+            (True, 'True'),
+            (1.5, '1.5'),
+        ]
+        for part, expected in experiments:
+            # the second call is served by the cache
+            for i in range(2):
+                assert_that(quote_uri_part(part), equal_to(expected))
+
+    def test_should_not_mix_up_equal_values_of_other_types(self):
+        assert_that(quote_uri_part('1'), equal_to('1'))
+        assert_that(quote_uri_part(True), equal_to('True'))
+        assert_that(quote_uri_part(1), equal_to('1'))
+
+
 class Test__get_base_uri(TestCase):
     def test_me(self):
         api_base_path = self.CONFIG['DEFORM']['API_BASE_PATH']
@@ -117,6 +157,39 @@ class Test__get_base_uri(TestCase):
             )
 
 
+class Test__merge_request_defaults(TestCase):
+    def test_me(self):
+        payload = {'name': 'gena', 'tags': ['a', 'b']}
+        request_kwargs = {'url': 'http://chib.me/', 'json': payload}
+        request_defaults = {'timeout': 5, 'url': 'http://default.me/'}
+        response = merge_request_defaults(request_kwargs, request_defaults)
+        assert_that(
+            response,
+            equal_to({
+                'url': 'http://chib.me/',
+                'json': payload,
+                'timeout': 5,
+            })
+        )
+        # caller data is not copied and not changed
+        assert_that(response['json'] is payload, equal_to(True))
+        assert_that(
+            request_kwargs,
+            equal_to({'url': 'http://chib.me/', 'json': payload})
+        )
+        assert_that(
+            request_defaults,
+            equal_to({'timeout': 5, 'url': 'http://default.me/'})
+        )
+
+    def test_without_defaults(self):
+        request_kwargs = {'url': 'http://chib.me/'}
+        assert_that(
+            merge_request_defaults(request_kwargs, None) is request_kwargs,
+            equal_to(True)
+        )
+
+
 class Test__flatten(TestCase):
     def test_string(self):
         assert_that(
@@ -301,3 +374,296 @@ class Test__flatten(TestCase):
                 'groups.user.grants': [],
             })
         )
+
+
+class Test__iterate_in_background(TestCase):
+    def test_should_return_all_items(self):
+        assert_that(
+            list(iterate_in_background(iter(range(10)), buffer_size=2)),
+            equal_to(list(range(10)))
+        )
+
+    def test_should_reraise_worker_error(self):
+        def items():
+            yield 1
+            raise ValueError('boom')
+
+        assert_that(
+            calling(list).with_args(
+                iterate_in_background(items(), buffer_size=1)
+            ),
+            raises(ValueError, '^boom$')
+        )
+
+    def test_should_not_read_ahead_more_than_buffer_size(self):
+        consumed = []
+        started = threading.Event()
+
+        def items():
+            for i in range(100):
+                consumed.append(i)
+                started.set()
+                yield i
+
+        response = iterate_in_background(items(), buffer_size=2)
+        assert_that(next(response), equal_to(0))
+        started.wait(1)
+        response.close()
+        # 1 yielded, 2 buffered and 1 waiting for the free slot
+        assert_that(len(consumed) <= 4, equal_to(True))
+
+    def test_should_close_iterator_on_close(self):
+        closed = threading.Event()
+        threads_count = threading.active_count()
+
+        def items():
+            try:
+                for i in range(100):
+                    yield i
+            finally:
+                closed.set()
+
+        response = iterate_in_background(items(), buffer_size=1)
+        next(response)
+        response.close()
+        assert_that(closed.is_set(), equal_to(True))
+        assert_that(threading.active_count(), equal_to(threads_count))
+
+
+class Test__iterate_concurrently(TestCase):
+    def test_ordered(self):
+        assert_that(
+            list(iterate_concurrently(
+                lambda x: x * 2,
+                range(20),
+                workers=4
+            )),
+            equal_to([i * 2 for i in range(20)])
+        )
+
+    def test_unordered(self):
+        assert_that(
+            sorted(iterate_concurrently(
+                lambda x: x * 2,
+                range(20),
+                workers=4,
+                ordered=False
+            )),
+            equal_to([i * 2 for i in range(20)])
+        )
+
+    def test_should_reraise_error(self):
+        def func(x):
+            if x == 5:
+                raise ValueError('boom')
+            return x
+
+        assert_that(
+            calling(list).with_args(
+                iterate_concurrently(func, range(10), workers=2)
+            ),
+            raises(ValueError, '^boom$')
+        )
+
+    def test_should_not_submit_more_than_window(self):
+        submitted = []
+
+        def args():
+            for i in range(100):
+                submitted.append(i)
+                yield i
+
+        response = iterate_concurrently(
+            lambda x: x,
+            args(),
+            workers=2,
+            window=3
+        )
+        assert_that(next(response), equal_to(0))
+        response.close()
+        assert_that(len(submitted) <= 4, equal_to(True))
+
+
+class Test__iterate_json_array_property(TestCase):
+    def get_chunks(self, data, chunk_size):
+        data = json.dumps(data).encode('utf-8')
+        return [
+            data[i:i + chunk_size] for i in range(0, len(data), chunk_size)
+        ]
+
+    def test_me(self):
+        data = {
+            'page': 1,
+            'items': [
+                {'name': u'Гена', 'tags': ['[', ']', '{"}']},
+                12345,
+                1.5,
+                None,
+                True,
+                u'строка',
+                [],
+                {}
+            ],
+            'links': {'next': 'http://next'}
+        }
+        for chunk_size in [1, 2, 3, 7, 1000]:
+            result = {}
+            items = iterate_json_array_property(
+                self.get_chunks(data, chunk_size),
+                'items',
+                result
+            )
+            assert_that(list(items), equal_to(data['items']))
+            assert_that(
+                result,
+                equal_to({'page': 1, 'links': {'next': 'http://next'}})
+            )
+
+    def test_numbers_split_by_chunks(self):
+        experiments = [
+            ([b'{"items":[1.', b'5]}'], [1.5], {}),
+            ([b'{"items":[2e', b'3]}'], [2e3], {}),
+            ([b'{"items":[2e+', b'3, 1]}'], [2e3, 1], {}),
+            ([b'{"items":[-', b'1', b'2.2', b'5e-', b'1]}'], [-12.25e-1], {}),
+            ([b'{"total":1.', b'5,"items":[]}'], [], {'total': 1.5}),
+            ([b'{"items":[1', b'0],"total":2', b'0', b'}'], [10], {
+                'total': 20
+            }),
+        ]
+        for chunks, expected_items, expected_result in experiments:
+            result = {}
+            items = iterate_json_array_property(chunks, 'items', result)
+            assert_that(list(items), equal_to(expected_items))
+            assert_that(result, equal_to(expected_result))
+
+    def test_random_chunks(self):
+        random = Random(1)
+        data = {
+            'total': 12.5,
+            'items': [
+                {'price': random.random() * 1000, 'count': i, 'exp': 1e-7}
+                for i in range(20)
+            ] + [1.25e+20, -0.5, 0, 3.0],
+        }
+        encoded = json.dumps(data).encode('utf-8')
+        for i in range(50):
+            chunks = []
+            position = 0
+            while position < len(encoded):
+                size = random.randint(1, 8)
+                chunks.append(encoded[position:position + size])
+                position += size
+            result = {}
+            items = iterate_json_array_property(chunks, 'items', result)
+            assert_that(list(items), equal_to(data['items']))
+            assert_that(result, equal_to({'total': 12.5}))
+
+    def test_empty(self):
+        for data in [{}, {'items': []}, {'items': [], 'page': 1}]:
+            result = {}
+            items = iterate_json_array_property(
+                self.get_chunks(data, 1),
+                'items',
+                result
+            )
+            assert_that(list(items), equal_to([]))
+
+    def test_invalid(self):
+        for data in [b'{"items": [1, 2', b'{"items": [1 2]}', b'[]']:
+            assert_that(
+                calling(list).with_args(
+                    iterate_json_array_property([data], 'items', {})
+                ),
+                raises(ValueError)
+            )
+
+
+class Test__write_ndjson(TestCase):
+    def setUp(self):
+        super(Test__write_ndjson, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'export.ndjson')
+        self.batches = [
+            [{'_id': 1, 'name': u'Гена'}, {'_id': 2}],
+            [],
+            [{'_id': 3}],
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def read_items(self, dest_file):
+        return [json.loads(i.decode('utf-8')) for i in dest_file]
+
+    def test_me(self):
+        stats_history = []
+        response = write_ndjson(
+            iter(self.batches),
+            self.path,
+            progress=stats_history.append
+        )
+        with open(self.path, 'rb') as dest_file:
+            assert_that(
+                self.read_items(dest_file),
+                equal_to(self.batches[0] + self.batches[2])
+            )
+        assert_that(response['documents'], equal_to(3))
+        assert_that(response['bytes'], equal_to(os.path.getsize(self.path)))
+        assert_that(
+            [i['documents'] for i in stats_history],
+            equal_to([2, 3])
+        )
+        for key in ['seconds', 'documents_per_second', 'mb_per_second']:
+            assert_that(key in response, equal_to(True))
+
+    def test_gzip(self):
+        response = write_ndjson(iter(self.batches), self.path, 'gzip')
+        with gzip.open(self.path, 'rb') as dest_file:
+            assert_that(
+                self.read_items(dest_file),
+                equal_to(self.batches[0] + self.batches[2])
+            )
+        assert_that(response['documents'], equal_to(3))
+
+    def test_unknown_compression(self):
+        assert_that(
+            calling(write_ndjson).with_args([], self.path, 'rar'),
+            raises(ValueError)
+        )
+
+
+class Test__read_records(TestCase):
+    def setUp(self):
+        super(Test__read_records, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp_dir, name)
+        open_file = gzip.open if name.endswith('.gz') else open
+        with open_file(path, 'wb') as dest_file:
+            dest_file.write(data.encode('utf-8'))
+        return path
+
+    def test_ndjson(self):
+        data = u'{"name": "Гена"}\n\n{"age": 26}\n'
+        expected = [{'name': u'Гена'}, {'age': 26}]
+        for name in ['records.ndjson', 'records.ndjson.gz']:
+            assert_that(
+                list(read_records(self.write(name, data))),
+                equal_to(expected)
+            )
+
+    def test_csv(self):
+        data = u'name,age\nГена,26\nvova,27\n'
+        expected = [
+            {'name': u'Гена', 'age': '26'},
+            {'name': 'vova', 'age': '27'}
+        ]
+        for name in ['records.csv', 'records.csv.gz']:
+            assert_that(
+                list(read_records(self.write(name, data))),
+                equal_to(expected)
+            )